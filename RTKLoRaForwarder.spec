@@ -54,52 +54,60 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # 运行时用不到的标准库/工具包：减小 PYZ 与 one-file 解压体积，缩短冷启动
+    # （sqlite3 供遥测使用，不可排除）
+    excludes=[
+        'unittest', 'doctest', 'pydoc', 'pydoc_data', 'lib2to3', 'idlelib',
+        'test', 'tkinter.test', 'distutils', 'setuptools', 'pip',
+        'pytest', '_pytest',
+    ],
     noarchive=False,
 )
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
-# one-file 模式：产出单一 EXE；如需 one-folder，请参考下方注释的 COLLECT 版本
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
-    name='RTKLoRaForwarder',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    console=False,  # GUI 程序，无控制台窗口
-    disable_windowed_traceback=False,
-    target_arch=None,
-    uac_admin=False,
-    uac_uiaccess=False,
-    # icon='app.ico',  # 如有图标，可解除注释并填入路径
-)
-
-# 如需 one-folder（便于调试），请改用以下 COLLECT（并将上面的 EXE exclude_binaries=True，见 PyInstaller 默认生成模板）：
-# exe = EXE(
-#     pyz,
-#     a.scripts,
-#     [],
-#     exclude_binaries=True,
-#     name='RTKLoRaForwarder',
-#     debug=False,
-#     bootloader_ignore_signals=False,
-#     strip=False,
-#     upx=True,
-#     console=False,
-# )
-# coll = COLLECT(
-#     exe,
-#     a.binaries,
-#     a.zipfiles,
-#     a.datas,
-#     strip=False,
-#     upx=True,
-#     upx_exclude=[],
-#     name='RTKLoRaForwarder'
-# )
+# UPX 压缩后每次启动都要解压 DLL，冷启动明显变慢（且易被杀软误报），故关闭
+# 默认 one-file：产出单一 EXE；设置环境变量 RTKLORA_ONEDIR=1 构建 one-folder
+# （免去每次启动解压到临时目录，冷启动最快，适合固定安装的机载电脑）
+if os.environ.get('RTKLORA_ONEDIR') == '1':
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='RTKLoRaForwarder',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.zipfiles,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name='RTKLoRaForwarder'
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.zipfiles,
+        a.datas,
+        name='RTKLoRaForwarder',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,  # GUI 程序，无控制台窗口
+        disable_windowed_traceback=False,
+        target_arch=None,
+        uac_admin=False,
+        uac_uiaccess=False,
+        # icon='app.ico',  # 如有图标，可解除注释并填入路径
+    )
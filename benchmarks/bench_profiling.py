@@ -0,0 +1,125 @@
+"""阶段计时钩子开销基准。
+
+1. 单对钩子（t0() + record()）在关闭/开启时的耗时，与空循环相减
+2. 按 app 中的埋点方式（每块一次 net_chunk，每帧一次 net_frame）处理一个典型历元
+   （1005 + 四星座 MSM7），每帧执行与 _on_net_frame 相同的统计/缓存/MSM 头解析；
+   关闭时的开销 = 钩子对数 * 单对耗时，占每历元处理时间的比例
+整段流水线直接对比受调度噪声影响较大（数个百分点），因此以 1 的差值为准。
+
+运行：python benchmarks/bench_profiling.py
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from rtk_lora.ingest import FrameRing  # noqa: E402
+from rtk_lora.profiling import PROFILER  # noqa: E402
+from rtk_lora.rtcm_parser import RTCMParser  # noqa: E402
+from rtk_lora.rtcm_msm import MsmEpochTracker, decode_msm_header, is_msm  # noqa: E402
+from rtk_lora.stream_stats import StreamStats  # noqa: E402
+from rtk_lora.warm_start import WarmStartCache  # noqa: E402
+from rtcm_samples import frame, msm_payload, payload_1005  # noqa: E402
+
+CHUNK = frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9)) + b"".join(
+    frame(msm_payload(m, 100000, list(range(1, 13)), [2, 16, 22], mmb=int(m != 1127)))
+    for m in (1077, 1087, 1097, 1127)
+)
+
+
+class Pipeline:
+    def __init__(self, hooks: bool):
+        self.ring = FrameRing()
+        self.stats = StreamStats()
+        self.warm = WarmStartCache()
+        self.tracker = MsmEpochTracker()
+        self.hooks = hooks
+
+    def on_frame(self, msg_num, view):
+        self.stats.record(msg_num, len(view))
+        self.warm.add(msg_num, view)
+        if is_msm(msg_num):
+            hdr = decode_msm_header(view[3:-3])
+            if hdr:
+                self.tracker.feed(hdr)
+
+    def chunk(self):
+        ring = self.ring
+        ring.write(CHUNK)
+        if not self.hooks:
+            while True:
+                item = ring.next_frame()
+                if item is None:
+                    return
+                self.on_frame(*item)
+        t0 = PROFILER.t0()
+        while True:
+            item = ring.next_frame()
+            if item is None:
+                break
+            t1 = PROFILER.t0()
+            self.on_frame(*item)
+            PROFILER.record("net_frame", t1)
+        PROFILER.record("net_chunk", t0)
+
+
+def bench(variants, loops: int = 500, repeat: int = 21):
+    """交替运行各变体，取每个变体的最小值以压低调度噪声。"""
+    best = {name: float("inf") for name, _p, _on in variants}
+    for _ in range(repeat):
+        for name, p, on in variants:
+            PROFILER.enabled = on
+            t = time.perf_counter()
+            for _ in range(loops):
+                p.chunk()
+            best[name] = min(best[name], (time.perf_counter() - t) / loops * 1e9)
+    PROFILER.enabled = False
+    return best
+
+
+def hook_pair_ns(loops: int = 200000, repeat: int = 7) -> tuple:
+    """返回 (关闭时单对钩子 ns, 开启时单对钩子 ns)，已扣除空循环。"""
+    def empty():
+        for _ in range(loops):
+            pass
+
+    def hooks():
+        for _ in range(loops):
+            t0 = PROFILER.t0()
+            PROFILER.record("bench", t0)
+
+    def best(fn, on):
+        PROFILER.enabled = on
+        b = float("inf")
+        for _ in range(repeat):
+            t = time.perf_counter()
+            fn()
+            b = min(b, time.perf_counter() - t)
+        PROFILER.enabled = False
+        return b / loops * 1e9
+
+    base = best(empty, False)
+    return best(hooks, False) - base, best(hooks, True) - base
+
+
+def main():
+    off_ns, on_ns = hook_pair_ns()
+    print(f"单对钩子: 关闭 {off_ns:.0f} ns  开启 {on_ns:.0f} ns")
+    best = bench([
+        ("无钩子", Pipeline(hooks=False), False),
+        ("钩子关闭", Pipeline(hooks=True), False),
+        ("钩子开启", Pipeline(hooks=True), True),
+    ])
+    base = best["无钩子"]
+    for name, ns in best.items():
+        print(f"{name:<6} {ns:9.0f} ns/历元  ({(ns - base) / base * 100:+.2f}%, 含调度噪声)")
+    pairs = 1 + len(RTCMParser().feed_frames(CHUNK))  # net_chunk + 每帧 net_frame
+    print(f"关闭时开销: {pairs} 对 * {off_ns:.0f} ns = {pairs * off_ns / 1000:.2f} us/历元 "
+          f"= {pairs * off_ns / base * 100:.3f}% 处理时间")
+
+
+if __name__ == "__main__":
+    main()
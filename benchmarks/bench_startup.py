@@ -0,0 +1,183 @@
+"""冷启动回归基准：进程启动 -> 窗口出现、进程启动 -> 首字节转发到串口。
+
+- 源码版：python run_app.py；打包版：--exe dist/RTKLoRaForwarder(.exe)
+- 每次运行使用临时工作目录与独立 config.json，通过环境变量让程序写启动报告并在目标时间点退出
+  （见 rtk_lora/startup.py），报告中的墙钟时间点与本脚本记录的 spawn 时刻相减即为端到端耗时；
+  打包版的解压/加载也包含在内
+- 首字节转发：本地替身 Caster 持续推送 1005，串口为 pty（Linux/macOS）或 --serial 指定的
+  虚拟串口对一端（Windows 用 com0com，另一端由 --serial-peer 读取）；以在对端读到第一个字节为准
+- 另输出源码版 `python -X importtime` 下 rtk_lora.app 的导入耗时
+- 需要图形界面（Linux 无显示器时可用 xvfb-run）
+
+运行：python benchmarks/bench_startup.py [--exe PATH] [--runs 5]
+"""
+from __future__ import annotations
+import argparse
+import copy
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from rtk_lora.config import DEFAULT_CONFIG  # noqa: E402
+from rtk_lora.startup import AUTOSTART_ENV, EXIT_ENV, REPORT_ENV  # noqa: E402
+from caster_stub import StubCaster, stream  # noqa: E402
+from rtcm_samples import frame, payload_1005  # noqa: E402
+
+
+def _command(exe: Optional[str]) -> List[str]:
+    return [exe] if exe else [sys.executable, os.path.join(ROOT, "run_app.py")]
+
+
+def _write_config(cwd: str, serial_port: str = "", caster: Optional[StubCaster] = None):
+    cfg = copy.deepcopy(DEFAULT_CONFIG)
+    cfg["serial"]["port"] = serial_port
+    cfg["warm_start"]["enabled"] = False
+    if caster is not None:
+        cfg["ntrip"].update(host=caster.host, port=caster.port, mountpoint="BENCH")
+    with open(os.path.join(cwd, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(cfg, f)
+
+
+def _run(cmd: List[str], cwd: str, exit_after: str, autostart: bool, timeout: float) -> dict:
+    report = os.path.join(cwd, "startup.json")
+    env = dict(os.environ)
+    env[REPORT_ENV] = report
+    env[EXIT_ENV] = exit_after
+    if autostart:
+        env[AUTOSTART_ENV] = "1"
+    t_spawn = time.time()
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env)
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise RuntimeError(f"{exit_after} 超时 ({timeout:.0f}s)")
+    with open(report, encoding="utf-8") as f:
+        r = json.load(f)
+    r["t_spawn"] = t_spawn
+    return r
+
+
+def time_to_window(cmd: List[str], timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as cwd:
+        _write_config(cwd)
+        r = _run(cmd, cwd, "window_shown", False, timeout)
+    return {
+        "window_ms": (r["marks_wall"]["window_shown"] - r["t_spawn"]) * 1000.0,
+        "pre_python_ms": (r["wall0"] - r["t_spawn"]) * 1000.0,
+        "phases_ms": r["phases_ms"],
+    }
+
+
+class _PeerReader:
+    """读取虚拟串口对端，记录第一个字节到达的时刻。"""
+
+    def __init__(self, read):
+        self.first: Optional[float] = None
+        self._read = read
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        while True:
+            try:
+                data = self._read()
+            except OSError:
+                return
+            if data and self.first is None:
+                self.first = time.time()
+
+
+def time_to_forward(cmd: List[str], timeout: float, serial: Optional[str],
+                    serial_peer: Optional[str]) -> dict:
+    chunk = frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9))
+    caster = StubCaster([stream(chunk, interval=0.05, duration=timeout)]).start()
+    master = peer = None
+    try:
+        if serial:
+            import serial as pyserial  # type: ignore
+            peer = pyserial.Serial(serial_peer, 57600, timeout=0.2)
+            reader = _PeerReader(lambda: peer.read(64))
+            port = serial
+        else:
+            import pty
+            master, slave = pty.openpty()
+            port = os.ttyname(slave)
+            reader = _PeerReader(lambda: os.read(master, 4096))
+        with tempfile.TemporaryDirectory() as cwd:
+            _write_config(cwd, port, caster)
+            r = _run(cmd, cwd, "first_forward", True, timeout)
+        deadline = time.time() + 2.0
+        while reader.first is None and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        caster.stop()
+        if peer is not None:
+            peer.close()
+        if master is not None:
+            os.close(master)
+    if reader.first is None:
+        raise RuntimeError("对端未收到数据")
+    return {
+        "forward_ms": (reader.first - r["t_spawn"]) * 1000.0,
+        "forward_mark_ms": (r["marks_wall"]["first_forward"] - r["t_spawn"]) * 1000.0,
+    }
+
+
+def import_time_ms(runs: int) -> float:
+    out = []
+    for _ in range(runs):
+        p = subprocess.run([sys.executable, "-X", "importtime", "-c", "import rtk_lora.app"],
+                           cwd=ROOT, capture_output=True, text=True, check=True)
+        for line in p.stderr.splitlines():
+            if line.rstrip().endswith("| rtk_lora.app"):
+                out.append(int(line.split("|")[1]) / 1000.0)
+    return statistics.median(out)
+
+
+def _summary(name: str, values: List[float]):
+    print(f"{name:<24}{statistics.median(values):>10.0f}{min(values):>10.0f}{max(values):>10.0f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="冷启动耗时基准")
+    ap.add_argument("--exe", help="打包版可执行文件；缺省测源码版")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--serial", help="虚拟串口对中程序使用的一端（Windows）")
+    ap.add_argument("--serial-peer", help="虚拟串口对的另一端，由本脚本读取")
+    ap.add_argument("--no-forward", action="store_true", help="只测窗口出现")
+    args = ap.parse_args(argv)
+    if args.serial and not args.serial_peer:
+        ap.error("--serial 需要同时给出 --serial-peer")
+
+    cmd = _command(args.exe)
+    print(f"目标: {' '.join(cmd)}  次数: {args.runs}")
+    if not args.exe:
+        print(f"导入 rtk_lora.app (importtime 中位数): {import_time_ms(args.runs):.1f}ms")
+
+    win = [time_to_window(cmd, args.timeout) for _ in range(args.runs)]
+    print(f"{'指标(ms)':<24}{'中位数':>10}{'最小':>10}{'最大':>10}")
+    _summary("启动 -> 窗口出现", [w["window_ms"] for w in win])
+    _summary("  其中至计时起点(解释器/解压)", [w["pre_python_ms"] for w in win])
+    for phase in win[0]["phases_ms"]:
+        _summary(f"  阶段 {phase}", [w["phases_ms"].get(phase, 0.0) for w in win])
+    if not args.no_forward:
+        fwd = [time_to_forward(cmd, args.timeout, args.serial, args.serial_peer)
+               for _ in range(args.runs)]
+        _summary("启动 -> 首字节转发", [f["forward_ms"] for f in fwd])
+        _summary("  (程序内记录)", [f["forward_mark_ms"] for f in fwd])
+
+
+if __name__ == "__main__":
+    main()
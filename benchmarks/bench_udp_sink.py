@@ -0,0 +1,66 @@
+"""UDP 输出吞吐基准。
+
+典型历元（1005 + 四星座 MSM7，每星座 12 星 3 频，约 1.8 kB）连续送入 UdpSink，
+目标为本机 N 个单播接收端（只绑定不读取，内核缓冲满后丢弃不影响发送端）或一个组播组。
+输出每历元发送耗时、历元/秒与报文/秒；接收端增多时耗时应近似按 sendto 次数线性增长，
+组装（分帧 + 打包）只做一次。
+
+运行：python benchmarks/bench_udp_sink.py
+"""
+from __future__ import annotations
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from rtk_lora.udp_sink import UdpSink  # noqa: E402
+from rtcm_samples import frame, msm_obs_payload, payload_1005  # noqa: E402
+
+SATS = [(i, 70 + i, 0, 512, 100) for i in range(1, 13)]
+SIGS = [2, 16, 22]
+CELLS = [(1000 * i, 2000 * i, 500, 0, 700, -30) for i in range(len(SATS) * len(SIGS))]
+
+
+def _epoch(tow: int) -> bytes:
+    out = frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9))
+    for m in (1077, 1087, 1097, 1127):
+        out += frame(msm_obs_payload(m, tow, SATS, SIGS, CELLS, mmb=int(m != 1127)))
+    return out
+
+
+def bench(targets, epochs: int = 2000, mtu: int = 1400):
+    sink = UdpSink(targets, mtu=mtu)
+    data = [_epoch(1000 * i) for i in range(50)]
+    t = time.perf_counter()
+    for i in range(epochs):
+        sink.send(data[i % len(data)])
+    dt = time.perf_counter() - t
+    n = sink.datagrams_sent
+    sink.close()
+    return dt / epochs * 1e6, epochs / dt, n * len(targets) / dt, len(data[0])
+
+
+def main():
+    receivers = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(32)]
+    for r in receivers:
+        r.bind(("127.0.0.1", 0))
+    addrs = [r.getsockname() for r in receivers]
+    print(f"{'目标':<16}{'us/历元':>10}{'历元/s':>10}{'报文/s':>12}")
+    for n in (1, 8, 32):
+        us, eps, dps, size = bench(addrs[:n])
+        print(f"{f'单播 x{n}':<16}{us:>10.1f}{eps:>10.0f}{dps:>12.0f}")
+    try:
+        us, eps, dps, size = bench([("239.255.77.78", 5999)])
+        print(f"{'组播 x1':<16}{us:>10.1f}{eps:>10.0f}{dps:>12.0f}")
+    except OSError as e:
+        print(f"组播不可用: {e}")
+    print(f"历元大小 {size} 字节")
+    for r in receivers:
+        r.close()
+
+
+if __name__ == "__main__":
+    main()
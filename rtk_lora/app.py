@@ -1,21 +1,56 @@
-"""Tkinter GUI 主程序。"""
+"""Tkinter GUI 主程序。
+
+说明：实时逐条打印 RTCM 消息号（不展示完整数据）。
+
+启动顺序（尽快显示窗口）：
+- 模块级只导入窗口与实时统计需要的轻量模块；NTRIP/串口/RINEX/遥测/输入/输出等子系统
+  在窗口出现后由后台线程预加载，点“连接”时若尚未加载完成则就地导入
+- 串口枚举在后台线程进行，结果回到 UI 线程填充下拉框
+- 各阶段耗时由 startup.STARTUP 记录，窗口出现后写入日志
+"""
 from __future__ import annotations
+import importlib
+import os
 import threading
 import time
 import math
 import tkinter as tk
 from tkinter import ttk, messagebox
-import serial.tools.list_ports  # type: ignore
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from .config import load_config, save_config
-from .serial_forwarder import SerialForwarder
-from .ntrip_client import NTRIPClient
-"""
-说明：实时逐条打印 RTCM 消息号（不展示完整数据）。
-"""
 from .rtcm_parser import RTCMParser
-from .rtcm_1005 import parse_1005
+from .base_monitor import BaseMonitor
+from .decode_cache import DecodeCache
+from .nmea_tap import GgaScheduler, NmeaTap, PositionFix
+from .profiling import PROFILER, SamplingProfiler
+from .startup import STARTUP, autostart_requested, install_env_hooks
+from .stream_stats import StreamStats
+from .rtcm_msm import MsmEpochTracker, decode_msm_header, is_msm
+from .warm_start import WarmStartCache
+
+if TYPE_CHECKING:
+    from .ntrip_client import NTRIPClient
+    from .ntrip_server import NTRIPServer
+    from .pipeline import Pipeline, PipelineContext
+    from .rinex import RinexConverter
+    from .serial_forwarder import SerialForwarder
+    from .sources import InputSource, SourceLoop
+    from .telemetry import TelemetryStore
+    from .udp_sink import UdpSink
+
+# 窗口出现后后台预加载的子系统（连接时才用到）
+_DEFERRED_MODULES = (
+    "serial",
+    "rtk_lora.serial_forwarder",
+    "rtk_lora.ntrip_client",
+    "rtk_lora.ntrip_server",
+    "rtk_lora.rinex",
+    "rtk_lora.sources",
+    "rtk_lora.telemetry",
+    "rtk_lora.udp_sink",
+    "rtk_lora.pipeline",
+)
 
 
 class AppState:
@@ -23,23 +58,54 @@ class AppState:
         self.cfg = load_config()
         self.serial: Optional[SerialForwarder] = None
         self.ntrip: Optional[NTRIPClient] = None
+        self.uploader: Optional[NTRIPServer] = None
+        # IP 自组网电台的 UDP 输出（与串口同样受备用模式控制）
+        self.udp_out: Optional[UdpSink] = None
+        self.rinex: Optional[RinexConverter] = None
+        # 会话遥测（每秒指标与事件，批量写入本地 SQLite）
+        self.telemetry: Optional[TelemetryStore] = None
+        self.tel_reconnects = 0
+        self.tel_outages = 0
+        # config.json 中声明的附加输入（TCP/UDP/串口），共用一个事件循环
+        self.inputs: Optional[SourceLoop] = None
+        # config.json 中声明的额外流水线
+        self.pipeline_ctx: Optional[PipelineContext] = None
+        self.pipelines: list[Pipeline] = []
         self.running = False
         self.bytes_rtcm = 0
-        # 仅用于实时解析消息号（不做统计）
-        self.rx_parser = RTCMParser()
-
-        # 基站监测（来自串口 RX）
-        self.base_parser = RTCMParser()
+        # 按消息类型做滚动统计（速率/抖动/完整率）
+        self.stream_stats = StreamStats()
+        # 网络数据路径（NTRIP 接收线程与 role=net 附加输入的事件循环线程）共用的锁：
+        # rx_msgs/rx_frames、MSM/基准/RINEX 状态及串口/UDP 转发都在锁内进行
+        self.net_lock = threading.Lock()
+        # 本次接收数据块中分出的消息号（用于打印 TX）
+        self.rx_msgs: list[int] = []
+        # 存在 role=net 附加输入时，NTRIP 数据块只转发其中的完整帧（避免与附加输入的帧交错）
+        self.net_inputs = False
+        self.rx_frames: list[tuple[int, bytes]] = []
+        # 静态消息(1005 等)解码缓存：内容不变的重复消息直接复用解码结果
+        self.decode_cache = DecodeCache()
+
+        # 基站监测（来自串口 RX）；校验 CRC，只有完整有效的帧才会被上传
+        self.base_parser = RTCMParser(verify_crc=True)
         self.base_last_rx_time = 0.0
         self.base_seen_1005 = False
         self.base_last_1005 = 0.0
         self.base_1005_pos: Optional[tuple[float, float, float]] = None
 
+        # 流动站自身定位（串口 RX 中的 GGA / UBX NAV-PVT），用于按实际位置上传 GGA
+        self.rover_tap = NmeaTap()
+
         # 网络 RTK 基准（从 NTRIP RTCM 中解析 1005）
-        self.net_base_parser = RTCMParser()
         self.net_seen_1005 = False
         self.net_last_1005 = 0.0
         self.net_1005_pos: Optional[tuple[float, float, float]] = None
+        # 本地基站("base")与网络 RTK("net")基准坐标的增量统计与跳变/换站检测
+        self.base_monitor = BaseMonitor()
+        # 网络 RTK 的 MSM 历元：各星座卫星/信号数
+        self.msm_tracker = MsmEpochTracker()
+        # 暖启动缓存：最近的静态消息 + 最近完整 MSM 历元
+        self.warm_cache = WarmStartCache()
 
         # 转发状态（备用模式下可能被抑制）
         self.forward_enabled = True
@@ -48,15 +114,48 @@ class AppState:
 
 class RTKLoRaApp(tk.Tk):
     def __init__(self):
-        super().__init__()
+        with STARTUP.phase("tk_init"):
+            super().__init__()
         self.title("RTK LoRa 转发器")
-        self.state = AppState()
+        with STARTUP.phase("config"):
+            self.state = AppState()
         # 串口下拉框显示文本 -> 实际端口号 映射
         self._port_display_to_device: dict[str, str] = {}
+        self._ports_busy = False
+        # 复选框状态的普通属性副本：NTRIP 线程读取它，不在后台线程访问 Tk 变量
+        self._use_1005_pos = True
+        self._forwarded = False
         self._ui_thread_id = threading.get_ident()
-        self._build_ui()
+        with STARTUP.phase("build_ui"):
+            self._build_ui()
         self._refresh_ports()
+        install_env_hooks(STARTUP, lambda: self.after(0, self._exit_for_benchmark))
+        # 空闲回调在窗口首次绘制之后才执行
+        self.after_idle(self._on_window_shown)
         self.after(1000, self._tick_stats)
+
+    def _on_window_shown(self):
+        STARTUP.mark("window_shown")
+        self._log(STARTUP.format())
+        threading.Thread(target=self._preload_subsystems, daemon=True).start()
+        if autostart_requested() and not self.state.running:
+            self._toggle()
+
+    def _preload_subsystems(self):
+        # 后台导入连接时才用到的子系统，点“连接”时无需再等待导入
+        t = time.perf_counter()
+        for name in _DEFERRED_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:  # noqa
+                self._log(f"预加载 {name} 失败: {e}")
+        STARTUP.mark("subsystems_loaded")
+        self._log(f"子系统预加载完成 {(time.perf_counter() - t) * 1000:.0f}ms")
+
+    def _exit_for_benchmark(self):
+        if self.state.running:
+            self._stop()
+        self.destroy()
     # 统计调度已移除
 
     # UI 构建
@@ -76,7 +175,8 @@ class RTKLoRaApp(tk.Tk):
             row=1, column=0, sticky='w'
         )
         self.var_use_1005_pos = tk.BooleanVar(value=True)
-        ttk.Checkbutton(mode_frame, text='备用模式：使用基站1005自动更新位置(GGA)', variable=self.var_use_1005_pos).grid(
+        ttk.Checkbutton(mode_frame, text='备用模式：使用基站1005自动更新位置(GGA)', variable=self.var_use_1005_pos,
+                        command=self._on_use_1005_changed).grid(
             row=2, column=0, sticky='w'
         )
 
@@ -94,6 +194,10 @@ class RTKLoRaApp(tk.Tk):
         ]):
             ttk.Label(ntrip_frame, text=lbl).grid(row=i, column=0, sticky='e')
             w.grid(row=i, column=1, sticky='w', pady=1)
+        self.var_auto_mount = tk.BooleanVar(value=False)
+        ttk.Checkbutton(ntrip_frame, text='自动选择最近挂载点', variable=self.var_auto_mount).grid(
+            row=5, column=0, columnspan=2, sticky='w'
+        )
 
         # 位置
         pos_frame = ttk.LabelFrame(frm, text='位置 (WGS84)')
@@ -123,6 +227,13 @@ class RTKLoRaApp(tk.Tk):
         self.btn_start.grid(row=0, column=0, padx=5)
         self.lbl_status = ttk.Label(ctrl_frame, text='未连接')
         self.lbl_status.grid(row=0, column=1)
+        self.var_profile = tk.BooleanVar(value=False)
+        ttk.Checkbutton(ctrl_frame, text='阶段计时', variable=self.var_profile, command=self._toggle_profile).grid(
+            row=0, column=2, padx=5
+        )
+        self.btn_sample = ttk.Button(ctrl_frame, text='采样剖析10s', command=self._start_sampling)
+        self.btn_sample.grid(row=0, column=3)
+        self._sampler = SamplingProfiler(log=self._log)
 
         # 统计 & 日志
         stat_frame = ttk.LabelFrame(frm, text='状态')
@@ -139,6 +250,12 @@ class RTKLoRaApp(tk.Tk):
         self.lbl_net_base_pos.pack(anchor='w')
         self.lbl_base_diff = ttk.Label(stat_frame, text='本地基站 vs 网络RTK 预估差异: -')
         self.lbl_base_diff.pack(anchor='w')
+        self.lbl_sats = ttk.Label(stat_frame, text='网络RTK卫星: -')
+        self.lbl_sats.pack(anchor='w')
+        self.lbl_stream = ttk.Label(stat_frame, text='消息统计(10s): -', justify='left')
+        self.lbl_stream.pack(anchor='w')
+        self.lbl_prof = ttk.Label(stat_frame, text='', justify='left')
+        self.lbl_prof.pack(anchor='w')
         self.txt_log = tk.Text(stat_frame, height=12, width=60)
         self.txt_log.pack(fill=tk.BOTH, expand=True)
 
@@ -161,6 +278,7 @@ class RTKLoRaApp(tk.Tk):
         self.var_mode.set(cfg.get('mode', 'normal'))
         bs = cfg.get('base_station', {})
         self.var_use_1005_pos.set(bool(bs.get('use_1005_position', True)))
+        self._on_use_1005_changed()
         n = cfg['ntrip']
         p = cfg['position']
         s = cfg['serial']
@@ -169,6 +287,7 @@ class RTKLoRaApp(tk.Tk):
         self.ent_mount.insert(0, n['mountpoint'])
         self.ent_user.insert(0, n['username'])
         self.ent_pass.insert(0, n['password'])
+        self.var_auto_mount.set(bool(n.get('auto_select', False)))
         self.ent_lat.insert(0, p['lat'])
         self.ent_lon.insert(0, p['lon'])
         self.ent_alt.insert(0, p['alt'])
@@ -185,8 +304,24 @@ class RTKLoRaApp(tk.Tk):
                     self.cmb_port.set(port)
 
     def _refresh_ports(self):
-        ports = list(serial.tools.list_ports.comports())
+        # 枚举串口可能耗时数百毫秒（Windows 上尤甚），放到后台线程
+        if self._ports_busy:
+            return
+        self._ports_busy = True
+        threading.Thread(target=self._list_ports, daemon=True).start()
 
+    def _list_ports(self):
+        try:
+            import serial.tools.list_ports  # type: ignore
+            ports = list(serial.tools.list_ports.comports())
+        except Exception as e:  # noqa
+            self._log(f"串口枚举失败: {e}")
+            ports = []
+        STARTUP.mark("ports_listed")
+        self.after(0, lambda: self._apply_ports(ports))
+
+    def _apply_ports(self, ports: list):
+        self._ports_busy = False
         values: list[str] = []
         self._port_display_to_device.clear()
         for p in ports:
@@ -216,6 +351,9 @@ class RTKLoRaApp(tk.Tk):
 
         if selected_label:
             self.cmb_port.set(selected_label)
+        elif current and os.path.exists(current):
+            # 未被枚举的设备路径（/dev/serial/by-id/... 链接、pty 等）保持用户的选择
+            pass
         elif values:
             self.cmb_port.set(values[0])
 
@@ -229,6 +367,7 @@ class RTKLoRaApp(tk.Tk):
         cfg['ntrip']['mountpoint'] = self.ent_mount.get().strip()
         cfg['ntrip']['username'] = self.ent_user.get().strip()
         cfg['ntrip']['password'] = self.ent_pass.get().strip()
+        cfg['ntrip']['auto_select'] = bool(self.var_auto_mount.get())
         cfg['position']['lat'] = float(self.ent_lat.get())
         cfg['position']['lon'] = float(self.ent_lon.get())
         cfg['position']['alt'] = float(self.ent_alt.get())
@@ -238,83 +377,214 @@ class RTKLoRaApp(tk.Tk):
         cfg['serial']['baudrate'] = int(self.ent_baud.get())
         save_config(cfg)
 
-    # 提供给 NTRIPClient 的位置获取
+    def _on_use_1005_changed(self):
+        self._use_1005_pos = bool(self.var_use_1005_pos.get())
+
+    # 提供给 NTRIPClient 的位置获取（在 NTRIP 线程内调用）
+    def _rover_fix(self) -> Optional[PositionFix]:
+        g = self.state.cfg.get('gga', {})
+        if not g.get('use_rover_position', True):
+            return None
+        return self.state.rover_tap.fresh(float(g.get('rover_max_age_s', 5.0)))
+
     def _get_pos(self):
         cfg = self.state.cfg
+        fix = self._rover_fix()
+        if fix is not None:
+            return fix.lat_deg, fix.lon_deg, fix.alt_m
         mode = cfg.get('mode', 'normal')
         bs = cfg.get('base_station', {})
-        use_1005 = bool(bs.get('use_1005_position', True)) and bool(self.var_use_1005_pos.get())
+        use_1005 = bool(bs.get('use_1005_position', True)) and self._use_1005_pos
         if mode == 'backup' and use_1005 and self.state.base_1005_pos:
             return self.state.base_1005_pos
         p = cfg['position']
         return p['lat'], p['lon'], p['alt']
 
+    def _warm_start_frames(self) -> list[bytes]:
+        # 备用模式下基站在线时不转发网络RTK，也不应注入网络RTK的缓存数据
+        if not self.state.forward_enabled:
+            return []
+        return self.state.warm_cache.snapshot()
+
     def _on_serial_rx(self, data: bytes):
         # 该回调在串口接收线程内调用，不要直接更新 Tk
+        self.state.rover_tap.feed(data)
+        self._on_base_data(data, self.state.base_parser)
+
+    def _on_base_data(self, data, parser: RTCMParser):
+        # 本地基站数据：串口 RX 与 role=base 的附加输入共用；每条数据流使用各自的分帧器
+        t0 = PROFILER.t0()
         now = time.time()
-        self.state.base_last_rx_time = now
         try:
-            msgs = self.state.base_parser.feed_messages(data)
-            for msg_num, payload in msgs:
-                if msg_num == 1005:
-                    info = parse_1005(payload)
+            frames = parser.feed_frames(data)
+            # 串口 RX 上还有流动站的 NMEA/UBX：只有 CRC 有效的 RTCM 帧才算基站在线
+            if frames:
+                self.state.base_last_rx_time = now
+            uploader = self.state.uploader
+            for msg_num, frame in frames:
+                if uploader:
+                    uploader.push(frame)
+                if msg_num == 1005 or msg_num == 1006:
+                    info = self.state.decode_cache.decode(msg_num, frame[3:-3])
                     if info:
                         self.state.base_seen_1005 = True
                         self.state.base_last_1005 = now
                         self.state.base_1005_pos = (info.lat_deg, info.lon_deg, info.alt_m)
+                        self.state.base_monitor.feed("base", info, now)
         except Exception as e:
             self._log(f"基站RTCM解析异常(忽略): {e}")
-
-    def _on_rtcm(self, data: bytes):
-        self.state.bytes_rtcm += len(data)
-        # 实时逐条打印收到的 RTCM 消息号，并从网络 RTK 流中解析 1005
-        try:
-            msg_nums = self.state.rx_parser.feed(data)
-            for m in msg_nums:
-                self._log(f"{m} RX")
-        except Exception as e:
-            self._log(f"RTCM 解析异常(忽略): {e}")
-
+        PROFILER.record("serial_rx", t0)
+
+    def _on_net_frame(self, msg_num: int, frame: memoryview):
+        # NTRIP 接收线程内逐帧调用；frame 为接收缓冲中的视图，只在本回调内有效
+        t0 = PROFILER.t0()
+        st = self.state
+        with st.net_lock:
+            st.rx_msgs.append(msg_num)
+            if st.net_inputs:
+                st.rx_frames.append((msg_num, bytes(frame)))
+            ctx = st.pipeline_ctx
+            if ctx:
+                try:
+                    ctx.net_frame(msg_num, frame)
+                except Exception as e:  # noqa
+                    self._log(f"流水线处理异常(忽略): {e}")
+            self._handle_net_frame(msg_num, frame)
+        PROFILER.record("net_frame", t0)
+
+    def _handle_net_frame(self, msg_num: int, frame):
+        # 网络改正数据的逐帧处理（调用方持有 net_lock）
+        st = self.state
+        st.stream_stats.record(msg_num, len(frame))
+        # 实时逐条打印收到的 RTCM 消息号
+        self._log(f"{msg_num} RX")
         # 解析网络 RTK 流中的 1005，用于预估与本地基站的基准差异
         try:
-            msgs = self.state.net_base_parser.feed_messages(data)
-            now = time.time()
-            for msg_num, payload in msgs:
-                if msg_num == 1005:
-                    info = parse_1005(payload)
-                    if info:
-                        self.state.net_seen_1005 = True
-                        self.state.net_last_1005 = now
-                        self.state.net_1005_pos = (info.lat_deg, info.lon_deg, info.alt_m)
+            st.warm_cache.add(msg_num, frame)
+            if st.rinex:
+                st.rinex.feed(msg_num, frame)
+            if msg_num == 1005 or msg_num == 1006:
+                info = st.decode_cache.decode(msg_num, frame[3:-3])
+                if info:
+                    st.net_seen_1005 = True
+                    st.net_last_1005 = time.time()
+                    st.net_1005_pos = (info.lat_deg, info.lon_deg, info.alt_m)
+                    st.base_monitor.feed("net", info, st.net_last_1005)
+            elif is_msm(msg_num):
+                hdr = decode_msm_header(frame[3:-3])
+                if hdr:
+                    st.msm_tracker.feed(hdr)
         except Exception as e:
-            self._log(f"网络RTK 1005解析异常(忽略): {e}")
-
+            self._log(f"网络RTK 消息解析异常(忽略): {e}")
+
+    def _on_rtcm(self, data: memoryview):
+        # NTRIP 接收线程：data 为本次收到的原始数据块（视图），逐帧处理已在 _on_net_frame 完成
+        st = self.state
+        with st.net_lock:
+            st.bytes_rtcm += len(data)
+            msg_nums = st.rx_msgs
+            st.rx_msgs = []
+            frames = st.rx_frames
+            st.rx_frames = []
+            ctx = st.pipeline_ctx
+            if ctx:
+                ctx.net_chunk()
+            if not self._update_forward_enabled():
+                return
+            if st.net_inputs:
+                # 与附加输入共用串口/UDP：只转发完整帧，半帧留到凑齐后随下一块发出
+                if frames:
+                    self._forward_frames(frames, msg_nums)
+                return
+            udp_out = st.udp_out
+            if udp_out:
+                try:
+                    udp_out.send(data)
+                except Exception as e:  # noqa
+                    self._log(f"UDP 发送异常: {e}")
+            self._forward_serial(data, msg_nums)
+
+    def _on_input_frames(self, frames: list[tuple[int, bytes]]):
+        # role=net 附加输入：在输入事件循环线程内调用，frames 只含完整帧
+        st = self.state
+        t0 = PROFILER.t0()
+        with st.net_lock:
+            for msg_num, frame in frames:
+                self._handle_net_frame(msg_num, frame)
+                st.bytes_rtcm += len(frame)
+            if self._update_forward_enabled():
+                self._forward_frames(frames, [m for m, _f in frames])
+        PROFILER.record("net_frame", t0)
+
+    def _update_forward_enabled(self) -> bool:
         # 备用模式下：基站在线 -> 抑制网络RTK发送；基站断流超过阈值 -> 放行发送
-        cfg = self.state.cfg
+        st = self.state
+        cfg = st.cfg
         mode = cfg.get('mode', 'normal')
         timeout_s = float(cfg.get('base_station', {}).get('timeout_seconds', 10.0))
-        base_online = (time.time() - self.state.base_last_rx_time) <= timeout_s if self.state.base_last_rx_time else False
+        base_online = (time.time() - st.base_last_rx_time) <= timeout_s if st.base_last_rx_time else False
         should_send = True
         if mode == 'backup' and base_online:
             should_send = False
 
-        self.state.forward_enabled = should_send
-        if self.state._last_forward_enabled is None or self.state._last_forward_enabled != should_send:
-            self.state._last_forward_enabled = should_send
+        st.forward_enabled = should_send
+        if st._last_forward_enabled is None or st._last_forward_enabled != should_send:
+            st._last_forward_enabled = should_send
             if mode == 'backup':
                 self._log("备用模式：已放行网络RTK发送" if should_send else "备用模式：基站在线，已抑制网络RTK发送")
+            if st.telemetry:
+                st.telemetry.event("forward", {"enabled": should_send, "mode": mode})
+        return should_send
+
+    def _forward_frames(self, frames: list[tuple[int, bytes]], msg_nums: list[int]):
+        # 按完整帧转发到 UDP 与串口（调用方持有 net_lock）
+        udp_out = self.state.udp_out
+        if udp_out:
+            try:
+                udp_out.send_frames(frames)
+            except Exception as e:  # noqa
+                self._log(f"UDP 发送异常: {e}")
+        self._forward_serial(b"".join(f for _m, f in frames), msg_nums)
 
-        if should_send and self.state.serial:
+    def _forward_serial(self, data, msg_nums: list[int]):
+        if not self.state.serial:
+            return
+        try:
+            t0 = PROFILER.t0()
+            self.state.serial.send(data)
+            PROFILER.record("serial_write", t0)
+            if not self._forwarded:
+                self._forwarded = True
+                STARTUP.mark("first_forward")
+            # 发送成功后，按相同消息号逐条打印 TX（本程序透明转发，消息边界一致）
+            t0 = PROFILER.t0()
             try:
-                self.state.serial.send(data)
-                # 发送成功后，按相同消息号逐条打印 TX（本程序透明转发，消息边界一致）
-                try:
-                    for m in msg_nums:
-                        self._log(f"{m} TX")
-                except Exception:
-                    pass
-            except Exception as e:
-                self._log(f"串口发送异常: {e}")
+                for m in msg_nums:
+                    self._log(f"{m} TX")
+            except Exception:
+                pass
+            PROFILER.record("log_tx", t0)
+        except Exception as e:
+            self._log(f"串口发送异常: {e}")
+
+    def _toggle_profile(self):
+        on = bool(self.var_profile.get())
+        if on:
+            PROFILER.reset()
+        else:
+            self._log(PROFILER.format())
+        PROFILER.enabled = on
+
+    def _start_sampling(self):
+        if self._sampler.running:
+            return
+        path = time.strftime('profile-%Y%m%d-%H%M%S.speedscope.json')
+        self.btn_sample.config(state='disabled')
+        self._log(f"采样剖析开始(10s)，输出 {path}")
+        self._sampler.start(
+            10.0, output=path,
+            on_done=lambda _p: self.after(0, lambda: self.btn_sample.config(state='normal')),
+        )
 
     def _toggle(self):
         if not self.state.running:
@@ -331,23 +601,133 @@ class RTKLoRaApp(tk.Tk):
         ser_port = cfg['serial']['port']
         if not ser_port:
             raise ValueError("请选择串口")
+        try:
+            self._start_subsystems(cfg, ser_port)
+        except Exception:
+            # 任一子系统启动失败（如流水线配置无效）：关闭已启动的串口/线程/套接字，
+            # 否则下次“连接”会因串口被占用而失败
+            self._stop()
+            raise
+
+    def _start_subsystems(self, cfg: dict, ser_port: str):
+        # 子系统按需导入（通常已由后台预加载，此处只是取模块缓存）
+        from .ntrip_client import NTRIPClient
+        from .ntrip_server import NTRIPServer
+        from .pipeline import PipelineContext, build_pipelines
+        from .rinex import RinexConverter, RinexObsWriter
+        from .serial_forwarder import SerialForwarder
+        from .sources import SourceLoop, build_input
+        from .sourcetable import SourcetableCache
+        from .telemetry import TelemetryStore
+        from .udp_sink import UdpSink
 
         # 串口同时用于发送与接收：接收用于监测基站RTCM（备用模式）
+        ws = cfg.get('warm_start', {})
+        # 暖启动缓存属于上一次连接的基准站，换 caster/挂载点后不可再发给流动站；
+        # 须在串口打开（开始暖启动）之前清除
+        self.state.warm_cache.clear()
         self.state.serial = SerialForwarder(
             ser_port,
             cfg['serial']['baudrate'],
             log=self._log,
             on_rx=self._on_serial_rx,
+            buffer_max_age=float(cfg['serial'].get('outage_buffer_s', 3.0)),
+            warm_start=self._warm_start_frames if ws.get('enabled', True) else None,
+            warm_start_rate=float(ws.get('rate_bytes_per_s', 1000.0)),
         )
         self.state.serial.open()
         n = cfg['ntrip']
+        g = cfg.get('gga', {})
         self.state.ntrip = NTRIPClient(
             n['host'], n['port'], n['mountpoint'], n['username'], n['password'],
             get_position=self._get_pos,
             on_rtcm=self._on_rtcm,
+            on_frame=self._on_net_frame,
             log=self._log,
-            send_gga_interval=15.0
+            gga_scheduler=GgaScheduler(
+                interval=float(g.get('interval_s', 5.0)),
+                max_interval=float(g.get('max_interval_s', 30.0)),
+                min_interval=float(g.get('min_interval_s', 1.0)),
+                move_threshold_m=float(g.get('move_threshold_m', 50.0)),
+            ),
+            get_fix=self._rover_fix,
+            auto_select=bool(n.get('auto_select', False)),
+            sourcetable_cache=SourcetableCache(ttl=float(n.get('sourcetable_ttl', 3600.0))),
+            msm_type=int(n.get('msm_type', 0)) or None,
+            on_mountpoint_change=lambda _m: self.state.warm_cache.clear(),
+        )
+        up = cfg.get('ntrip_server', {})
+        if up.get('enabled') and up.get('host') and up.get('mountpoint'):
+            self.state.uploader = NTRIPServer(
+                up['host'], int(up.get('port', 2101)), up['mountpoint'], up.get('password', ''),
+                username=up.get('username', ''),
+                version=int(up.get('version', 1)),
+                log=self._log,
+            )
+            self.state.uploader.start()
+        uo = cfg.get('udp_output', {})
+        if uo.get('enabled') and uo.get('targets'):
+            try:
+                self.state.udp_out = UdpSink(
+                    uo['targets'], mtu=int(uo.get('mtu', 1400)), ttl=int(uo.get('ttl', 1)),
+                    interface=uo.get('interface') or None, log=self._log,
+                )
+            except Exception as e:  # noqa
+                self._log(f"UDP 输出配置无效(忽略): {e}")
+        rx = cfg.get('rinex', {})
+        if rx.get('enabled'):
+            writer = RinexObsWriter(
+                rx.get('directory', 'rinex'),
+                marker=rx.get('marker', 'RTKL'),
+                period_s=int(rx.get('period_s', 3600)),
+                log=self._log,
+            )
+            self.state.rinex = RinexConverter(writer, log=self._log,
+                                              decode_cache=self.state.decode_cache)
+            self.state.rinex.start()
+        tel = cfg.get('telemetry', {})
+        if tel.get('enabled'):
+            try:
+                self.state.telemetry = TelemetryStore(tel.get('path', 'telemetry.db'), log=self._log)
+                self.state.telemetry.start_session(
+                    mode=cfg.get('mode', 'normal'), host=n['host'], mountpoint=n['mountpoint'],
+                    serial_port=ser_port, baudrate=cfg['serial']['baudrate'],
+                )
+            except Exception as e:  # noqa
+                self.state.telemetry = None
+                self._log(f"遥测存储打开失败(忽略): {e}")
+        st = self.state
+        st.tel_reconnects = st.tel_outages = 0
+        mon = cfg.get('base_monitor', {})
+        st.base_monitor = BaseMonitor(
+            jump_threshold_m=float(mon.get('jump_threshold_m', 0.05)),
+            jump_sigma=float(mon.get('jump_sigma', 5.0)),
+            on_event=self._on_base_event,
         )
+        inputs = [c for c in cfg.get('inputs') or [] if c.get('enabled', True)]
+        st.net_inputs = any(c.get('role', 'base') == 'net' for c in inputs)
+        st.rx_frames = []
+        if inputs:
+            loop = SourceLoop(self._make_input_handler, log=self._log)
+            for c in inputs:
+                try:
+                    loop.add(build_input(c))
+                except Exception as e:  # noqa
+                    self._log(f"输入配置无效(忽略): {c} ({e})")
+            self.state.inputs = loop
+            loop.start()
+        pipelines = cfg.get('pipelines') or []
+        if pipelines:
+            ctx = PipelineContext(log=self._log, get_position=self._get_pos)
+            # 与主流程共用已打开的串口，流水线的串口输出/RX 数据源不再重复打开
+            ctx.add_serial(ser_port, self.state.serial)
+            # ntrip 数据源默认复用主连接的帧，不重复登录 caster
+            ctx.main_ntrip = (n['host'], n['port'], self.state.ntrip.mountpoint)
+            self.state.pipeline_ctx = ctx
+            self.state.pipelines = build_pipelines(pipelines, ctx)
+            for p in self.state.pipelines:
+                p.start()
+        self.state.stream_stats.reset()
         self.state.ntrip.start()
         self.state.running = True
         self.btn_start.config(text='断开')
@@ -355,23 +735,60 @@ class RTKLoRaApp(tk.Tk):
         self._log('开始连接 NTRIP 并转发...')
 
     def _stop(self):
+        for p in self.state.pipelines:
+            p.stop()
+            for m in p.metrics():
+                self._log(f"流水线 {p.name}/{m.name}: 输出 {m.frames_out} 帧 {m.bytes_out} 字节, "
+                          f"平均 {m.mean_us:.0f}us 最大 {m.max_us:.0f}us")
+        self.state.pipelines = []
+        if self.state.pipeline_ctx:
+            self.state.pipeline_ctx.close()
+            self.state.pipeline_ctx = None
+        if self.state.uploader:
+            self.state.uploader.stop()
+            self.state.uploader = None
         if self.state.ntrip:
             self.state.ntrip.stop()
             self.state.ntrip = None
+        if self.state.inputs:
+            self.state.inputs.stop()
+            self.state.inputs = None
+        if self.state.udp_out:
+            self.state.udp_out.close()
+            self.state.udp_out = None
+        if self.state.rinex:
+            # NTRIP 停止后再停转换，写出最后一个历元并关闭文件
+            self.state.rinex.stop()
+            self.state.rinex = None
         if self.state.serial:
             self.state.serial.close()
             self.state.serial = None
+        if self.state.telemetry:
+            self.state.telemetry.close()
+            self.state.telemetry = None
         self.state.running = False
         self.btn_start.config(text='连接')
         self.lbl_status.config(text='未连接')
         self._log('已断开')
 
+    def _make_input_handler(self, source: InputSource, stream: str):
+        # 在输入事件循环线程内调用：为每条新数据流创建处理函数
+        from .sources import FramedFeed
+
+        if source.role == 'net':
+            return FramedFeed(self._on_input_frames)
+        parser = RTCMParser(verify_crc=True)
+        return lambda data: self._on_base_data(data, parser)
+
     def _tick_stats(self):
+        ser_note = ''
         if self.state.serial:
             serial_bytes = self.state.serial.bytes_sent
+            if self.state.running and not self.state.serial.connected:
+                ser_note = f"  串口中断 {self.state.serial.outage_elapsed():.0f}s(等待重新插入)"
         else:
             serial_bytes = 0
-        self.lbl_bytes.config(text=f"RTCM字节: {self.state.bytes_rtcm}  串口字节: {serial_bytes}")
+        self.lbl_bytes.config(text=f"RTCM字节: {self.state.bytes_rtcm}  串口字节: {serial_bytes}{ser_note}")
 
         # 显示基站状态与转发状态
         cfg = self.state.cfg
@@ -408,49 +825,97 @@ class RTKLoRaApp(tk.Tk):
             self.lbl_net_base_pos.config(text="网络RTK基准1005位置: -")
 
         # 预估：同一飞机在使用本地基站 vs 使用网络 RTK 时，绝对坐标差异约等于两套基准坐标之差
-        if self.state.base_1005_pos and self.state.net_1005_pos:
-            blat, blon, balt = self.state.base_1005_pos
-            nlat, nlon, nalt = self.state.net_1005_pos
-            h_diff, v_diff = self._estimate_baseline_offset(blat, blon, balt, nlat, nlon, nalt)
+        offset = self.state.base_monitor.offset_enu()
+        if offset:
+            e, n, u = offset
             self.lbl_base_diff.config(
-                text=f"本地基站 vs 网络RTK 预估差异: 水平约 {h_diff:.2f} m，高程约 {v_diff:.2f} m"
+                text=f"本地基站 vs 网络RTK 预估差异: 水平约 {math.hypot(e, n):.2f} m"
+                     f"（东 {e:+.2f} 北 {n:+.2f}），高程约 {u:+.2f} m"
             )
         else:
             self.lbl_base_diff.config(text="本地基站 vs 网络RTK 预估差异: -")
 
+        epoch = self.state.msm_tracker.last_epoch
+        if epoch:
+            parts = [f"{name} {c.satellites}星/{c.signals}频" for name, c in epoch.counts]
+            self.lbl_sats.config(
+                text=f"网络RTK卫星: 共{epoch.total_satellites}颗 (" + ", ".join(parts) + ")"
+            )
+        else:
+            self.lbl_sats.config(text="网络RTK卫星: -")
+
+        self.lbl_stream.config(text=self._format_stream_stats())
+        self.lbl_prof.config(text=PROFILER.format() if PROFILER.enabled else '')
+
+        if self.state.telemetry and self.state.running:
+            try:
+                self._record_telemetry(now, base_online, epoch)
+            except Exception as e:  # noqa
+                self._log(f"遥测记录异常(忽略): {e}")
+
         self.after(1000, self._tick_stats)
 
-    @staticmethod
-    def _estimate_baseline_offset(
-        lat1: float,
-        lon1: float,
-        alt1: float,
-        lat2: float,
-        lon2: float,
-        alt2: float,
-    ) -> tuple[float, float]:
-        """估算两套基准坐标之间的水平/垂直差异（单位: m）。
-
-        说明：
-        - 假设无人机使用 RTK 解算时，绝对坐标 = 基站坐标 + 精确基线。
-        - 因此基站坐标之间的差异，可视作同一飞机在两种基准下的绝对坐标偏移近似。
-        """
-        # 简单平面近似（足够用于米级差异评估）
-        r_earth = 6378137.0
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        lat_mean = 0.5 * (lat1_rad + lat2_rad)
-
-        dx = r_earth * dlon * math.cos(lat_mean)
-        dy = r_earth * dlat
-        h = math.hypot(dx, dy)
-        v = abs(alt2 - alt1)
-        return h, v
+    def _record_telemetry(self, now: float, base_online: bool, epoch):
+        # 只向遥测队列追加一行并检测事件，写库由遥测线程批量完成
+        st = self.state
+        tel = st.telemetry
+        ser = st.serial
+        ntrip = st.ntrip
+        reconnects = ntrip.reconnects if ntrip else 0
+        if reconnects > st.tel_reconnects:
+            tel.event("ntrip_reconnect", {"count": reconnects})
+        st.tel_reconnects = reconnects
+        if ser and ser.outages > st.tel_outages:
+            tel.event("serial_outage", {"duration_s": ser.last_outage_s})
+            st.tel_outages = ser.outages
+        fields = dict(
+            ntrip_bytes=st.bytes_rtcm,
+            serial_bytes=ser.bytes_sent if ser else 0,
+            serial_connected=int(bool(ser and ser.connected)),
+            forward_enabled=int(st.forward_enabled),
+            base_online=int(base_online),
+            base_age_s=(now - st.base_last_rx_time) if st.base_last_rx_time else None,
+            satellites=epoch.total_satellites if epoch else None,
+            reconnects=reconnects,
+        )
+        if st.base_1005_pos:
+            fields.update(zip(("base_lat", "base_lon", "base_alt"), st.base_1005_pos))
+        if st.net_1005_pos:
+            fields.update(zip(("net_lat", "net_lon", "net_alt"), st.net_1005_pos))
+        offset = st.base_monitor.offset_enu()
+        if offset:
+            e, n, u = offset
+            fields.update(offset_h_m=math.hypot(e, n), offset_v_m=abs(u),
+                          offset_e_m=e, offset_n_m=n, offset_u_m=u)
+        tel.sample(t=now, **fields)
+
+    def _on_base_event(self, stream: str, kind: str, detail: dict):
+        # 在接收线程内调用（基站：串口 RX / 附加输入；网络：NTRIP 线程）
+        name = '本地基站' if stream == 'base' else '网络RTK基准'
+        if kind == 'jump':
+            self._log(f"{name} {detail['station_id']} 坐标跳变: 东 {detail['e_m']:+.3f} "
+                      f"北 {detail['n_m']:+.3f} 天 {detail['u_m']:+.3f} m")
+            tel_kind = 'base_moved' if stream == 'base' else 'net_base_moved'
+        else:
+            self._log(f"{name}参考站切换: {detail['from']} -> {detail['to']}，"
+                      f"水平 {detail['h_m']:.2f} m，高程 {detail['v_m']:+.2f} m")
+            tel_kind = 'base_station_changed' if stream == 'base' else 'net_station_changed'
+        tel = self.state.telemetry
+        if tel:
+            tel.event(tel_kind, detail)
+
+    def _format_stream_stats(self) -> str:
+        snap = self.state.stream_stats.snapshot()
+        if not snap:
+            return '消息统计(10s): -'
+        lines = ['消息统计(10s):']
+        for ts in snap:
+            w = ts.windows[0]
+            lines.append(
+                f"  {ts.msg_num}: {w.rate_hz:.1f}Hz {w.bytes_per_s / 1000:.2f}kB/s "
+                f"抖动{w.jitter_s * 1000:.0f}ms 完整{w.completeness * 100:.0f}% 时效{ts.age_s:.1f}s"
+            )
+        return '\n'.join(lines)
 
     # 十六进制预览已停用
 
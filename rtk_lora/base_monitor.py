@@ -0,0 +1,211 @@
+"""基准站坐标监视：本地基站与网络 RTK 基准（1005/1006）的增量统计、跳变与换站检测。
+
+功能点：
+- 按 (数据流, 参考站 ID) 维护 ECEF 坐标的 Welford 增量均值/协方差，内存 O(1)，
+  每条 1005/1006 的更新只是十几次浮点运算，可直接在接收线程内调用
+- 跳变：新坐标偏离该站当前均值超过 max(jump_threshold_m, jump_sigma × 三维标准差)
+  时立即产生事件，并以新坐标重新开始统计
+- 换站：同一数据流的参考站 ID 变化时立即产生事件（附新旧坐标的 ENU 距离）；
+  切回曾出现过的站继续沿用其统计
+- 两路数据流当前站均值之差按 ENU 给出（以本地基站为原点的精确旋转，不做平面近似）
+- 事件通过 on_event(stream, kind, detail) 回调，在调用 feed 的线程内执行；
+  同一条消息既换站又相对该站历史均值跳变时，先报 station_changed 再报 jump
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .rtcm_1005 import Rtcm1005, ecef_to_lla
+
+EventCallback = Callable[[str, str, dict], None]
+Vec3 = Tuple[float, float, float]
+
+
+def ecef_delta_to_enu(dx: float, dy: float, dz: float, lat_deg: float, lon_deg: float) -> Vec3:
+    """把 ECEF 坐标差旋转到以 (lat, lon) 为原点的当地东/北/天。"""
+    lat = math.radians(lat_deg)
+    lon = math.radians(lon_deg)
+    sl, cl = math.sin(lat), math.cos(lat)
+    so, co = math.sin(lon), math.cos(lon)
+    e = -so * dx + co * dy
+    n = -sl * co * dx - sl * so * dy + cl * dz
+    u = cl * co * dx + cl * so * dy + sl * dz
+    return e, n, u
+
+
+@dataclass(frozen=True)
+class StationSnapshot:
+    stream: str
+    station_id: int
+    count: int  # 当前统计段（最近一次跳变之后）的消息数
+    mean_ecef: Vec3
+    lat_deg: float
+    lon_deg: float
+    alt_m: float
+    std_enu_m: Vec3  # 东/北/天标准差
+    first_t: float
+    last_t: float
+    jumps: int
+    antenna_height_m: float
+
+
+class _Station:
+    __slots__ = ("station_id", "n", "mx", "my", "mz", "cxx", "cxy", "cxz", "cyy", "cyz", "czz",
+                 "lat", "lon", "first_t", "last_t", "jumps", "ant_h")
+
+    def __init__(self, station_id: int, info: Rtcm1005, now: float):
+        self.station_id = station_id
+        self.jumps = 0
+        self.restart(info, now)
+
+    def restart(self, info: Rtcm1005, now: float):
+        self.n = 1
+        self.mx, self.my, self.mz = info.ecef_x_m, info.ecef_y_m, info.ecef_z_m
+        self.cxx = self.cxy = self.cxz = self.cyy = self.cyz = self.czz = 0.0
+        # ENU 旋转取统计段第一条消息的经纬度：米级以内的移动对旋转矩阵的影响可忽略
+        self.lat, self.lon = info.lat_deg, info.lon_deg
+        self.first_t = self.last_t = now
+        self.ant_h = info.antenna_height_m
+
+    def sigma(self) -> float:
+        """三维标准差（协方差迹的平方根）。"""
+        if self.n < 2:
+            return 0.0
+        return math.sqrt(max(0.0, (self.cxx + self.cyy + self.czz) / (self.n - 1)))
+
+    def update(self, x: float, y: float, z: float, now: float):
+        self.n += 1
+        n = self.n
+        dx, dy, dz = x - self.mx, y - self.my, z - self.mz
+        self.mx += dx / n
+        self.my += dy / n
+        self.mz += dz / n
+        ex, ey, ez = x - self.mx, y - self.my, z - self.mz
+        self.cxx += dx * ex
+        self.cxy += dx * ey
+        self.cxz += dx * ez
+        self.cyy += dy * ey
+        self.cyz += dy * ez
+        self.czz += dz * ez
+        self.last_t = now
+
+    def std_enu(self) -> Vec3:
+        if self.n < 2:
+            return 0.0, 0.0, 0.0
+        k = 1.0 / (self.n - 1)
+        c = ((self.cxx * k, self.cxy * k, self.cxz * k),
+             (self.cxy * k, self.cyy * k, self.cyz * k),
+             (self.cxz * k, self.cyz * k, self.czz * k))
+        out = []
+        # 对角元 r·C·rᵀ，r 为 ECEF->ENU 旋转矩阵的各行
+        for r in _enu_rows(self.lat, self.lon):
+            v = sum(r[i] * c[i][j] * r[j] for i in range(3) for j in range(3))
+            out.append(math.sqrt(max(0.0, v)))
+        return out[0], out[1], out[2]
+
+    def snapshot(self, stream: str) -> StationSnapshot:
+        lat, lon, alt = ecef_to_lla(self.mx, self.my, self.mz)
+        return StationSnapshot(
+            stream=stream,
+            station_id=self.station_id,
+            count=self.n,
+            mean_ecef=(self.mx, self.my, self.mz),
+            lat_deg=lat,
+            lon_deg=lon,
+            alt_m=alt,
+            std_enu_m=self.std_enu(),
+            first_t=self.first_t,
+            last_t=self.last_t,
+            jumps=self.jumps,
+            antenna_height_m=self.ant_h,
+        )
+
+
+def _enu_rows(lat_deg: float, lon_deg: float):
+    lat = math.radians(lat_deg)
+    lon = math.radians(lon_deg)
+    sl, cl = math.sin(lat), math.cos(lat)
+    so, co = math.sin(lon), math.cos(lon)
+    return ((-so, co, 0.0), (-sl * co, -sl * so, cl), (cl * co, cl * so, sl))
+
+
+class BaseMonitor:
+    def __init__(self, jump_threshold_m: float = 0.05, jump_sigma: float = 5.0,
+                 max_stations: int = 32, on_event: Optional[EventCallback] = None):
+        self.jump_threshold_m = jump_threshold_m
+        self.jump_sigma = jump_sigma
+        self.max_stations = max_stations
+        self.on_event = on_event
+        self._lock = threading.Lock()
+        self._stations: Dict[Tuple[str, int], _Station] = {}
+        self._current: Dict[str, _Station] = {}
+        self.messages = 0
+
+    def feed(self, stream: str, info: Rtcm1005, now: Optional[float] = None) -> List[str]:
+        """送入一条已解码的 1005/1006；返回本条产生的事件类型（"station_changed" / "jump"）。"""
+        if now is None:
+            now = time.time()
+        x, y, z = info.ecef_x_m, info.ecef_y_m, info.ecef_z_m
+        sid = info.reference_station_id
+        events: List[Tuple[str, dict]] = []
+        with self._lock:
+            self.messages += 1
+            prev = self._current.get(stream)
+            if prev is not None and prev.station_id != sid:
+                e, n, u = ecef_delta_to_enu(x - prev.mx, y - prev.my, z - prev.mz, prev.lat, prev.lon)
+                events.append(("station_changed", {"from": prev.station_id, "to": sid,
+                                                   "h_m": round(math.hypot(e, n), 3), "v_m": round(u, 3)}))
+            st = self._stations.get((stream, sid))
+            if st is None:
+                st = self._new_station(stream, sid, info, now)
+            else:
+                d = math.sqrt((x - st.mx) ** 2 + (y - st.my) ** 2 + (z - st.mz) ** 2)
+                if d > max(self.jump_threshold_m, self.jump_sigma * st.sigma()):
+                    e, n, u = ecef_delta_to_enu(x - st.mx, y - st.my, z - st.mz, st.lat, st.lon)
+                    events.append(("jump", {"station_id": sid, "e_m": round(e, 4), "n_m": round(n, 4),
+                                            "u_m": round(u, 4), "after": st.n}))
+                    st.jumps += 1
+                    st.restart(info, now)
+                else:
+                    st.update(x, y, z, now)
+            self._current[stream] = st
+        if self.on_event:
+            for kind, detail in events:
+                self.on_event(stream, kind, detail)
+        return [kind for kind, _detail in events]
+
+    def _new_station(self, stream: str, sid: int, info: Rtcm1005, now: float) -> _Station:
+        if len(self._stations) >= self.max_stations:
+            # 淘汰最久未更新且非当前使用的站
+            current = set(map(id, self._current.values()))
+            idle = [(s.last_t, k) for k, s in self._stations.items() if id(s) not in current]
+            if idle:
+                del self._stations[min(idle)[1]]
+        st = self._stations[(stream, sid)] = _Station(sid, info, now)
+        return st
+
+    def current(self, stream: str) -> Optional[StationSnapshot]:
+        with self._lock:
+            st = self._current.get(stream)
+            return st.snapshot(stream) if st else None
+
+    def offset_enu(self, ref: str = "base", other: str = "net") -> Optional[Vec3]:
+        """other 当前站均值相对 ref 当前站均值的东/北/天差（m）。"""
+        with self._lock:
+            a = self._current.get(ref)
+            b = self._current.get(other)
+            if a is None or b is None:
+                return None
+            return ecef_delta_to_enu(b.mx - a.mx, b.my - a.my, b.mz - a.mz, a.lat, a.lon)
+
+    def reset(self):
+        with self._lock:
+            self._stations.clear()
+            self._current.clear()
+            self.messages = 0
+
+
+__all__ = ["BaseMonitor", "StationSnapshot", "ecef_delta_to_enu"]
@@ -14,22 +14,74 @@ DEFAULT_CONFIG = {
         "timeout_seconds": 10.0,
         "use_1005_position": True
     },
+    "base_monitor": {
+        # 1005/1006 坐标偏离该站均值超过 max(阈值, 倍数×标准差) 视为跳变（本地基站与网络RTK基准各自统计）
+        "jump_threshold_m": 0.05,
+        "jump_sigma": 5.0
+    },
     "ntrip": {
         "host": "",
         "port": 2101,
         "mountpoint": "",
         "username": "",
-        "password": ""
+        "password": "",
+        "auto_select": False,  # 根据 sourcetable 自动选择最近的挂载点
+        "msm_type": 0,  # 自动选择时要求的 MSM 类型（0 不限）
+        "sourcetable_ttl": 3600.0
     },
     "position": {
         "lat": 0.0,
         "lon": 0.0,
         "alt": 0.0
     },
+    "gga": {
+        "use_rover_position": True,  # 串口 RX 中有流动站 GGA/UBX NAV-PVT 时优先用其位置上传 GGA
+        "rover_max_age_s": 5.0,  # 流动站定位超过该时长未更新则回退到手动/1005 位置
+        "interval_s": 5.0,  # 静止时的上传间隔，之后逐次翻倍
+        "max_interval_s": 30.0,
+        "min_interval_s": 1.0,
+        "move_threshold_m": 50.0  # 相对上次上传位置移动超过该距离立即上传
+    },
     "serial": {
         "port": "",
-        "baudrate": 57600
-    }
+        "baudrate": 57600,
+        "outage_buffer_s": 3.0  # 串口中断期间最多缓冲最近几秒的改正数，恢复后补发
+    },
+    "ntrip_server": {
+        "enabled": False,  # 把串口收到的本地基站 RTCM 上传到 caster
+        "host": "",
+        "port": 2101,
+        "mountpoint": "",
+        "username": "",
+        "password": "",
+        "version": 1  # 1: SOURCE  2: POST
+    },
+    "warm_start": {
+        "enabled": True,  # 串口打开/恢复时先发送缓存的静态消息与最近完整历元
+        "rate_bytes_per_s": 1000.0
+    },
+    "udp_output": {
+        "enabled": False,  # 按帧对齐的 UDP 输出（IP 自组网电台），与串口同样受备用模式控制
+        "targets": [],  # ["239.1.2.3:5020", "192.168.10.20:5020"]
+        "mtu": 1400,
+        "ttl": 1,  # 组播 TTL
+        "interface": ""  # 组播出口网卡 IP，留空由系统选择
+    },
+    "rinex": {
+        "enabled": False,  # 把网络 RTK 的 MSM4~7 归档为 RINEX 3 观测文件
+        "directory": "rinex",
+        "marker": "RTKL",
+        "period_s": 3600  # 文件轮换周期
+    },
+    # 附加 RTCM 输入（tcp_client / tcp_server / udp / serial），role: base=本地基站, net=网络改正
+    # 格式见 rtk_lora/sources.py
+    "inputs": [],
+    "telemetry": {
+        "enabled": False,  # 开启后每秒链路/数据流指标与事件写入本地 SQLite，查询: python -m rtk_lora.telemetry
+        "path": "telemetry.db"
+    },
+    # 额外的数据流水线（数据源 -> 处理阶段 -> 输出），格式见 rtk_lora/pipeline.py
+    "pipelines": []
 }
 
 
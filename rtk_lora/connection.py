@@ -0,0 +1,267 @@
+"""TCP 连接管理：快速重连所需的基础部件。
+
+功能点：
+- AddressCache: 缓存 getaddrinfo 结果（带 TTL），支持后台预解析；
+  DNS 临时失败时回退使用过期结果，并把上次成功的地址排在最前
+- happy_eyeballs_connect: IPv4/IPv6 交错、错峰并发连接（RFC 8305 思路），
+  先连上者胜出，其余立即关闭
+- tune_socket: TCP_NODELAY、keepalive（尽量使用系统支持的细粒度参数）、接收缓冲区
+- Backoff: 首次重试极短、之后指数增长并加抖动的退避策略
+- StallWatchdog: 数据停滞看门狗，连续 N 个历元无数据即判定连接失效
+  （用于发现静默的半开连接，recv 不会返回空）
+"""
+from __future__ import annotations
+import errno
+import random
+import selectors
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+AddrInfo = Tuple[int, int, int, str, tuple]
+Resolver = Callable[..., List[AddrInfo]]
+
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}  # 10035: WSAEWOULDBLOCK
+
+
+class AddressCache:
+    def __init__(self, ttl: float = 300.0, resolver: Optional[Resolver] = None):
+        self.ttl = ttl
+        self._resolver = resolver or socket.getaddrinfo
+        self._lock = threading.Lock()
+        # (host, port) -> (解析时间, 地址列表)
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[AddrInfo]]] = {}
+        self._preferred: Dict[Tuple[str, int], tuple] = {}
+
+    def resolve(self, host: str, port: int) -> List[AddrInfo]:
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and now - entry[0] < self.ttl:
+            return self._ordered(key, entry[1])
+        try:
+            addrs = self._lookup(host, port)
+        except OSError:
+            if entry:
+                # DNS 暂时不可用：继续使用过期结果，保证能重连
+                return self._ordered(key, entry[1])
+            raise
+        with self._lock:
+            self._entries[key] = (now, addrs)
+        return self._ordered(key, addrs)
+
+    def prefetch(self, host: str, port: int):
+        """后台预解析，不阻塞调用者。"""
+        def work():
+            try:
+                addrs = self._lookup(host, port)
+            except OSError:
+                return
+            with self._lock:
+                self._entries[(host, port)] = (time.monotonic(), addrs)
+        threading.Thread(target=work, daemon=True).start()
+
+    def remember_success(self, host: str, port: int, sockaddr: tuple):
+        with self._lock:
+            self._preferred[(host, port)] = sockaddr
+
+    def invalidate(self, host: str, port: int):
+        with self._lock:
+            self._entries.pop((host, port), None)
+            self._preferred.pop((host, port), None)
+
+    def _lookup(self, host: str, port: int) -> List[AddrInfo]:
+        addrs = self._resolver(host, port, 0, socket.SOCK_STREAM)
+        # 去重（部分系统会为同一地址返回多个 proto）
+        seen = set()
+        result: List[AddrInfo] = []
+        for ai in addrs:
+            if ai[4] in seen:
+                continue
+            seen.add(ai[4])
+            result.append(ai)
+        return result
+
+    def _ordered(self, key: Tuple[str, int], addrs: List[AddrInfo]) -> List[AddrInfo]:
+        with self._lock:
+            pref = self._preferred.get(key)
+        if pref is None:
+            return list(addrs)
+        first = [a for a in addrs if a[4] == pref]
+        return first + [a for a in addrs if a[4] != pref]
+
+
+def _interleave(addrs: List[AddrInfo]) -> List[AddrInfo]:
+    """按地址族交错排列（保持首个地址的族优先）。"""
+    if not addrs:
+        return []
+    first_family = addrs[0][0]
+    a = [x for x in addrs if x[0] == first_family]
+    b = [x for x in addrs if x[0] != first_family]
+    out: List[AddrInfo] = []
+    for i in range(max(len(a), len(b))):
+        if i < len(a):
+            out.append(a[i])
+        if i < len(b):
+            out.append(b[i])
+    return out
+
+
+def happy_eyeballs_connect(addrs: List[AddrInfo], timeout: float,
+                           attempt_delay: float = 0.25,
+                           tune: Optional[Callable[[socket.socket], None]] = None) -> socket.socket:
+    """对地址列表错峰发起非阻塞连接，返回最先成功的 socket（阻塞模式）。
+
+    某个尝试失败时立即启动下一个，无需等待 attempt_delay。
+    """
+    ordered = _interleave(addrs)
+    if not ordered:
+        raise OSError("没有可用地址")
+    sel = selectors.DefaultSelector()
+    pending: Dict[socket.socket, tuple] = {}
+    errors: List[str] = []
+    winner: Optional[socket.socket] = None
+    deadline = time.monotonic() + timeout
+    next_start = time.monotonic()
+    idx = 0
+    try:
+        while winner is None:
+            now = time.monotonic()
+            if idx < len(ordered) and (now >= next_start or not pending):
+                family, stype, proto, _canon, sockaddr = ordered[idx]
+                idx += 1
+                s = socket.socket(family, stype, proto)
+                try:
+                    if tune:
+                        tune(s)
+                    s.setblocking(False)
+                    err = s.connect_ex(sockaddr)
+                except OSError as e:
+                    errors.append(f"{sockaddr[0]}: {e}")
+                    s.close()
+                    continue
+                if err == 0:
+                    winner = s
+                    break
+                if err not in _IN_PROGRESS:
+                    errors.append(f"{sockaddr[0]}: {errno.errorcode.get(err, err)}")
+                    s.close()
+                    continue
+                sel.register(s, selectors.EVENT_WRITE)
+                pending[s] = sockaddr
+                next_start = now + attempt_delay
+            if not pending and idx >= len(ordered):
+                raise ConnectionError("全部地址连接失败: " + "; ".join(errors))
+            now = time.monotonic()
+            if now >= deadline:
+                raise socket.timeout("连接超时")
+            wait = deadline - now
+            if idx < len(ordered):
+                wait = min(wait, max(0.0, next_start - now))
+            for key, _ev in sel.select(wait):
+                s = key.fileobj  # type: ignore[assignment]
+                sel.unregister(s)
+                sockaddr = pending.pop(s)
+                err = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err == 0:
+                    winner = s
+                    break
+                errors.append(f"{sockaddr[0]}: {errno.errorcode.get(err, err)}")
+                s.close()
+                next_start = time.monotonic()  # 失败：立刻尝试下一个地址
+    finally:
+        for s in pending:
+            if s is not winner:
+                try:
+                    s.close()
+                except OSError:
+                    pass
+        sel.close()
+    winner.setblocking(True)
+    return winner
+
+
+def tune_socket(s: socket.socket, rcvbuf: int = 64 * 1024,
+                keepalive_idle: int = 10, keepalive_interval: int = 3,
+                keepalive_count: int = 3):
+    """低延迟 + 快速发现死连接的 socket 参数。应在 connect 之前调用。"""
+    try:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        pass
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive_idle)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, keepalive_interval)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, keepalive_count)
+    elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, keepalive_idle)
+    elif hasattr(socket, "SIO_KEEPALIVE_VALS"):  # Windows
+        s.ioctl(socket.SIO_KEEPALIVE_VALS, (1, keepalive_idle * 1000, keepalive_interval * 1000))
+    if rcvbuf:
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+
+
+class Backoff:
+    """首次短、之后指数增长的抖动退避。
+
+    第 1 次: first * U(0.5, 1)（多数断线是瞬时的，尽快重试）
+    第 n 次: min(cap, base * factor^(n-2)) * U(1 - jitter, 1)
+    """
+
+    def __init__(self, first: float = 0.2, base: float = 1.0, factor: float = 2.0,
+                 cap: float = 60.0, jitter: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        self.first = first
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.jitter = jitter
+        self._rng = rng or random.Random()
+        self.attempt = 0
+
+    def next(self) -> float:
+        self.attempt += 1
+        if self.attempt == 1:
+            return self.first * (0.5 + 0.5 * self._rng.random())
+        delay = min(self.cap, self.base * self.factor ** (self.attempt - 2))
+        return delay * (1.0 - self.jitter * self._rng.random())
+
+    def reset(self):
+        self.attempt = 0
+
+
+class StallWatchdog:
+    def __init__(self, epoch_interval: float = 1.0, max_missed_epochs: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.epoch_interval = epoch_interval
+        self.max_missed_epochs = max_missed_epochs
+        self._clock = clock
+        self._last = clock()
+
+    @property
+    def timeout(self) -> float:
+        return self.epoch_interval * self.max_missed_epochs
+
+    def kick(self, now: Optional[float] = None):
+        self._last = self._clock() if now is None else now
+
+    def idle(self, now: Optional[float] = None) -> float:
+        return (self._clock() if now is None else now) - self._last
+
+    def stalled(self, now: Optional[float] = None) -> bool:
+        return self.idle(now) >= self.timeout
+
+
+__all__ = [
+    "AddressCache",
+    "happy_eyeballs_connect",
+    "tune_socket",
+    "Backoff",
+    "StallWatchdog",
+]
@@ -0,0 +1,87 @@
+"""静态消息解码缓存：对字节完全相同的 payload 复用解码结果。
+
+背景：基站每隔数秒重复发送内容不变的 1005/1006 等静态消息，每次都重新做
+逐位解码与迭代 ecef_to_lla 并无必要。
+
+功能点：
+- 按 (消息号, payload 摘要) 作键的有界 LRU，超出容量淘汰最久未用的条目
+- 摘要使用 blake2b(16 字节)，payload 可为 bytes / memoryview（不额外复制）
+- 解码器注册表：默认注册 1005/1006 -> parse_1005/parse_1006，后续静态消息解码器可 register 追加
+- 解码失败(None)同样缓存，避免对同一异常 payload 反复解码
+- 命中/未命中计数；缓存的结果必须是不可变对象（frozen dataclass），可跨线程共享
+"""
+from __future__ import annotations
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .rtcm_1005 import parse_1005, parse_1006
+
+Decoder = Callable[[bytes], Any]
+
+_MISSING = object()
+
+
+class DecodeCache:
+    def __init__(self, capacity: int = 64,
+                 decoders: Optional[Dict[int, Decoder]] = None):
+        if capacity <= 0:
+            raise ValueError("capacity 必须为正数")
+        self.capacity = capacity
+        self._decoders: Dict[int, Decoder] = {1005: parse_1005, 1006: parse_1006}
+        if decoders:
+            self._decoders.update(decoders)
+        self._entries: "OrderedDict[Tuple[int, bytes], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, msg_num: int, decoder: Decoder):
+        """注册（或替换）某消息号的解码器，并清除该类型的旧缓存。"""
+        with self._lock:
+            self._decoders[msg_num] = decoder
+            for key in [k for k in self._entries if k[0] == msg_num]:
+                del self._entries[key]
+
+    def supports(self, msg_num: int) -> bool:
+        return msg_num in self._decoders
+
+    def decode(self, msg_num: int, payload) -> Any:
+        """解码 payload（不含 D3 头与 CRC）；无对应解码器返回 None。"""
+        decoder = self._decoders.get(msg_num)
+        if decoder is None:
+            return None
+        key = (msg_num, hashlib.blake2b(payload, digest_size=16).digest())
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        # 在锁外解码：解码较慢，且同一 payload 的并发重复解码结果一致
+        value = decoder(bytes(payload))
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+__all__ = ["DecodeCache", "Decoder"]
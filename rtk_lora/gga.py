@@ -6,57 +6,82 @@
 - alt 为大地高（近似）米
 - fix_quality: 0=Invalid 1=GPS Fix 2=DGPS 4=RTK Fixed 5=RTK Float (这里默认4，向 Caster 声明期望高质量)
 返回含换行的完整 GGA 语句 bytes: b"$GPGGA,...*CS\r\n"
+
+性能：按流动站数据速率调用也足够便宜——
+- 度分按 1e-4 分取整后用整数运算格式化（同时避免 59.99995 分被格式化成 "60.0000"）
+- UTC 时间串按秒缓存；时间之后的字段按输入缓存，位置不变时只拼接不重新格式化
+- 校验和可按段异或合并，缓存的两段各自只算一次
 """
 from __future__ import annotations
-import datetime
+from functools import reduce
+from operator import xor
+import time
+from typing import Optional
+
+_MIN_UNITS = 600000  # 1 度 = 60 分 = 600000 个 1e-4 分
+
+_HEAD = b"GPGGA,"
+_HEAD_XOR = reduce(xor, _HEAD, 0)
+# (秒, 时间串 bytes, 时间串异或)；(输入参数, 尾部字段 bytes, 尾部异或)
+# 整个元组一次替换，多线程同时调用也不会读到不一致的缓存
+_time_cache: tuple = (None, b"", 0)
+_tail_cache: tuple = (None, b"", 0)
+
+
+def _checksum(nmea_body) -> str:
+    if isinstance(nmea_body, str):
+        nmea_body = nmea_body.encode("ascii")
+    return f"{reduce(xor, nmea_body, 0):02X}"
 
 
-def _checksum(nmea_body: str) -> str:
-    c = 0
-    for ch in nmea_body:
-        c ^= ord(ch)
-    return f"{c:02X}"
+def _utc_hhmmss(t: Optional[float] = None) -> tuple:
+    """返回 (秒, b"hhmmss", 异或)。"""
+    global _time_cache
+    sec = int(time.time() if t is None else t)
+    cache = _time_cache
+    if cache[0] != sec:
+        tm = time.gmtime(sec)
+        b = f"{tm.tm_hour:02d}{tm.tm_min:02d}{tm.tm_sec:02d}".encode("ascii")
+        cache = _time_cache = (sec, b, reduce(xor, b, 0))
+    return cache
 
 
 def _deg_to_nmea_lat(lat_deg: float) -> str:
     if lat_deg is None:
         raise ValueError("lat_deg 不能为空")
-    hemi = 'N' if lat_deg >= 0 else 'S'
-    lat = abs(lat_deg)
-    deg = int(lat)
-    minutes = (lat - deg) * 60.0
-    return f"{deg:02d}{minutes:07.4f},{hemi}"
+    deg, units = divmod(round(abs(lat_deg) * _MIN_UNITS), _MIN_UNITS)
+    mm, frac = divmod(units, 10000)
+    return f"{deg:02d}{mm:02d}.{frac:04d},{'N' if lat_deg >= 0 else 'S'}"
 
 
 def _deg_to_nmea_lon(lon_deg: float) -> str:
     if lon_deg is None:
         raise ValueError("lon_deg 不能为空")
-    hemi = 'E' if lon_deg >= 0 else 'W'
-    lon = abs(lon_deg)
-    deg = int(lon)
-    minutes = (lon - deg) * 60.0
-    return f"{deg:03d}{minutes:07.4f},{hemi}"
+    deg, units = divmod(round(abs(lon_deg) * _MIN_UNITS), _MIN_UNITS)
+    mm, frac = divmod(units, 10000)
+    return f"{deg:03d}{mm:02d}.{frac:04d},{'E' if lon_deg >= 0 else 'W'}"
 
 
 def build_gga(lat_deg: float, lon_deg: float, alt: float,
               fix_quality: int = 4, num_sats: int = 12, hdop: float = 0.8,
-              geoid_sep: float = 0.0) -> bytes:
+              geoid_sep: float = 0.0, utc: Optional[float] = None) -> bytes:
     """构造 GGA 语句。
 
     geoid_sep: 大地水准面分离 (近似)，默认0 可不影响 Caster。
+    utc: 语句时间（Unix 秒），默认当前时间。
     """
-    now = datetime.datetime.utcnow()
-    timestr = now.strftime('%H%M%S')
-    lat_field = _deg_to_nmea_lat(lat_deg)
-    lon_field = _deg_to_nmea_lon(lon_deg)
-    # Age / diff station id 暂用空
-    body = (
-        f"GPGGA,{timestr},{lat_field},{lon_field},{fix_quality},{num_sats:02d},"
-        f"{hdop:.1f},{alt:.2f},M,{geoid_sep:.1f},M,,"
-    )
-    cs = _checksum(body)
-    sentence = f"${body}*{cs}\r\n"
-    return sentence.encode('ascii')
+    global _tail_cache
+    key = (lat_deg, lon_deg, alt, fix_quality, num_sats, hdop, geoid_sep)
+    tc = _tail_cache
+    if tc[0] != key:
+        # Age / diff station id 暂用空
+        tail = (
+            f",{_deg_to_nmea_lat(lat_deg)},{_deg_to_nmea_lon(lon_deg)},"
+            f"{fix_quality},{num_sats:02d},{hdop:.1f},{alt:.2f},M,{geoid_sep:.1f},M,,"
+        ).encode("ascii")
+        tc = _tail_cache = (key, tail, reduce(xor, tail, 0))
+    _sec, hhmmss, t_xor = _utc_hhmmss(utc)
+    return b"".join((b"$", _HEAD, hhmmss, tc[1], b"*%02X\r\n" % (_HEAD_XOR ^ t_xor ^ tc[2])))
 
 __all__ = [
     'build_gga'
@@ -0,0 +1,119 @@
+"""零拷贝接收：预分配环形缓冲 + 原地分帧。
+
+- FrameRing 一次性分配固定容量的 bytearray，socket 数据通过 recv_into 直接写入
+- 分帧在缓冲区内原地完成，完整帧以 memoryview 切片交给下游，不产生 bytes 副本
+- 空间不足时把未消费数据 memmove 到缓冲区起点（不分配新对象）
+
+注意：交给下游的 memoryview 只在回调期间有效，下一次写入前可能被覆盖；
+需要保留数据的消费者必须自行复制（如 bytes(frame)）。
+"""
+from __future__ import annotations
+import socket
+from typing import Optional, Tuple
+
+D3 = 0xD3
+_MAX_FRAME = 3 + 1023 + 3
+
+
+class FrameRing:
+    def __init__(self, capacity: int = 64 * 1024):
+        if capacity < 2 * _MAX_FRAME:
+            raise ValueError("capacity 过小，至少需容纳两帧最大 RTCM 帧")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._mv = memoryview(self._buf)
+        self._head = 0  # 未消费数据起点
+        self._tail = 0  # 下一次写入位置
+        self.bytes_in = 0
+        self.bytes_discarded = 0  # 帧同步时丢弃的噪声字节
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    def clear(self):
+        self._head = self._tail = 0
+
+    def _make_room(self):
+        if self._tail < self.capacity:
+            return
+        n = self._tail - self._head
+        if self._head == 0:
+            # 缓冲区被无法成帧的数据占满：整体丢弃
+            self.bytes_discarded += n
+            self._head = self._tail = 0
+            return
+        self._mv[0:n] = self._mv[self._head:self._tail]  # 重叠区域按 memmove 处理
+        self._head = 0
+        self._tail = n
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """从 socket 直接读入缓冲区，返回读取字节数（0 表示对端关闭）。"""
+        self._make_room()
+        n = sock.recv_into(self._mv[self._tail:])
+        self._tail += n
+        self.bytes_in += n
+        return n
+
+    def write(self, data) -> int:
+        """复制外部数据进入缓冲区（非 socket 来源使用），返回写入字节数。"""
+        total = len(data)
+        mv = memoryview(data)
+        off = 0
+        while off < total:
+            self._make_room()
+            n = min(total - off, self.capacity - self._tail)
+            self._mv[self._tail:self._tail + n] = mv[off:off + n]
+            self._tail += n
+            off += n
+        self.bytes_in += total
+        return total
+
+    def last(self, n: int) -> memoryview:
+        """最近写入的 n 字节（用于把原始数据块透传给下游）。"""
+        return self._mv[self._tail - n:self._tail]
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        """在未消费数据中查找，返回相对 head 的偏移，未找到返回 -1。"""
+        i = self._buf.find(sub, self._head + start, self._tail)
+        return i - self._head if i >= 0 else -1
+
+    def view(self, start: int, end: int) -> memoryview:
+        return self._mv[self._head + start:self._head + end]
+
+    def consume(self, n: int):
+        self._head = min(self._tail, self._head + n)
+        if self._head == self._tail:
+            self._head = self._tail = 0
+
+    def next_frame(self) -> Optional[Tuple[int, memoryview]]:
+        """取出下一完整帧 (msg_num, 帧视图)；数据不足返回 None。
+
+        msg_num 在 payload 不足 2 字节时为 -1。
+        """
+        buf = self._buf
+        while True:
+            head = self._head
+            tail = self._tail
+            if head >= tail:
+                return None
+            if buf[head] != D3:
+                i = buf.find(D3, head, tail)
+                if i < 0:
+                    self.bytes_discarded += tail - head
+                    self._head = self._tail = 0
+                    return None
+                self.bytes_discarded += i - head
+                self._head = i
+                continue
+            if tail - head < 6:
+                return None
+            length = ((buf[head + 1] & 0x03) << 8) | buf[head + 2]
+            total = length + 6
+            if tail - head < total:
+                return None
+            msg_num = ((buf[head + 3] << 4) | (buf[head + 4] >> 4)) if length >= 2 else -1
+            self._head = head + total
+            return msg_num, self._mv[head:head + total]
+
+
+__all__ = ["FrameRing"]
@@ -0,0 +1,323 @@
+"""LoRa 数传链路模拟器：在普通 Linux 机器/CI 上替代电台做吞吐与延迟评估。
+
+模型（全部基于虚拟时钟，结果只取决于输入与随机种子）：
+- 串口：8N1，每字节 10 位，按 baudrate 逐字节进入模块
+- 组包：模块缓冲达到 max_packet 立即发包；串口空闲超过 fill_timeout_s 也发包
+- 空中：每包耗时 = packet_overhead_s（前导码/包头）+ 字节数 * 8 / air_rate_bps，
+  同一时刻只能发一包，包按先后排队
+- 占空比：duty_cycle < 1 时每包发完需静默 airtime * (1/duty_cycle - 1)
+- 缓冲：排队未发出的字节超过 buffer_size 时整包丢弃（计入 bytes_overflow）
+- 丢包：每包以概率 loss 丢失（random.Random(seed)，可复现）
+
+接收端 VirtualRover 以 CRC 校验重新分帧，并按历元（以多消息标志=0 的 MSM 结束）
+统计每历元的到达延迟（首帧写入 -> 末帧到达）与完整率。
+
+使用：
+    link = LoRaLink(LinkProfile(air_rate_bps=9600, loss=0.02, seed=1))
+    fwd = SerialForwarder("SIM", 57600, serial_factory=link.serial_factory,
+                          port_lister=lambda: [])
+    fwd.open()
+    for t, data in schedule:      # 虚拟时间与数据
+        link.clock.set(t)
+        fwd.send(data)
+    link.flush()
+    print(link.rover.summary())
+"""
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+import random
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .rtcm_msm import decode_msm_header, is_msm
+from .rtcm_parser import RTCMParser
+
+Clock = Callable[[], float]
+
+
+class VirtualClock:
+    """手动推进的时钟；可直接作为 clock 回调使用。"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def __call__(self) -> float:
+        return self._now
+
+    def set(self, t: float):
+        if t < self._now:
+            raise ValueError("虚拟时钟不能倒退")
+        self._now = t
+
+    def advance(self, dt: float):
+        self.set(self._now + dt)
+
+
+@dataclass(frozen=True)
+class LinkProfile:
+    baudrate: int = 57600
+    air_rate_bps: float = 9600.0
+    max_packet: int = 240
+    fill_timeout_s: float = 0.02
+    packet_overhead_s: float = 0.01
+    duty_cycle: float = 1.0
+    buffer_size: int = 1000
+    loss: float = 0.0
+    seed: int = 0
+
+    @property
+    def byte_time(self) -> float:
+        return 10.0 / self.baudrate
+
+    def airtime(self, nbytes: int) -> float:
+        return self.packet_overhead_s + nbytes * 8.0 / self.air_rate_bps
+
+
+@dataclass(frozen=True)
+class EpochReport:
+    index: int
+    tow_ms: Optional[int]
+    frames_sent: int
+    frames_received: int
+    sent_at: float
+    latency_s: Optional[float]  # 全部帧到达才有值
+
+    @property
+    def completeness(self) -> float:
+        return self.frames_received / self.frames_sent if self.frames_sent else 0.0
+
+
+@dataclass(frozen=True)
+class LinkSummary:
+    epochs: int
+    complete_epochs: int
+    mean_completeness: float
+    latency_p50_s: Optional[float]
+    latency_p95_s: Optional[float]
+    latency_max_s: Optional[float]
+
+
+def _percentile(sorted_vals: List[float], q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+class _Epoch:
+    __slots__ = ("index", "tow_ms", "sent", "received", "sent_at", "last_rx")
+
+    def __init__(self, index: int, sent_at: float):
+        self.index = index
+        self.tow_ms: Optional[int] = None
+        self.sent = 0
+        self.received = 0
+        self.sent_at = sent_at
+        self.last_rx = 0.0
+
+
+class VirtualRover:
+    """虚拟流动站：对照发送端帧，统计每历元延迟与完整率。"""
+
+    def __init__(self):
+        self._tx_parser = RTCMParser()
+        self._rx_parser = RTCMParser(verify_crc=True)
+        self._epochs: List[_Epoch] = []
+        self._open: Optional[_Epoch] = None
+        # 帧内容 -> 等待到达的所属历元（同内容帧如重复的 1005 按先后匹配）
+        self._pending: Dict[bytes, Deque[_Epoch]] = {}
+        self.bytes_received = 0
+        self.unexpected_frames = 0
+
+    @property
+    def crc_errors(self) -> int:
+        return self._rx_parser.crc_errors
+
+    def sent(self, data: bytes, t: float):
+        for msg_num, frame in self._tx_parser.feed_frames(data):
+            ep = self._open
+            if ep is None:
+                ep = self._open = _Epoch(len(self._epochs), t)
+                self._epochs.append(ep)
+            ep.sent += 1
+            self._pending.setdefault(frame, deque()).append(ep)
+            if is_msm(msg_num):
+                hdr = decode_msm_header(frame[3:-3])
+                if hdr:
+                    ep.tow_ms = hdr.tow_ms
+                    if not hdr.multiple_message:
+                        self._open = None
+
+    def receive(self, data: bytes, t: float):
+        self.bytes_received += len(data)
+        for _msg_num, frame in self._rx_parser.feed_frames(data):
+            q = self._pending.get(frame)
+            if not q:
+                self.unexpected_frames += 1
+                continue
+            ep = q.popleft()
+            if not q:
+                del self._pending[frame]
+            ep.received += 1
+            ep.last_rx = t
+
+    def reports(self) -> List[EpochReport]:
+        return [
+            EpochReport(
+                index=ep.index,
+                tow_ms=ep.tow_ms,
+                frames_sent=ep.sent,
+                frames_received=ep.received,
+                sent_at=ep.sent_at,
+                latency_s=(ep.last_rx - ep.sent_at) if ep.received == ep.sent else None,
+            )
+            for ep in self._epochs
+        ]
+
+    def summary(self) -> LinkSummary:
+        reports = self.reports()
+        lat = sorted(r.latency_s for r in reports if r.latency_s is not None)
+        n = len(reports)
+        return LinkSummary(
+            epochs=n,
+            complete_epochs=len(lat),
+            mean_completeness=sum(r.completeness for r in reports) / n if n else 0.0,
+            latency_p50_s=_percentile(lat, 0.5),
+            latency_p95_s=_percentile(lat, 0.95),
+            latency_max_s=lat[-1] if lat else None,
+        )
+
+
+class LoRaLink:
+    def __init__(self, profile: LinkProfile = LinkProfile(),
+                 clock: Optional[Clock] = None,
+                 rover: Optional[VirtualRover] = None):
+        self.profile = profile
+        self.clock = clock or VirtualClock()
+        self.rover = rover or VirtualRover()
+        self._rng = random.Random(profile.seed)
+        self._uart_free = 0.0  # 串口上一字节进入模块的时间
+        self._buf = bytearray()
+        self._buf_last = 0.0
+        self._radio_free = 0.0  # 下一包最早可发送时间（含占空比静默）
+        self._queued: Deque[Tuple[float, int]] = deque()  # (开始发送时间, 字节数)
+        self._deliveries: Deque[Tuple[float, bytes]] = deque()
+        self.bytes_in = 0
+        self.bytes_overflow = 0
+        self.packets_sent = 0
+        self.packets_lost = 0
+        self.airtime_s = 0.0
+
+    def serial_factory(self, port: str, baudrate: int = 57600, timeout: Optional[float] = None, **_kw):
+        """与 serial.Serial 构造签名兼容，供 SerialForwarder(serial_factory=...) 使用。"""
+        return SimulatedSerial(self, port)
+
+    def write(self, data: bytes, t: Optional[float] = None):
+        p = self.profile
+        t = self.clock() if t is None else t
+        self.bytes_in += len(data)
+        self.rover.sent(data, t)
+        byte_time = p.byte_time
+        at = max(t, self._uart_free)
+        if self._buf and at + byte_time > self._buf_last + p.fill_timeout_s:
+            self._close_packet(self._buf_last + p.fill_timeout_s)
+        mv = memoryview(data)
+        off = 0
+        while off < len(mv):
+            take = min(len(mv) - off, p.max_packet - len(self._buf))
+            self._buf += mv[off:off + take]
+            off += take
+            at += take * byte_time
+            self._buf_last = at
+            if len(self._buf) >= p.max_packet:
+                self._close_packet(at)
+        self._uart_free = at
+        self.run_until(t)
+
+    def _close_packet(self, t_close: float):
+        p = self.profile
+        pkt = bytes(self._buf)
+        self._buf.clear()
+        queued = self._queued
+        while queued and queued[0][0] <= t_close:
+            queued.popleft()
+        if sum(n for _s, n in queued) + len(pkt) > p.buffer_size:
+            self.bytes_overflow += len(pkt)
+            return
+        start = max(t_close, self._radio_free)
+        air = p.airtime(len(pkt))
+        end = start + air
+        self._radio_free = end + (air * (1.0 / p.duty_cycle - 1.0) if p.duty_cycle < 1.0 else 0.0)
+        queued.append((start, len(pkt)))
+        self.packets_sent += 1
+        self.airtime_s += air
+        if self._rng.random() < p.loss:
+            self.packets_lost += 1
+            return
+        # 接收端模块再经串口输出给流动站
+        self._deliveries.append((end + len(pkt) * p.byte_time, pkt))
+
+    def run_until(self, t: float):
+        """推进到时间 t：超时的缓冲组包发出，并把已到达的数据交给流动站。"""
+        if self._buf and self._buf_last + self.profile.fill_timeout_s <= t:
+            self._close_packet(self._buf_last + self.profile.fill_timeout_s)
+        deliveries = self._deliveries
+        while deliveries and deliveries[0][0] <= t:
+            at, pkt = deliveries.popleft()
+            self.rover.receive(pkt, at)
+
+    def flush(self):
+        """发送剩余缓冲并交付全部在途数据。"""
+        if self._buf:
+            self._close_packet(self._buf_last + self.profile.fill_timeout_s)
+        while self._deliveries:
+            at, pkt = self._deliveries.popleft()
+            self.rover.receive(pkt, at)
+
+
+class SimulatedSerial:
+    """进程内的 serial.Serial 替身：写入进入 LoRaLink，读取始终为空。"""
+
+    def __init__(self, link: LoRaLink, port: str):
+        self.link = link
+        self.port = port
+        self.is_open = True
+        self.in_waiting = 0
+
+    def write(self, data) -> int:
+        if not self.is_open:
+            raise OSError("模拟串口已关闭")
+        data = bytes(data)
+        self.link.write(data)
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        return b""
+
+    def close(self):
+        self.is_open = False
+
+
+def replay(link: LoRaLink, send: Callable[[bytes], None],
+           schedule: Iterable[Tuple[float, bytes]]) -> LinkSummary:
+    """按 (虚拟时间, 数据) 调度调用 send（如 SerialForwarder.send），返回链路统计。"""
+    clock = link.clock
+    for t, data in schedule:
+        if isinstance(clock, VirtualClock):
+            clock.set(t)
+        link.run_until(t)
+        send(data)
+    link.flush()
+    return link.rover.summary()
+
+
+__all__ = [
+    "LinkProfile",
+    "LinkSummary",
+    "EpochReport",
+    "LoRaLink",
+    "SimulatedSerial",
+    "VirtualClock",
+    "VirtualRover",
+    "replay",
+]
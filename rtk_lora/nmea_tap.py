@@ -0,0 +1,263 @@
+"""流动站位置旁路（NMEA GGA / UBX NAV-PVT）与按运动调度的 GGA 上传。
+
+功能点：
+- NmeaTap：挂在串口 RX 上，从与 RTCM 混合的字节流中按数据速率提取流动站自己的位置
+  - NMEA：任意 talker 的 GGA（$GPGGA/$GNGGA/...），校验和不符丢弃
+  - UBX：NAV-PVT（0x01 0x07），Fletcher 校验；carrSoln 映射为 GGA 质量 4/5
+  - 只在 '$' 与 0xB5 0x62 处尝试解析，其余字节由 bytes.find 以 C 速度跳过；
+    未完成的语句/报文保留到下一块，缓冲有上限
+- GgaScheduler：决定何时向 Caster 上传 GGA
+  - 首次立即发送
+  - 相对上次上传位置移动超过 move_threshold_m：立即发送（受 min_interval 限制）
+  - 静止时按 interval 发送，每次静止上传后间隔翻倍，最长 max_interval；移动后复位
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import reduce
+import math
+from operator import xor
+import struct
+import time
+from typing import Callable, Optional, Tuple
+
+Clock = Callable[[], float]
+
+_R_EARTH = 6378137.0
+_MAX_NMEA = 120  # 标准上限 82 字节，留余量
+_MAX_BUF = 4096
+_UBX_SYNC = b"\xb5\x62"
+_NAV_PVT_LEN = 92
+# NAV-PVT 偏移 20 起：fixType, flags, (flags2), numSV, lon, lat, height, hMSL；偏移 76：pDOP
+_PVT = struct.Struct("<20xBBxBiiii")
+_PVT_PDOP = struct.Struct("<76xH")
+
+
+@dataclass(frozen=True)
+class PositionFix:
+    lat_deg: float
+    lon_deg: float
+    alt_m: float  # 海拔（MSL），与 GGA 第 9 字段一致
+    quality: int  # GGA 定位质量：1 单点 2 差分 4 固定 5 浮点
+    num_sats: int
+    hdop: float
+    geoid_sep_m: float
+    t: float  # 收到时的本地时间
+    source: str  # "gga" / "ubx"
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """两点水平距离（平面近似，公里级以内足够）。"""
+    lat_mean = math.radians(0.5 * (lat1 + lat2))
+    dx = math.radians(lon2 - lon1) * math.cos(lat_mean) * _R_EARTH
+    dy = math.radians(lat2 - lat1) * _R_EARTH
+    return math.hypot(dx, dy)
+
+
+def _nmea_deg(value: str, hemi: str) -> float:
+    dot = value.index(".")
+    deg = int(value[:dot - 2])
+    d = deg + float(value[dot - 2:]) / 60.0
+    return -d if hemi in ("S", "W") else d
+
+
+def parse_gga(sentence: bytes, now: Optional[float] = None) -> Optional[PositionFix]:
+    """解析一条 GGA（含 $ 与 *校验和，可带 \\r\\n）；无效或无定位返回 None。"""
+    star = sentence.rfind(b"*")
+    if sentence[:1] != b"$" or star < 0 or len(sentence) < star + 3:
+        return None
+    body = sentence[1:star]
+    try:
+        if int(sentence[star + 1:star + 3], 16) != reduce(xor, body, 0):
+            return None
+        f = body.decode("ascii").split(",")
+        if len(f) < 12 or not f[0].endswith("GGA"):
+            return None
+        q = int(f[6] or 0)
+        if q == 0 or not f[2] or not f[4]:
+            return None
+        return PositionFix(
+            lat_deg=_nmea_deg(f[2], f[3]),
+            lon_deg=_nmea_deg(f[4], f[5]),
+            alt_m=float(f[9] or 0.0),
+            quality=q,
+            num_sats=int(f[7] or 0),
+            hdop=float(f[8] or 0.0),
+            geoid_sep_m=float(f[11] or 0.0),
+            t=time.time() if now is None else now,
+            source="gga",
+        )
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _ubx_checksum(data) -> Tuple[int, int]:
+    a = b = 0
+    for x in data:
+        a = (a + x) & 0xFF
+        b = (b + a) & 0xFF
+    return a, b
+
+
+def parse_nav_pvt(payload, now: Optional[float] = None) -> Optional[PositionFix]:
+    """解析 UBX NAV-PVT payload（92 字节）；无有效定位返回 None。"""
+    if len(payload) < _NAV_PVT_LEN:
+        return None
+    fix_type, flags, num_sv, lon, lat, height, hmsl = _PVT.unpack_from(payload)
+    pdop = _PVT_PDOP.unpack_from(payload)[0]
+    if not flags & 0x01 or fix_type not in (2, 3, 4):
+        return None
+    carr = (flags >> 6) & 0x03
+    quality = 4 if carr == 2 else 5 if carr == 1 else 2 if flags & 0x02 else 1
+    return PositionFix(
+        lat_deg=lat * 1e-7,
+        lon_deg=lon * 1e-7,
+        alt_m=hmsl / 1000.0,
+        quality=quality,
+        num_sats=num_sv,
+        hdop=pdop * 0.01,  # NAV-PVT 无 HDOP，以 PDOP 近似
+        geoid_sep_m=(height - hmsl) / 1000.0,
+        t=time.time() if now is None else now,
+        source="ubx",
+    )
+
+
+class NmeaTap:
+    def __init__(self, on_fix: Optional[Callable[[PositionFix], None]] = None,
+                 clock: Clock = time.time):
+        self.on_fix = on_fix
+        self.clock = clock
+        self._buf = bytearray()
+        self.latest: Optional[PositionFix] = None
+        self.fixes = 0
+        self.bad = 0  # 校验失败或无定位的 GGA/NAV-PVT
+
+    def fresh(self, max_age_s: float) -> Optional[PositionFix]:
+        """不超过 max_age_s 的最新定位。"""
+        fix = self.latest
+        if fix is not None and self.clock() - fix.t <= max_age_s:
+            return fix
+        return None
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        pos = 0
+        n = len(buf)
+        while pos < n:
+            i = buf.find(b"$", pos)
+            j = buf.find(_UBX_SYNC, pos)
+            if i < 0 and j < 0:
+                # 末尾的单个 0xB5 可能是下一块 UBX 同步头的前半
+                pos = n - 1 if buf[-1] == 0xB5 else n
+                break
+            if j < 0 or 0 <= i < j:
+                end = buf.find(b"\n", i, i + _MAX_NMEA)
+                if end < 0:
+                    if n - i >= _MAX_NMEA:
+                        pos = i + 1  # 不是 NMEA（如 RTCM 中偶然的 '$'）
+                        continue
+                    pos = i
+                    break
+                if 0 <= j < end:
+                    pos = i + 1  # 行内出现 UBX 同步头：'$' 是二进制数据中的偶然字节
+                    continue
+                if buf[i + 3:i + 7] == b"GGA,":
+                    self._got(parse_gga(bytes(buf[i:end + 1]).rstrip(), self.clock()))
+                pos = end + 1
+            else:
+                if n - j < 6:
+                    pos = j
+                    break
+                length = buf[j + 4] | (buf[j + 5] << 8)
+                if length > 1024:
+                    pos = j + 2
+                    continue
+                total = 8 + length
+                if n - j < total:
+                    pos = j
+                    break
+                ck = (buf[j + 6 + length], buf[j + 7 + length])
+                if _ubx_checksum(memoryview(buf)[j + 2:j + 6 + length]) != ck:
+                    self.bad += 1
+                    pos = j + 2
+                    continue
+                if buf[j + 2] == 0x01 and buf[j + 3] == 0x07:
+                    self._got(parse_nav_pvt(bytes(buf[j + 6:j + 6 + length]), self.clock()))
+                pos = j + total
+        del buf[:pos]
+        if len(buf) > _MAX_BUF:
+            del buf[:-_MAX_NMEA]
+
+    def _got(self, fix: Optional[PositionFix]):
+        if fix is None:
+            self.bad += 1
+            return
+        self.latest = fix
+        self.fixes += 1
+        if self.on_fix:
+            self.on_fix(fix)
+
+
+class GgaScheduler:
+    def __init__(self, interval: float = 5.0, max_interval: float = 30.0,
+                 min_interval: float = 1.0, move_threshold_m: float = 50.0,
+                 alt_threshold_m: float = 100.0):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.min_interval = min_interval
+        self.move_threshold_m = move_threshold_m
+        self.alt_threshold_m = alt_threshold_m
+        self._last_t: Optional[float] = None
+        self._last_pos: Optional[Tuple[float, float, float]] = None
+        self._cur_interval = interval
+        self.sent_moving = 0
+        self.sent_periodic = 0
+
+    @property
+    def current_interval(self) -> float:
+        return self._cur_interval
+
+    def reset(self):
+        """新连接：下一次检查立即发送。"""
+        self._last_t = None
+        self._last_pos = None
+        self._cur_interval = self.interval
+
+    def moved(self, pos: Tuple[float, float, float]) -> bool:
+        last = self._last_pos
+        if last is None:
+            return True
+        return (distance_m(last[0], last[1], pos[0], pos[1]) > self.move_threshold_m
+                or abs(pos[2] - last[2]) > self.alt_threshold_m)
+
+    def time_due(self, now: float) -> bool:
+        """仅按时间判断是否到期（不看位置）。"""
+        return self._last_t is None or now - self._last_t >= self._cur_interval
+
+    def due(self, pos: Tuple[float, float, float], now: float) -> bool:
+        if self._last_t is None:
+            return True
+        elapsed = now - self._last_t
+        if elapsed < self.min_interval:
+            return False
+        return elapsed >= self._cur_interval or self.moved(pos)
+
+    def sent(self, pos: Tuple[float, float, float], now: float):
+        if self._last_t is not None and self.moved(pos):
+            self._cur_interval = self.interval
+            self.sent_moving += 1
+        elif self._last_t is not None:
+            self._cur_interval = min(self.max_interval, self._cur_interval * 2.0)
+            self.sent_periodic += 1
+        self._last_t = now
+        self._last_pos = (pos[0], pos[1], pos[2])
+
+
+__all__ = [
+    "GgaScheduler",
+    "NmeaTap",
+    "PositionFix",
+    "distance_m",
+    "parse_gga",
+    "parse_nav_pvt",
+]
@@ -3,9 +3,15 @@
 功能点：
 - TCP 连接到 caster (host:port)
 - 发送带 Basic Auth 的请求头 (MountPoint)
-- 定期发送 GGA (外部提供经纬度) 以保持流数据
-- 异步读取 RTCM 数据并回调处理（例如转发到串口）
-- 简单重连策略（指数退避上限）
+- 发送 GGA (外部提供经纬度) 以保持流数据；默认固定间隔，提供 gga_scheduler 时
+  按运动调度（移动超过阈值立即发送，静止时退避），提供 get_fix 时用流动站自身
+  定位的质量/卫星数/HDOP 填写 GGA
+- 异步读取 RTCM 数据并回调处理（例如转发到串口）；接收走 recv_into +
+  预分配缓冲原地分帧，下游拿到的是 memoryview，不产生逐包 bytes 副本
+- 快速重连：地址缓存/预解析、IPv4/IPv6 Happy Eyeballs、首次短的抖动退避、
+  数据停滞看门狗（连续 N 个历元无数据即重连，可发现静默的半开连接）
+- 自动挂载点：获取并缓存 sourcetable，按当前位置选择最近的兼容挂载点，
+  位置变化后定期重新评估
 
 使用：
     client = NTRIPClient(host, port, mountpoint, user, password,
@@ -17,14 +23,29 @@
 from __future__ import annotations
 import base64
 import socket
+import math
 import threading
 import time
 from typing import Callable, Optional
 
+from .connection import AddressCache, Backoff, StallWatchdog, happy_eyeballs_connect, tune_socket
 from .gga import build_gga
+from .ingest import FrameRing
+from .nmea_tap import GgaScheduler, PositionFix
+from .profiling import PROFILER
+from .sourcetable import (
+    MountpointIndex,
+    MountpointSelector,
+    SourcetableCache,
+    SourcetableParser,
+    StreamEntry,
+    is_compatible,
+)
 
 PositionProvider = Callable[[], tuple[float, float, float]]
+FixProvider = Callable[[], Optional[PositionFix]]
 RTCMCallback = Callable[[bytes], None]
+FrameCallback = Callable[[int, memoryview], None]
 LogCallback = Callable[[str], None]
 
 
@@ -36,7 +57,20 @@ class NTRIPClient:
                  log: Optional[LogCallback] = None,
                  send_gga_interval: float = 15.0,
                  reconnect_max_interval: float = 60.0,
-                 timeout: float = 10.0):
+                 timeout: float = 10.0,
+                 epoch_interval: float = 1.0,
+                 stall_epochs: int = 5,
+                 rcvbuf: int = 64 * 1024,
+                 address_cache: Optional[AddressCache] = None,
+                 backoff: Optional[Backoff] = None,
+                 auto_select: bool = False,
+                 sourcetable_cache: Optional[SourcetableCache] = None,
+                 msm_type: Optional[int] = None,
+                 mount_check_interval: float = 30.0,
+                 on_frame: Optional[FrameCallback] = None,
+                 gga_scheduler: Optional[GgaScheduler] = None,
+                 get_fix: Optional[FixProvider] = None,
+                 on_mountpoint_change: Optional[Callable[[str], None]] = None):
         self.host = host
         self.port = port
         self.mountpoint = mountpoint.lstrip('/')
@@ -44,19 +78,48 @@ class NTRIPClient:
         self.password = password
         self.get_position = get_position
         self.on_rtcm = on_rtcm
+        # 可选：逐帧回调 (msg_num, 帧视图)，帧视图只在回调期间有效
+        self.on_frame = on_frame
         self.log = log or (lambda m: None)
         self.send_gga_interval = send_gga_interval
+        # 未指定调度器时等价于旧行为：固定间隔、不因移动提前发送
+        self.gga_scheduler = gga_scheduler or GgaScheduler(
+            interval=send_gga_interval, max_interval=send_gga_interval, min_interval=0.0,
+            move_threshold_m=math.inf, alt_threshold_m=math.inf,
+        )
+        self.get_fix = get_fix
+        # 自动选择切换挂载点时通知上层（清除属于旧基准站的缓存等）
+        self.on_mountpoint_change = on_mountpoint_change
         self.reconnect_max_interval = reconnect_max_interval
         self.timeout = timeout
         self._stop_evt = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._sock: Optional[socket.socket] = None
         self._last_gga = 0.0
+        # 预分配接收缓冲：recv_into 直接写入并原地分帧
+        self._ring = FrameRing()
+        self.rcvbuf = rcvbuf
+        self.address_cache = address_cache or AddressCache()
+        self.backoff = backoff or Backoff(cap=reconnect_max_interval)
+        self.watchdog = StallWatchdog(epoch_interval, stall_epochs)
+        self.reconnects = 0
+        # 最近一次从断线到重新收到数据的耗时（秒）
+        self.last_reconnect_time: Optional[float] = None
+        self._down_since: Optional[float] = None
+        # 自动选择挂载点
+        self.auto_select = auto_select
+        self.sourcetable_cache = sourcetable_cache
+        self.msm_type = msm_type
+        self.mount_check_interval = mount_check_interval
+        self._selector: Optional[MountpointSelector] = None
+        self._selector_built = 0.0
+        self._last_mount_check = 0.0
 
     def start(self):
         if self._thread and self._thread.is_alive():
             return
         self._stop_evt.clear()
+        self.address_cache.prefetch(self.host, self.port)
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
         self.log("NTRIPClient 启动线程")
@@ -74,11 +137,13 @@ class NTRIPClient:
         self.log("NTRIPClient 已停止")
 
     # 内部方法
-    def _build_request(self) -> bytes:
+    def _build_request(self, path: Optional[str] = None) -> bytes:
         auth_raw = f"{self.username}:{self.password}".encode('utf-8')
         auth_b64 = base64.b64encode(auth_raw).decode()
+        if path is None:
+            path = self.mountpoint
         req = (
-            f"GET /{self.mountpoint} HTTP/1.0\r\n"
+            f"GET /{path} HTTP/1.0\r\n"
             f"Host: {self.host}\r\n"
             f"User-Agent: RTK-LoRa-Forwarder/0.1\r\n"
             f"Authorization: Basic {auth_b64}\r\n"
@@ -87,62 +152,196 @@ class NTRIPClient:
         )
         return req.encode('ascii')
 
+    def _open_socket(self) -> socket.socket:
+        addrs = self.address_cache.resolve(self.host, self.port)
+        s = happy_eyeballs_connect(addrs, self.timeout,
+                                   tune=lambda x: tune_socket(x, rcvbuf=self.rcvbuf))
+        self.address_cache.remember_success(self.host, self.port, s.getpeername())
+        return s
+
+    def fetch_sourcetable(self) -> list[StreamEntry]:
+        """下载并增量解析 sourcetable（GET /）。"""
+        s = self._open_socket()
+        try:
+            s.settimeout(self.timeout)
+            s.sendall(self._build_request(path=""))
+            parser = SourcetableParser()
+            while not parser.done:
+                data = s.recv(8192)
+                if not data:
+                    break
+                parser.feed(data)
+        finally:
+            s.close()
+        return parser.entries
+
+    def _load_sourcetable(self) -> list[StreamEntry]:
+        cache = self.sourcetable_cache
+        entries = cache.load(self.host, self.port) if cache else None
+        if entries is None:
+            entries = self.fetch_sourcetable()
+            self.log(f"获取 sourcetable: {len(entries)} 个挂载点")
+            if cache and entries:
+                cache.store(self.host, self.port, entries)
+        return entries
+
+    def _select_mountpoint(self) -> bool:
+        """按当前位置选择挂载点，返回挂载点是否发生变化。"""
+        now = time.time()
+        self._last_mount_check = now
+        ttl = self.sourcetable_cache.ttl if self.sourcetable_cache else math.inf
+        if self._selector is None or now - self._selector_built > ttl:
+            # sourcetable 过期后重新加载并重建索引；沿用当前挂载点作为迟滞基准
+            msm = self.msm_type
+            entries = self._load_sourcetable()
+            prev = self._selector.current if self._selector else None
+            self._selector = MountpointSelector(
+                MountpointIndex(entries, accept=lambda e: is_compatible(e, msm=msm)),
+            )
+            if prev is not None:
+                self._selector.current = next(
+                    (e for e in entries if e.mountpoint == prev.mountpoint), None)
+            self._selector_built = now
+        lat, lon, _alt = self.get_position()
+        entry = self._selector.choose(lat, lon)
+        if entry is None or entry.mountpoint == self.mountpoint:
+            return False
+        self.log(f"自动选择挂载点: {entry.mountpoint} ({entry.identifier})")
+        self.mountpoint = entry.mountpoint
+        if self.on_mountpoint_change:
+            self.on_mountpoint_change(entry.mountpoint)
+        return True
+
     def _connect_and_stream(self):
+        if self.auto_select:
+            try:
+                self._select_mountpoint()
+            except Exception as e:  # noqa
+                self.log(f"自动选择挂载点失败，沿用 {self.mountpoint}: {e}")
         self.log(f"连接 NTRIP {self.host}:{self.port} ...")
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s = self._open_socket()
+        self._sock = s
         s.settimeout(self.timeout)
-        s.connect((self.host, self.port))
         s.sendall(self._build_request())
-        resp = s.recv(4096)
-        if b"ICY 200 OK" not in resp and b"HTTP/1.1 200" not in resp and b"HTTP/1.0 200" not in resp:
-            raise ConnectionError(f"NTRIP 连接失败 响应: {resp[:100]!r}")
-        # 去掉头部（简单处理：查找\r\n\r\n）
-        header_end = resp.find(b"\r\n\r\n")
-        leftover = b""
+        ring = self._ring
+        ring.clear()
+        n = ring.recv_into(s)
+        if (ring.find(b"ICY 200 OK") < 0 and ring.find(b"HTTP/1.1 200") < 0
+                and ring.find(b"HTTP/1.0 200") < 0):
+            raise ConnectionError(f"NTRIP 连接失败 响应: {bytes(ring.view(0, min(n, 100)))!r}")
+        # 去掉头部（查找\r\n\r\n；部分 v1 caster 只回一行状态）
+        header_end = ring.find(b"\r\n\r\n")
         if header_end != -1:
-            leftover = resp[header_end+4:]
-        self._sock = s
+            ring.consume(header_end + 4)
+        else:
+            line_end = ring.find(b"\r\n")
+            ring.consume(line_end + 2 if line_end >= 0 else len(ring))
         self.log("NTRIP 建立成功")
-        if leftover:
-            self.on_rtcm(leftover)
-        self._last_gga = 0
+        self.watchdog.kick()
+        if len(ring):
+            self._on_data(ring.last(len(ring)))
+        sched = self.gga_scheduler
+        sched.reset()
         while not self._stop_evt.is_set():
             now = time.time()
-            if now - self._last_gga >= self.send_gga_interval:
-                try:
-                    lat, lon, alt = self.get_position()
-                    gga = build_gga(lat, lon, alt)
-                    s.sendall(gga)
-                    self._last_gga = now
-                    self.log("发送 GGA")
-                except Exception as e:  # noqa
-                    self.log(f"GGA 发送失败: {e}")
             try:
-                s.settimeout(1.0)
-                data = s.recv(4096)
-                if not data:
+                self._maybe_send_gga(s, sched, now)
+            except Exception as e:  # noqa
+                self.log(f"GGA 发送失败: {e}")
+            if self._maybe_reselect(now):
+                raise ConnectionError("位置变化，切换挂载点")
+            if self.watchdog.stalled():
+                raise ConnectionError(f"数据停滞 {self.watchdog.idle():.1f}s，判定连接失效")
+            try:
+                s.settimeout(min(1.0, max(0.01, self.watchdog.timeout - self.watchdog.idle())))
+                n = ring.recv_into(s)
+                if not n:
                     raise ConnectionError("NTRIP 断开")
-                self.on_rtcm(data)
+                self._on_data(ring.last(n))
             except socket.timeout:
                 continue
         self.log("退出接收循环")
 
+    def _maybe_reselect(self, now: float) -> bool:
+        """定期重新评估挂载点；出错只记录日志，不中断当前数据流。"""
+        if self._selector is None or now - self._last_mount_check < self.mount_check_interval:
+            return False
+        try:
+            return self._select_mountpoint()
+        except Exception as e:  # noqa
+            self._last_mount_check = now
+            self.log(f"重新评估挂载点失败，沿用 {self.mountpoint}: {e}")
+            return False
+
+    def _maybe_send_gga(self, s: socket.socket, sched: GgaScheduler, now: float):
+        fix = self.get_fix() if self.get_fix else None
+        if fix is not None:
+            pos = (fix.lat_deg, fix.lon_deg, fix.alt_m)
+            if not sched.due(pos, now):
+                return
+        else:
+            # 无流动站定位：回退位置（手动/1005）只按时间调度，未到期不调用 get_position
+            if not sched.time_due(now):
+                return
+            pos = self.get_position()
+        if fix is not None:
+            gga = build_gga(fix.lat_deg, fix.lon_deg, fix.alt_m, fix_quality=fix.quality,
+                            num_sats=fix.num_sats, hdop=fix.hdop, geoid_sep=fix.geoid_sep_m)
+        else:
+            gga = build_gga(*pos)
+        s.sendall(gga)
+        moving = sched.sent_moving
+        sched.sent(pos, now)
+        self._last_gga = now
+        self.log("发送 GGA(位置变化)" if sched.sent_moving > moving else "发送 GGA")
+
+    def _on_data(self, chunk: memoryview):
+        """chunk 为环形缓冲中本次新收到的数据视图：先原地分帧回调，再透传原始数据。"""
+        t0 = PROFILER.t0()
+        ring = self._ring
+        on_frame = self.on_frame
+        framed = False
+        while True:
+            item = ring.next_frame()
+            if item is None:
+                break
+            framed = True
+            if on_frame is not None:
+                on_frame(item[0], item[1])
+        if not framed:
+            self.on_rtcm(chunk)
+            PROFILER.record("net_chunk", t0)
+            return
+        # 收到完整帧才视为数据流健康（仅有噪声/保活字节不算）
+        self.watchdog.kick()
+        if self._down_since is not None:
+            self.last_reconnect_time = time.monotonic() - self._down_since
+            self._down_since = None
+            self.log(f"NTRIP 恢复数据，重连耗时 {self.last_reconnect_time:.2f}s")
+        self.backoff.reset()
+        self.on_rtcm(chunk)
+        PROFILER.record("net_chunk", t0)
+
     def _run(self):
-        backoff = 2.0
         while not self._stop_evt.is_set():
             try:
                 self._connect_and_stream()
-                backoff = 2.0  # 正常结束重置
             except Exception as e:  # noqa
                 self.log(f"NTRIP 错误: {e}")
+                if self._down_since is None:
+                    self._down_since = time.monotonic()
                 if self._sock:
                     try:
                         self._sock.close()
                     except OSError:
                         pass
                     self._sock = None
-                time.sleep(backoff)
-                backoff = min(backoff * 1.7, self.reconnect_max_interval)
+                if self._stop_evt.is_set():
+                    break
+                self.reconnects += 1
+                delay = self.backoff.next()
+                self.log(f"{delay:.2f}s 后重连")
+                self._stop_evt.wait(delay)
         self.log("NTRIP 线程退出")
 
 __all__ = ["NTRIPClient"]
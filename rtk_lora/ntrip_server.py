@@ -0,0 +1,207 @@
+"""NTRIP Server（数据源）模式：把本地基站 RTCM 上传到 caster。
+
+功能点：
+- NTRIP v1: `SOURCE <password> /<mountpoint>`，期待 `ICY 200 OK`
+- NTRIP v2: `POST /<mountpoint> HTTP/1.1` + Basic Auth，分块传输 (chunked)
+- push() 非阻塞：调用方（串口接收线程）只把已校验的完整帧放入有界队列；
+  队列超过上限时按整帧丢弃最旧数据（上行慢时宁可丢旧帧也不积压延迟）
+- 独立发送线程：合并队列中的帧一次写出，TCP_NODELAY + 较小发送缓冲，降低延迟
+- 断线重连：复用 connection 模块的地址缓存、Happy Eyeballs 与抖动退避
+
+使用：
+    server = NTRIPServer(host, port, mountpoint, password, log=print)
+    server.start()
+    server.push(frame)   # 完整 RTCM 帧（含 D3 头与 CRC）
+    ... 停止时 server.stop()
+"""
+from __future__ import annotations
+import base64
+from collections import deque
+import select
+import socket
+import threading
+from typing import Callable, Deque, Optional
+
+from .connection import AddressCache, Backoff, happy_eyeballs_connect, tune_socket
+
+LogCallback = Callable[[str], None]
+
+
+class NTRIPServer:
+    def __init__(self, host: str, port: int, mountpoint: str, password: str,
+                 username: str = "", version: int = 1,
+                 log: Optional[LogCallback] = None,
+                 max_queue_bytes: int = 32 * 1024,
+                 sndbuf: int = 16 * 1024,
+                 timeout: float = 10.0,
+                 address_cache: Optional[AddressCache] = None,
+                 backoff: Optional[Backoff] = None):
+        self.host = host
+        self.port = port
+        self.mountpoint = mountpoint.lstrip('/')
+        self.username = username
+        self.password = password
+        self.version = version
+        self.log = log or (lambda m: None)
+        self.max_queue_bytes = max_queue_bytes
+        self.sndbuf = sndbuf
+        self.timeout = timeout
+        self.address_cache = address_cache or AddressCache()
+        self.backoff = backoff or Backoff()
+        self._queue: Deque[bytes] = deque()
+        self._queued_bytes = 0
+        self._cond = threading.Condition()
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+        self.connected = False
+        self.bytes_sent = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self.address_cache.prefetch(self.host, self.port)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.log("NTRIPServer 启动线程")
+
+    def stop(self):
+        self._stop_evt.set()
+        with self._cond:
+            self._cond.notify_all()
+        sock = self._sock
+        if sock:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.log("NTRIPServer 已停止")
+
+    def push(self, frame) -> bool:
+        """放入一帧待上传数据；若因队列超限丢弃了旧帧返回 False。"""
+        data = bytes(frame)
+        dropped = False
+        with self._cond:
+            self._queue.append(data)
+            self._queued_bytes += len(data)
+            while self._queued_bytes > self.max_queue_bytes and len(self._queue) > 1:
+                old = self._queue.popleft()
+                self._queued_bytes -= len(old)
+                self.frames_dropped += 1
+                dropped = True
+            self._cond.notify()
+        return not dropped
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._queued_bytes
+
+    # 内部方法
+    def _build_request(self) -> bytes:
+        if self.version >= 2:
+            auth_raw = f"{self.username}:{self.password}".encode('utf-8')
+            auth_b64 = base64.b64encode(auth_raw).decode()
+            req = (
+                f"POST /{self.mountpoint} HTTP/1.1\r\n"
+                f"Host: {self.host}\r\n"
+                f"Ntrip-Version: Ntrip/2.0\r\n"
+                f"User-Agent: NTRIP RTK-LoRa-Forwarder/0.1\r\n"
+                f"Authorization: Basic {auth_b64}\r\n"
+                f"Ntrip-STR: \r\n"
+                f"Connection: close\r\n"
+                f"Transfer-Encoding: chunked\r\n\r\n"
+            )
+        else:
+            req = (
+                f"SOURCE {self.password} /{self.mountpoint}\r\n"
+                f"Source-Agent: NTRIP RTK-LoRa-Forwarder/0.1\r\n"
+                f"STR: \r\n\r\n"
+            )
+        return req.encode('utf-8')
+
+    def _connect(self) -> socket.socket:
+        self.log(f"连接 NTRIP Caster(上传) {self.host}:{self.port}/{self.mountpoint} ...")
+        addrs = self.address_cache.resolve(self.host, self.port)
+
+        def tune(s: socket.socket):
+            tune_socket(s, rcvbuf=0)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+
+        s = happy_eyeballs_connect(addrs, self.timeout, tune=tune)
+        self._sock = s
+        self.address_cache.remember_success(self.host, self.port, s.getpeername())
+        s.settimeout(self.timeout)
+        s.sendall(self._build_request())
+        resp = s.recv(1024)
+        ok = (b"ICY 200 OK" in resp) if self.version < 2 else (b" 200" in resp.split(b"\r\n", 1)[0])
+        if not ok:
+            raise ConnectionError(f"NTRIP 上传被拒绝 响应: {resp[:100]!r}")
+        return s
+
+    @staticmethod
+    def _check_peer(s: socket.socket):
+        r, _w, _x = select.select([s], [], [], 0)
+        if r and not s.recv(1024):
+            raise ConnectionError("Caster 关闭了上传连接")
+
+    def _take_batch(self) -> Optional[tuple[bytes, int]]:
+        """取出队列中全部帧合并为一次写入，返回 (数据, 帧数)。"""
+        with self._cond:
+            if not self._queue:
+                self._cond.wait(timeout=1.0)
+            if not self._queue:
+                return None
+            count = len(self._queue)
+            batch = b"".join(self._queue)
+            self._queue.clear()
+            self._queued_bytes = 0
+        if self.version >= 2:
+            batch = f"{len(batch):X}\r\n".encode('ascii') + batch + b"\r\n"
+        return batch, count
+
+    def _stream(self):
+        s = self._connect()
+        self.connected = True
+        self.backoff.reset()
+        self.log("NTRIP 上传已建立")
+        while not self._stop_evt.is_set():
+            self._check_peer(s)
+            item = self._take_batch()
+            if item is None:
+                continue
+            data, count = item
+            s.sendall(data)
+            self.bytes_sent += len(data)
+            self.frames_sent += count
+
+    def _run(self):
+        while not self._stop_evt.is_set():
+            try:
+                self._stream()
+            except Exception as e:  # noqa
+                if not self._stop_evt.is_set():
+                    self.log(f"NTRIP 上传错误: {e}")
+            finally:
+                self.connected = False
+                if self._sock:
+                    try:
+                        self._sock.close()
+                    except OSError:
+                        pass
+                    self._sock = None
+            if self._stop_evt.is_set():
+                break
+            self.reconnects += 1
+            delay = self.backoff.next()
+            self.log(f"{delay:.2f}s 后重连上传")
+            self._stop_evt.wait(delay)
+        self.log("NTRIPServer 线程退出")
+
+
+__all__ = ["NTRIPServer"]
@@ -0,0 +1,701 @@
+"""可组合的数据流水线：数据源 -> 分帧 -> 处理阶段 -> 输出，由 config.json 声明。
+
+功能点：
+- 注册表：SOURCES / STAGES / SINKS 按类型名登记工厂函数，新增行为只需 register_*，
+  不必修改 GUI 类
+- 帧对象 Frame 为不可变共享对象：分帧时复制一次，之后各阶段/输出共用同一 bytes，
+  不再重新序列化（改写内容的变换阶段除外，会生成新帧）
+- 每个阶段（含分帧与各输出）各自统计：调用次数、输入/输出帧数、字节数、
+  每次处理耗时（均值/最大）以及吞吐率；输出额外统计帧从接收到写出的端到端延迟
+- 同一串口可同时被多个流水线使用（输出与 RX 数据源共享一个 SerialForwarder）
+- 流水线是主转发路径（NTRIP -> 串口/UDP，GUI 中的备用模式切换）之外的附加路径；
+  ntrip 数据源未指定 host、或与主连接的 caster/挂载点相同时，直接复用主连接已分好的帧，
+  不再向 caster 另开一个会话
+
+配置示例（config.json）：
+    "pipelines": [
+      {"name": "replay", "enabled": true,
+       "source": {"type": "file", "path": "session.rtcm", "rate_bytes_per_s": 2000},
+       "framer": {"verify_crc": true},
+       "stages": [{"type": "filter", "exclude": [1013]},
+                  {"type": "rate_limit", "min_interval": {"1005": 10}}],
+       "sinks": [{"type": "serial", "port": "COM5", "baudrate": 57600},
+                 {"type": "file", "path": "out.rtcm"}]}
+    ]
+
+内置类型：
+- 数据源：ntrip（缺省复用主连接）、serial_rx、file
+- 阶段：filter、rate_limit、station_id、log
+- 输出：serial、file、ntrip_server、udp
+"""
+from __future__ import annotations
+from abc import ABC, ABCMeta, abstractmethod
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .rtcm_parser import RTCMParser, crc24q
+
+LogCallback = Callable[[str], None]
+Config = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Frame:
+    msg_num: int
+    data: bytes  # 完整帧（D3 头 + payload + CRC）
+    t_rx: float  # 接收时刻 time.monotonic()
+    source: str = ""
+
+    @property
+    def payload(self) -> memoryview:
+        return memoryview(self.data)[3:-3]
+
+
+@dataclass(frozen=True)
+class StageMetrics:
+    name: str
+    calls: int
+    frames_in: int
+    frames_out: int
+    bytes_out: int
+    mean_us: float
+    max_us: float
+    frames_per_s: float
+    bytes_per_s: float
+    mean_age_ms: Optional[float] = None  # 仅输出：接收到写出的平均延迟
+
+
+class _Meter:
+    __slots__ = ("name", "calls", "frames_in", "frames_out", "bytes_out", "total_ns",
+                 "max_ns", "age_sum", "age_n", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.monotonic()
+        self.calls = self.frames_in = self.frames_out = self.bytes_out = 0
+        self.total_ns = self.max_ns = 0
+        self.age_sum = 0.0
+        self.age_n = 0
+
+    def add(self, n_in: int, out: Sequence[Frame], ns: int):
+        self.calls += 1
+        self.frames_in += n_in
+        self.frames_out += len(out)
+        self.bytes_out += sum(len(f.data) for f in out)
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def snapshot(self, now: float) -> StageMetrics:
+        elapsed = max(now - self.started, 1e-9)
+        return StageMetrics(
+            name=self.name,
+            calls=self.calls,
+            frames_in=self.frames_in,
+            frames_out=self.frames_out,
+            bytes_out=self.bytes_out,
+            mean_us=self.total_ns / self.calls / 1000.0 if self.calls else 0.0,
+            max_us=self.max_ns / 1000.0,
+            frames_per_s=self.frames_out / elapsed,
+            bytes_per_s=self.bytes_out / elapsed,
+            mean_age_ms=self.age_sum / self.age_n * 1000.0 if self.age_n else None,
+        )
+
+
+class PipelineContext:
+    """流水线共享资源：日志、定位回调，以及按端口名共享的串口。"""
+
+    def __init__(self, log: Optional[LogCallback] = None,
+                 get_position: Optional[Callable[[], tuple]] = None,
+                 serial_factory: Optional[Callable[..., Any]] = None):
+        self.log = log or (lambda m: None)
+        self.get_position = get_position or (lambda: (0.0, 0.0, 0.0))
+        self.serial_factory = serial_factory
+        self._serials: Dict[str, Any] = {}
+        self._owned: List[Any] = []
+        self._rx_listeners: Dict[str, List[Callable[[bytes], None]]] = {}
+        self._lock = threading.Lock()
+        # 主 NTRIP 连接 (host, port, mountpoint) 及其逐帧分发
+        self.main_ntrip: Optional[tuple] = None
+        self._net_listeners: List[Callable[[List[Frame]], None]] = []
+        self._net_batch: List[Frame] = []
+
+    def add_serial(self, port: str, forwarder: Any):
+        """登记外部已打开的串口（如 GUI 主流程的 SerialForwarder），RX 数据同时分发给流水线。"""
+        with self._lock:
+            self._serials[port] = forwarder
+            prev = forwarder.on_rx
+
+            def on_rx(data: bytes, _prev=prev):
+                if _prev:
+                    _prev(data)
+                self._dispatch_rx(port, data)
+
+            forwarder.on_rx = on_rx
+
+    def serial(self, port: str, baudrate: int = 57600):
+        """取得（必要时打开）指定端口的共享 SerialForwarder。"""
+        from .serial_forwarder import SerialForwarder
+
+        with self._lock:
+            fwd = self._serials.get(port)
+            if fwd is not None:
+                return fwd
+            kwargs: Dict[str, Any] = {}
+            if self.serial_factory is not None:
+                kwargs["serial_factory"] = self.serial_factory
+                kwargs["port_lister"] = lambda: []
+            fwd = SerialForwarder(port, baudrate, log=self.log,
+                                  on_rx=lambda d: self._dispatch_rx(port, d), **kwargs)
+            fwd.open()
+            self._serials[port] = fwd
+            self._owned.append(fwd)
+            return fwd
+
+    def add_rx_listener(self, port: str, listener: Callable[[bytes], None]):
+        with self._lock:
+            self._rx_listeners.setdefault(port, []).append(listener)
+
+    def _dispatch_rx(self, port: str, data: bytes):
+        for listener in self._rx_listeners.get(port, ()):
+            listener(data)
+
+    def shares_main_ntrip(self, cfg: Config) -> bool:
+        """ntrip 数据源配置是否指向主连接（未指定 host 或 caster/挂载点相同）。"""
+        if self.main_ntrip is None:
+            return False
+        if not cfg.get("host"):
+            return True
+        host, port, mountpoint = self.main_ntrip
+        return (cfg["host"] == host and int(cfg.get("port", 2101)) == int(port)
+                and cfg.get("mountpoint", "").lstrip("/") == mountpoint.lstrip("/"))
+
+    def add_net_listener(self, listener: Callable[[List[Frame]], None]):
+        with self._lock:
+            self._net_listeners.append(listener)
+
+    def net_frame(self, msg_num: int, view):
+        """主 NTRIP 连接逐帧回调（接收线程内）；有订阅者时才复制帧。"""
+        if self._net_listeners:
+            self._net_batch.append(Frame(msg_num, bytes(view), time.monotonic(), "ntrip"))
+
+    def net_chunk(self):
+        """主 NTRIP 连接一个数据块处理完毕：把本块的帧整批交给订阅者。"""
+        batch = self._net_batch
+        if not batch:
+            return
+        self._net_batch = []
+        for listener in self._net_listeners:
+            listener(batch)
+
+    def close(self):
+        with self._lock:
+            owned, self._owned = self._owned, []
+            self._net_listeners.clear()
+            self._net_batch = []
+            for port, fwd in list(self._serials.items()):
+                if fwd in owned:
+                    del self._serials[port]
+            self._rx_listeners.clear()
+        for fwd in owned:
+            try:
+                fwd.close()
+            except Exception:  # noqa
+                pass
+
+
+# ---- 基类 ----
+
+class Stage:
+    """处理阶段：输入一批帧，返回要继续传递的帧（可原样返回同一对象）。"""
+
+    def __init__(self, cfg: Config, ctx: PipelineContext):
+        self.cfg = cfg
+        self.ctx = ctx
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def process(self, frames: List[Frame]) -> List[Frame]:
+        return frames
+
+
+class Sink(Stage, metaclass=ABCMeta):
+    """输出：写出一批帧；process 原样返回，便于统一计量。"""
+
+    @abstractmethod
+    def write(self, frames: List[Frame]):
+        ...
+
+    def process(self, frames: List[Frame]) -> List[Frame]:
+        if frames:
+            self.write(frames)
+        return frames
+
+
+class Source(ABC):
+    """数据源：start 后在自己的线程里调用 pipeline.push / push_frames。"""
+
+    def __init__(self, cfg: Config, ctx: PipelineContext, pipeline: "Pipeline"):
+        self.cfg = cfg
+        self.ctx = ctx
+        self.pipeline = pipeline
+
+    @abstractmethod
+    def start(self):
+        ...
+
+    def stop(self):
+        pass
+
+
+SOURCES: Dict[str, Callable[..., Source]] = {}
+STAGES: Dict[str, Callable[..., Stage]] = {}
+SINKS: Dict[str, Callable[..., Sink]] = {}
+
+
+def register_source(name: str):
+    def deco(cls):
+        SOURCES[name] = cls
+        return cls
+    return deco
+
+
+def register_stage(name: str):
+    def deco(cls):
+        STAGES[name] = cls
+        return cls
+    return deco
+
+
+def register_sink(name: str):
+    def deco(cls):
+        SINKS[name] = cls
+        return cls
+    return deco
+
+
+# ---- 流水线 ----
+
+class Pipeline:
+    def __init__(self, name: str, ctx: PipelineContext, verify_crc: bool = True):
+        self.name = name
+        self.ctx = ctx
+        self.source: Optional[Source] = None
+        self.stages: List[Stage] = []
+        self.sinks: List[Sink] = []
+        self._parser = RTCMParser(verify_crc=verify_crc)
+        self._framer_meter = _Meter("framer")
+        self._meters: Dict[int, _Meter] = {}
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def _meter(self, obj: Stage, name: str) -> _Meter:
+        m = self._meters.get(id(obj))
+        if m is None:
+            m = self._meters[id(obj)] = _Meter(name)
+        return m
+
+    def add_stage(self, stage: Stage, name: Optional[str] = None):
+        self.stages.append(stage)
+        self._meter(stage, name or type(stage).__name__)
+
+    def add_sink(self, sink: Sink, name: Optional[str] = None):
+        self.sinks.append(sink)
+        self._meter(sink, name or type(sink).__name__)
+
+    def push(self, data) -> int:
+        """喂入原始字节（未分帧）；返回分出的帧数。"""
+        t0 = time.perf_counter_ns()
+        now = time.monotonic()
+        src = self.name
+        with self._lock:
+            frames = [Frame(m, f, now, src) for m, f in self._parser.feed_frames(data)]
+            self._framer_meter.add(len(frames), frames, time.perf_counter_ns() - t0)
+            self._run(frames)
+        return len(frames)
+
+    def push_frames(self, frames: List[Frame]):
+        """喂入已分帧的数据（如 NTRIP 接收环形缓冲已完成分帧）。"""
+        with self._lock:
+            self._run(frames)
+
+    def _run(self, frames: List[Frame]):
+        if not frames:
+            return
+        for stage in self.stages:
+            m = self._meters[id(stage)]
+            t0 = time.perf_counter_ns()
+            n_in = len(frames)
+            try:
+                frames = stage.process(frames)
+            except Exception as e:  # noqa
+                self.errors += 1
+                self.ctx.log(f"流水线 {self.name} 阶段 {m.name} 异常(丢弃本批): {e}")
+                return
+            m.add(n_in, frames, time.perf_counter_ns() - t0)
+            if not frames:
+                return
+        now = time.monotonic()
+        age = sum(now - f.t_rx for f in frames) / len(frames)
+        for sink in self.sinks:
+            m = self._meters[id(sink)]
+            t0 = time.perf_counter_ns()
+            try:
+                sink.process(frames)
+            except Exception as e:  # noqa
+                self.errors += 1
+                self.ctx.log(f"流水线 {self.name} 输出 {m.name} 异常: {e}")
+                continue
+            m.add(len(frames), frames, time.perf_counter_ns() - t0)
+            m.age_sum += age * len(frames)
+            m.age_n += len(frames)
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+        for stage in self.stages:
+            stage.start()
+        if self.source:
+            self.source.start()
+        self.ctx.log(f"流水线 {self.name} 已启动")
+
+    def stop(self):
+        if self.source:
+            self.source.stop()
+        for stage in self.stages:
+            stage.stop()
+        for sink in self.sinks:
+            sink.stop()
+        self.ctx.log(f"流水线 {self.name} 已停止")
+
+    def metrics(self) -> List[StageMetrics]:
+        now = time.monotonic()
+        with self._lock:
+            out = [self._framer_meter.snapshot(now)]
+            out += [self._meters[id(s)].snapshot(now) for s in self.stages]
+            out += [self._meters[id(s)].snapshot(now) for s in self.sinks]
+        return out
+
+
+def build_pipeline(cfg: Config, ctx: PipelineContext) -> Pipeline:
+    """按配置构造流水线；未知类型抛 ValueError。"""
+    name = cfg.get("name", "pipeline")
+    framer = cfg.get("framer", {})
+    p = Pipeline(name, ctx, verify_crc=bool(framer.get("verify_crc", True)))
+    for i, scfg in enumerate(cfg.get("stages", [])):
+        kind = scfg.get("type")
+        if kind not in STAGES:
+            raise ValueError(f"未知的流水线阶段类型: {kind}")
+        p.add_stage(STAGES[kind](scfg, ctx), scfg.get("name", f"{kind}#{i}"))
+    for i, scfg in enumerate(cfg.get("sinks", [])):
+        kind = scfg.get("type")
+        if kind not in SINKS:
+            raise ValueError(f"未知的流水线输出类型: {kind}")
+        p.add_sink(SINKS[kind](scfg, ctx), scfg.get("name", f"{kind}#{i}"))
+    src = cfg.get("source")
+    if src:
+        kind = src.get("type")
+        if kind not in SOURCES:
+            raise ValueError(f"未知的流水线数据源类型: {kind}")
+        p.source = SOURCES[kind](src, ctx, p)
+    return p
+
+
+def build_pipelines(cfgs: List[Config], ctx: PipelineContext) -> List[Pipeline]:
+    return [build_pipeline(c, ctx) for c in cfgs if c.get("enabled", True)]
+
+
+# ---- 内置数据源 ----
+
+@register_source("file")
+class FileSource(Source):
+    """回放录制的原始 RTCM 文件，按 rate_bytes_per_s 限速（0 表示不限速），可循环。"""
+
+    def __init__(self, cfg: Config, ctx: PipelineContext, pipeline: "Pipeline"):
+        super().__init__(cfg, ctx, pipeline)
+        self.path = cfg["path"]
+        self.rate = float(cfg.get("rate_bytes_per_s", 0))
+        self.chunk = int(cfg.get("chunk", 1024))
+        self.loop = bool(cfg.get("loop", False))
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.done = threading.Event()
+
+    def start(self):
+        self._stop_evt.clear()
+        self.done.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        try:
+            while not self._stop_evt.is_set():
+                with open(self.path, "rb") as f:
+                    while not self._stop_evt.is_set():
+                        data = f.read(self.chunk)
+                        if not data:
+                            break
+                        self.pipeline.push(data)
+                        if self.rate > 0:
+                            self._stop_evt.wait(len(data) / self.rate)
+                if not self.loop:
+                    break
+        except Exception as e:  # noqa
+            self.ctx.log(f"文件回放异常: {e}")
+        finally:
+            self.done.set()
+
+
+@register_source("serial_rx")
+class SerialRxSource(Source):
+    """串口接收（如本地基站输出）作为数据源，端口与串口输出共享。"""
+
+    def start(self):
+        port = self.cfg["port"]
+        self.ctx.add_rx_listener(port, self.pipeline.push)
+        self.ctx.serial(port, int(self.cfg.get("baudrate", 57600)))
+
+
+@register_source("ntrip")
+class NtripSource(Source):
+    """NTRIP 数据源：直接使用接收缓冲的分帧结果，不再二次分帧。
+
+    指向主连接时订阅主连接的帧；只有配置了另一个 caster/挂载点才自行建立连接。
+    """
+
+    def __init__(self, cfg: Config, ctx: PipelineContext, pipeline: "Pipeline"):
+        super().__init__(cfg, ctx, pipeline)
+        self.client = None
+        self._batch: List[Frame] = []
+
+    def _on_frame(self, msg_num: int, view: memoryview):
+        self._batch.append(Frame(msg_num, bytes(view), time.monotonic(), self.pipeline.name))
+
+    def _on_chunk(self, _chunk):
+        batch, self._batch = self._batch, []
+        if batch:
+            self.pipeline.push_frames(batch)
+
+    def start(self):
+        from .ntrip_client import NTRIPClient
+
+        c = self.cfg
+        if self.ctx.shares_main_ntrip(c):
+            self.ctx.add_net_listener(self.pipeline.push_frames)
+            return
+        self.client = NTRIPClient(
+            c["host"], int(c.get("port", 2101)), c["mountpoint"],
+            c.get("username", ""), c.get("password", ""),
+            get_position=self.ctx.get_position,
+            on_rtcm=self._on_chunk,
+            on_frame=self._on_frame,
+            log=self.ctx.log,
+        )
+        self.client.start()
+
+    def stop(self):
+        if self.client:
+            self.client.stop()
+            self.client = None
+
+
+# ---- 内置阶段 ----
+
+@register_stage("filter")
+class FilterStage(Stage):
+    """按消息号过滤：include 非空时只保留列出的类型，exclude 中的类型丢弃。"""
+
+    def __init__(self, cfg: Config, ctx: PipelineContext):
+        super().__init__(cfg, ctx)
+        self.include = frozenset(int(x) for x in cfg.get("include", []))
+        self.exclude = frozenset(int(x) for x in cfg.get("exclude", []))
+
+    def process(self, frames: List[Frame]) -> List[Frame]:
+        inc, exc = self.include, self.exclude
+        return [f for f in frames if (not inc or f.msg_num in inc) and f.msg_num not in exc]
+
+
+@register_stage("rate_limit")
+class RateLimitStage(Stage):
+    """限速：min_interval 按类型抽稀（秒）；max_bytes_per_s 令牌桶限总带宽，超出丢帧。"""
+
+    def __init__(self, cfg: Config, ctx: PipelineContext, clock: Callable[[], float] = time.monotonic):
+        super().__init__(cfg, ctx)
+        self.min_interval = {int(k): float(v) for k, v in cfg.get("min_interval", {}).items()}
+        self.max_bps = float(cfg.get("max_bytes_per_s", 0))
+        self.burst = float(cfg.get("burst_bytes", self.max_bps))
+        self.clock = clock
+        self._last: Dict[int, float] = {}
+        self._tokens = self.burst
+        self._t = clock()
+        self.dropped = 0
+
+    def process(self, frames: List[Frame]) -> List[Frame]:
+        now = self.clock()
+        if self.max_bps > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._t) * self.max_bps)
+        self._t = now
+        out: List[Frame] = []
+        for f in frames:
+            gap = self.min_interval.get(f.msg_num)
+            if gap is not None:
+                last = self._last.get(f.msg_num)
+                if last is not None and now - last < gap:
+                    self.dropped += 1
+                    continue
+            if self.max_bps > 0:
+                if len(f.data) > self._tokens:
+                    self.dropped += 1
+                    continue
+                self._tokens -= len(f.data)
+            if gap is not None:
+                self._last[f.msg_num] = now
+            out.append(f)
+        return out
+
+
+# 基站 ID 紧跟消息号（DF003 位于第 12~23 位）的消息：观测/基站/天线/偏差与 MSM
+def _has_station_id(msg_num: int) -> bool:
+    return 1001 <= msg_num <= 1013 or msg_num in (1033, 1230) or (
+        msg_num // 10 in (107, 108, 109, 111, 112) and 1 <= msg_num % 10 <= 7)
+
+
+@register_stage("station_id")
+class StationIdStage(Stage):
+    """改写基站 ID（DF003）并重算 CRC，用于上传到 caster 时统一编号。"""
+
+    def __init__(self, cfg: Config, ctx: PipelineContext):
+        super().__init__(cfg, ctx)
+        self.station_id = int(cfg["station_id"]) & 0xFFF
+
+    def process(self, frames: List[Frame]) -> List[Frame]:
+        sid = self.station_id
+        out: List[Frame] = []
+        for f in frames:
+            d = f.data
+            if not _has_station_id(f.msg_num) or len(d) < 9 or \
+                    (((d[4] & 0x0F) << 8) | d[5]) == sid:
+                out.append(f)
+                continue
+            buf = bytearray(d[:-3])
+            buf[4] = (buf[4] & 0xF0) | (sid >> 8)
+            buf[5] = sid & 0xFF
+            buf += crc24q(buf).to_bytes(3, "big")
+            out.append(Frame(f.msg_num, bytes(buf), f.t_rx, f.source))
+        return out
+
+
+@register_stage("log")
+class LogStage(Stage):
+    """把每帧消息号写入日志（与 GUI 的 RX 打印一致），可加前缀。"""
+
+    def process(self, frames: List[Frame]) -> List[Frame]:
+        prefix = self.cfg.get("prefix", "")
+        for f in frames:
+            self.ctx.log(f"{prefix}{f.msg_num}")
+        return frames
+
+
+# ---- 内置输出 ----
+
+@register_sink("serial")
+class SerialSink(Sink):
+    def start(self):
+        self.fwd = self.ctx.serial(self.cfg["port"], int(self.cfg.get("baudrate", 57600)))
+
+    def write(self, frames: List[Frame]):
+        # 一批帧合并为一次写入
+        self.fwd.send(frames[0].data if len(frames) == 1 else b"".join(f.data for f in frames))
+
+
+@register_sink("file")
+class FileSink(Sink):
+    """追加写入原始 RTCM 文件（每批 flush）。"""
+
+    def start(self):
+        self._f = open(self.cfg["path"], "ab")
+
+    def write(self, frames: List[Frame]):
+        self._f.write(b"".join(f.data for f in frames))
+        self._f.flush()
+
+    def stop(self):
+        f = getattr(self, "_f", None)
+        if f:
+            f.close()
+            self._f = None
+
+
+@register_sink("udp")
+class UdpSinkStage(Sink):
+    """按帧对齐的 UDP 单播/组播输出，参数见 rtk_lora/udp_sink.py。"""
+
+    def start(self):
+        from .udp_sink import UdpSink
+
+        c = self.cfg
+        self.sink = UdpSink(c["targets"], mtu=int(c.get("mtu", 1400)), ttl=int(c.get("ttl", 1)),
+                            interface=c.get("interface"), log=self.ctx.log)
+
+    def write(self, frames: List[Frame]):
+        self.sink.send_frames((f.msg_num, f.data) for f in frames)
+
+    def stop(self):
+        sink = getattr(self, "sink", None)
+        if sink:
+            sink.close()
+            self.sink = None
+
+
+@register_sink("ntrip_server")
+class NtripServerSink(Sink):
+    def start(self):
+        from .ntrip_server import NTRIPServer
+
+        c = self.cfg
+        self.server = NTRIPServer(
+            c["host"], int(c.get("port", 2101)), c["mountpoint"], c.get("password", ""),
+            username=c.get("username", ""), version=int(c.get("version", 1)), log=self.ctx.log,
+        )
+        self.server.start()
+
+    def write(self, frames: List[Frame]):
+        for f in frames:
+            self.server.push(f.data)
+
+    def stop(self):
+        server = getattr(self, "server", None)
+        if server:
+            server.stop()
+            self.server = None
+
+
+__all__ = [
+    "Frame",
+    "Pipeline",
+    "PipelineContext",
+    "Sink",
+    "Source",
+    "Stage",
+    "StageMetrics",
+    "SINKS",
+    "SOURCES",
+    "STAGES",
+    "build_pipeline",
+    "build_pipelines",
+    "register_sink",
+    "register_source",
+    "register_stage",
+]
@@ -0,0 +1,255 @@
+"""热路径性能剖析：阶段计时直方图 + 按需采样剖析。
+
+阶段计时（StageProfiler）：
+- 热路径写法：
+      t0 = PROFILER.t0()
+      ...  # 被测阶段
+      PROFILER.record("serial_write", t0)
+- 关闭时 t0() 返回 0（绑定为内建 int），record() 见到 0 立即返回，不读时钟、不加锁
+- 开启时按 log2(纳秒) 分桶累计，每阶段固定 64 个桶，内存恒定；
+  snapshot() 给出次数、均值、p50/p99（取桶上界）与最大值
+
+采样剖析（SamplingProfiler）：
+- 后台线程按固定间隔抓取各线程调用栈（sys._current_frames），运行 N 秒后停止
+- 输出 collapsed stacks（.folded/.txt，flamegraph.pl / speedscope 均可打开）
+  或 speedscope JSON（.speedscope.json）
+"""
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+LogCallback = Callable[[str], None]
+
+_BUCKETS = 64
+
+
+@dataclass(frozen=True)
+class StageStats:
+    stage: str
+    count: int
+    mean_us: float
+    p50_us: float
+    p99_us: float
+    max_us: float
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int):
+        self.buckets[min(ns.bit_length(), _BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile_ns(self, q: float) -> int:
+        target = q * self.count
+        acc = 0
+        for i, n in enumerate(self.buckets):
+            acc += n
+            if n and acc >= target:
+                # 桶 i 覆盖 [2^(i-1), 2^i)，取上界并以实测最大值封顶
+                return min((1 << i) - 1, self.max_ns)
+        return self.max_ns
+
+
+class StageProfiler:
+    def __init__(self, enabled: bool = False):
+        self._hists: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+        self.enabled = enabled
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, on: bool):
+        self._enabled = bool(on)
+        # t0 直接绑定 C 实现：开启为 perf_counter_ns，关闭为 int（返回 0），免去一层 Python 调用
+        self.t0: Callable[[], int] = time.perf_counter_ns if on else int
+
+    def record(self, stage: str, t0: int):
+        if not t0:
+            return
+        ns = time.perf_counter_ns() - t0
+        with self._lock:
+            h = self._hists.get(stage)
+            if h is None:
+                h = self._hists[stage] = _Histogram()
+            h.add(ns)
+
+    def snapshot(self) -> List[StageStats]:
+        with self._lock:
+            items = sorted(self._hists.items())
+            return [
+                StageStats(
+                    stage=name,
+                    count=h.count,
+                    mean_us=h.total_ns / h.count / 1000.0 if h.count else 0.0,
+                    p50_us=h.percentile_ns(0.5) / 1000.0,
+                    p99_us=h.percentile_ns(0.99) / 1000.0,
+                    max_us=h.max_ns / 1000.0,
+                )
+                for name, h in items
+            ]
+
+    def format(self) -> str:
+        rows = self.snapshot()
+        if not rows:
+            return "性能计时: 无数据"
+        lines = ["性能计时(us): 阶段 次数 均值 p50 p99 最大"]
+        for r in rows:
+            lines.append(f"  {r.stage} {r.count} {r.mean_us:.1f} {r.p50_us:.1f} {r.p99_us:.1f} {r.max_us:.1f}")
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+
+# 进程级默认实例：各模块直接引用，由 GUI 开关 enabled
+PROFILER = StageProfiler()
+
+
+def _frame_key(code) -> Tuple[str, str, int]:
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, log: Optional[LogCallback] = None):
+        self.interval = interval
+        self.log = log or (lambda m: None)
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_evt = threading.Event()
+        self.samples = 0
+        self.duration = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, output: Optional[str] = None,
+              on_done: Optional[Callable[[Optional[str]], None]] = None):
+        """开始采样 seconds 秒；给出 output 时结束后自动写文件（按扩展名选格式）。
+
+        on_done 总会在结束时调用：参数为写出的文件路径，未写出（失败或无 output）时为 None。
+        """
+        if self.running:
+            raise RuntimeError("采样已在进行中")
+        self._stacks.clear()
+        self.samples = 0
+        self._stop_evt.clear()
+
+        def run():
+            written = None
+            try:
+                self._sample_loop(seconds)
+                if output:
+                    self.write(output)
+                    written = output
+                    self.log(f"采样剖析已写入: {output} ({self.samples} 次采样)")
+            except Exception as e:  # noqa
+                self.log(f"采样剖析写入失败: {e}")
+            finally:
+                if on_done:
+                    on_done(written)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _sample_loop(self, seconds: float):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        start = time.perf_counter()
+        end = start + seconds
+        while not self._stop_evt.is_set() and time.perf_counter() < end:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                f = frame
+                while f is not None:
+                    stack.append(_frame_key(f.f_code))
+                    f = f.f_back
+                stack.reverse()
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self._stacks[(names.get(ident, str(ident)),) + tuple(stack)] += 1
+            self.samples += 1
+            self._stop_evt.wait(self.interval)
+        self.duration = time.perf_counter() - start
+
+    def collapsed(self) -> List[str]:
+        lines = []
+        for key, n in sorted(self._stacks.items(), key=lambda kv: -kv[1]):
+            thread, frames = key[0], key[1:]
+            parts = [thread] + [f"{name} ({os.path.basename(fn)}:{line})" for name, fn, line in frames]
+            lines.append(";".join(p.replace(";", ":") for p in parts) + f" {n}")
+        return lines
+
+    def speedscope(self) -> dict:
+        frames: List[dict] = []
+        index: Dict[tuple, int] = {}
+
+        def idx(key: tuple) -> int:
+            i = index.get(key)
+            if i is None:
+                i = index[key] = len(frames)
+                if len(key) == 1:
+                    frames.append({"name": f"[{key[0]}]"})
+                else:
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            return i
+
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for key, n in self._stacks.items():
+            samples.append([idx((key[0],))] + [idx(k) for k in key[1:]])
+            weights.append(n * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": "rtk_lora",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": "rtk_lora",
+            "exporter": "rtk_lora.profiling",
+        }
+
+    def write(self, path: str):
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.speedscope(), f)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(self.collapsed()) + "\n")
+
+
+__all__ = ["PROFILER", "SamplingProfiler", "StageProfiler", "StageStats"]
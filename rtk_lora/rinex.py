@@ -0,0 +1,383 @@
+"""RTCM MSM -> RINEX 3 观测文件流式转换（会话归档，用于事后处理）。
+
+功能点：
+- feed() 非阻塞：只把 MSM / 1005 / 1006 帧复制进有界队列，满则丢弃并计数，不拖慢转发
+- 1005/1006（头中的近似坐标）经 DecodeCache 解码，与 App 其它消费者共用同一缓存
+- 独立写线程：解码 MSM4~7，按历元（多消息标志=0 或历元时间变化）归并后写出，
+  每历元 flush 一次，进程异常退出最多丢失当前历元
+- 内存有界：队列、单历元消息数均有上限；锁定时间状态只按 (卫星, 信号) 保存
+- 文件按 GPS 时间整周期轮换（默认每小时），文件名采用 RINEX 3 长文件名
+- 观测码在首个历元确定并写入头；之后出现新观测码时提前轮换到新文件
+- LLI：锁定时间减小（失锁）置位 1，半周模糊置位 2；SSI 由载噪比换算
+- 周数由系统时钟推算（MSM 只含周内时间），取与当前时间最近的一周
+
+MSM1~3 不含整毫秒粗距离，无法得到完整伪距，跳过并计数。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, TextIO, Tuple
+
+from .decode_cache import DecodeCache
+from .rtcm_msm import (
+    CLIGHT,
+    GPS_EPOCH_UNIX,
+    MsmMessage,
+    SIGNAL_CODES,
+    WEEK_MS,
+    GPS_UTC_LEAP_MS,
+    carrier_frequency,
+    decode_msm,
+    is_msm,
+)
+
+LogCallback = Callable[[str], None]
+
+GPS_EPOCH = datetime(1980, 1, 6)
+_SYS_CHAR = {"GPS": "G", "GLONASS": "R", "Galileo": "E", "QZSS": "J", "BeiDou": "C"}
+_SYS_ORDER = "GREJC"
+_OBS_KINDS = "CLDS"
+_MAX_MSGS_PER_EPOCH = 64
+
+
+@dataclass
+class Observation:
+    pseudorange: Optional[float] = None
+    phase: Optional[float] = None  # 周
+    doppler: Optional[float] = None  # Hz
+    snr: Optional[float] = None  # dBHz
+    lli: int = 0
+
+    def values(self) -> Tuple[Optional[float], ...]:
+        return (self.pseudorange, self.phase, self.doppler, self.snr)
+
+
+@dataclass
+class ObsEpoch:
+    time: datetime  # GPS 时
+    # "G01" -> {"1C": Observation}
+    sats: Dict[str, Dict[str, Observation]] = field(default_factory=dict)
+    glonass_channels: Dict[str, int] = field(default_factory=dict)
+
+    def obs_types(self) -> Dict[str, Set[str]]:
+        out: Dict[str, Set[str]] = {}
+        for sat, obs in self.sats.items():
+            out.setdefault(sat[0], set()).update(obs)
+        return out
+
+
+def gps_time_from_tow(tow_ms: int, now_unix: float) -> datetime:
+    """周内毫秒 -> GPS 时（datetime），周数取与 now_unix 最近的一周。"""
+    now_ms = (now_unix - GPS_EPOCH_UNIX) * 1000.0 + GPS_UTC_LEAP_MS
+    week = int(now_ms // WEEK_MS)
+    t = week * WEEK_MS + tow_ms
+    if t - now_ms > WEEK_MS / 2:
+        t -= WEEK_MS
+    elif now_ms - t > WEEK_MS / 2:
+        t += WEEK_MS
+    return GPS_EPOCH + timedelta(milliseconds=t)
+
+
+def _ssi(snr: Optional[float]) -> int:
+    if snr is None:
+        return 0
+    return min(9, max(1, int(snr / 6)))
+
+
+class MsmObsAssembler:
+    """把 MSM 消息归并为 RINEX 历元，并换算为周/赫兹。"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._tow: Optional[int] = None
+        self._msgs: List[MsmMessage] = []
+        # (卫星, 观测码) -> 上一历元锁定时间 (ms)
+        self._lock: Dict[Tuple[str, str], int] = {}
+        self._glo_channels: Dict[str, int] = {}
+
+    def feed(self, msg: MsmMessage) -> List[ObsEpoch]:
+        done: List[ObsEpoch] = []
+        tow = msg.header.tow_ms
+        if self._tow is not None and tow != self._tow:
+            done.append(self._close())
+        self._tow = tow
+        if len(self._msgs) < _MAX_MSGS_PER_EPOCH:
+            self._msgs.append(msg)
+        if not msg.header.multiple_message:
+            done.append(self._close())
+        return done
+
+    def set_glonass_channel(self, slot: int, channel: int):
+        self._glo_channels[f"R{slot:02d}"] = channel
+
+    def _close(self) -> ObsEpoch:
+        tow = self._tow if self._tow is not None else 0
+        epoch = ObsEpoch(time=gps_time_from_tow(tow, self.clock()))
+        seen: Set[Tuple[str, str]] = set()
+        for msg in self._msgs:
+            hdr = msg.header
+            sys = _SYS_CHAR[hdr.constellation]
+            codes = SIGNAL_CODES[hdr.constellation]
+            for sat_id, ch in zip(hdr.satellites, msg.glonass_channels):
+                if ch is not None:
+                    self._glo_channels[f"{sys}{sat_id:02d}"] = ch
+            for s in msg.signals:
+                code = codes.get(s.signal)
+                if code is None:
+                    continue
+                sat = f"{sys}{s.satellite:02d}"
+                freq = carrier_frequency(hdr.constellation, code, self._glo_channels.get(sat))
+                obs = Observation(pseudorange=s.pseudorange_m, snr=s.cnr_dbhz)
+                if freq is not None:
+                    wavelength = CLIGHT / freq
+                    if s.phaserange_m is not None:
+                        obs.phase = s.phaserange_m / wavelength
+                    if s.phaserange_rate_m_s is not None:
+                        obs.doppler = -s.phaserange_rate_m_s / wavelength
+                key = (sat, code)
+                prev = self._lock.get(key)
+                if obs.phase is not None and prev is not None and s.lock_time_ms < prev:
+                    obs.lli |= 1
+                if s.half_cycle:
+                    obs.lli |= 2
+                self._lock[key] = s.lock_time_ms
+                seen.add(key)
+                epoch.sats.setdefault(sat, {})[code] = obs
+        # 本历元未出现的信号视为失锁，下次出现重新计锁定时间
+        for key in [k for k in self._lock if k not in seen]:
+            del self._lock[key]
+        epoch.glonass_channels = {k: v for k, v in self._glo_channels.items() if k in epoch.sats}
+        self._tow = None
+        self._msgs = []
+        return epoch
+
+    def flush(self) -> List[ObsEpoch]:
+        return [self._close()] if self._msgs else []
+
+
+def _period_tag(period_s: int) -> str:
+    if period_s % 86400 == 0:
+        return f"{period_s // 86400:02d}D"
+    if period_s % 3600 == 0:
+        return f"{period_s // 3600:02d}H"
+    return f"{max(1, period_s // 60):02d}M"
+
+
+def _header_line(content: str, label: str) -> str:
+    return f"{content:<60.60}{label:<20}\n"
+
+
+class RinexObsWriter:
+    """RINEX 3.04 观测文件写入器（同步），负责文件头、历元记录与轮换。"""
+
+    def __init__(self, directory: str, marker: str = "RTKL", period_s: int = 3600,
+                 interval_s: float = 1.0, log: Optional[LogCallback] = None):
+        self.directory = directory
+        self.marker = marker
+        self.period_s = period_s
+        self.interval_s = interval_s
+        self.log = log or (lambda m: None)
+        self.approx_xyz: Optional[Tuple[float, float, float]] = None
+        self._f: Optional[TextIO] = None
+        self._period: Optional[int] = None
+        self._types: Dict[str, List[str]] = {}
+        self.path: Optional[str] = None
+        self.files: List[str] = []
+        self.epochs_written = 0
+
+    def _filename(self, t: datetime) -> str:
+        name = f"{self.marker.upper()[:4]:0<4}00XXX"
+        stamp = f"{t.year:04d}{t.timetuple().tm_yday:03d}{t.hour:02d}{t.minute:02d}"
+        rate = f"{max(1, int(round(self.interval_s))):02d}S"
+        base = f"{name}_R_{stamp}_{_period_tag(self.period_s)}_{rate}_MO"
+        path = os.path.join(self.directory, base + ".rnx")
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{base}_{n}.rnx")
+            n += 1
+        return path
+
+    def _open(self, epoch: ObsEpoch, types: Dict[str, List[str]]):
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = self._filename(epoch.time)
+        self._f = open(self.path, "w", encoding="ascii", newline="\n")
+        self._types = types
+        self.files.append(self.path)
+        self._f.write(self._header(epoch, types))
+        self.log(f"RINEX 新文件: {self.path}")
+
+    def _header(self, epoch: ObsEpoch, types: Dict[str, List[str]]) -> str:
+        now = datetime.now(timezone.utc).strftime("%Y%m%d %H%M%S UTC")
+        systems = sorted(types, key=_SYS_ORDER.index)
+        sys_type = systems[0] if len(systems) == 1 else "M"
+        h = [
+            _header_line(f"{'3.04':>9}{'':11}{'OBSERVATION DATA':<20}{sys_type:<20}", "RINEX VERSION / TYPE"),
+            _header_line(f"{'rtk_lora':<20}{'RTK-LoRa':<20}{now:<20}", "PGM / RUN BY / DATE"),
+            _header_line(self.marker, "MARKER NAME"),
+            _header_line(f"{'unknown':<20}{'unknown':<40}", "OBSERVER / AGENCY"),
+            _header_line(f"{'unknown':<20}{'unknown':<20}{'unknown':<20}", "REC # / TYPE / VERS"),
+            _header_line(f"{'unknown':<20}{'unknown':<20}", "ANT # / TYPE"),
+        ]
+        x, y, z = self.approx_xyz or (0.0, 0.0, 0.0)
+        h.append(_header_line(f"{x:14.4f}{y:14.4f}{z:14.4f}", "APPROX POSITION XYZ"))
+        h.append(_header_line(f"{0.0:14.4f}{0.0:14.4f}{0.0:14.4f}", "ANTENNA: DELTA H/E/N"))
+        for sys in systems:
+            obs = types[sys]
+            for i in range(0, len(obs), 13):
+                lead = f"{sys}  {len(obs):3d}" if i == 0 else " " * 6
+                h.append(_header_line(lead + "".join(f" {o}" for o in obs[i:i + 13]), "SYS / # / OBS TYPES"))
+        h.append(_header_line(f"{self.interval_s:10.3f}", "INTERVAL"))
+        t = epoch.time
+        sec = t.second + t.microsecond / 1e6
+        h.append(_header_line(
+            f"{t.year:6d}{t.month:6d}{t.day:6d}{t.hour:6d}{t.minute:6d}{sec:13.7f}     GPS",
+            "TIME OF FIRST OBS"))
+        if "R" in types:
+            slots = sorted(epoch.glonass_channels.items())
+            for i in range(0, max(1, len(slots)), 8):
+                lead = f"{len(slots):3d} " if i == 0 else " " * 4
+                body = "".join(f"{sat} {ch:2d} " for sat, ch in slots[i:i + 8])
+                h.append(_header_line(lead + body, "GLONASS SLOT / FRQ #"))
+        h.append(_header_line("", "END OF HEADER"))
+        return "".join(h)
+
+    @staticmethod
+    def _types_for(epoch: ObsEpoch) -> Dict[str, List[str]]:
+        return {
+            sys: [k + code for code in sorted(codes) for k in _OBS_KINDS]
+            for sys, codes in epoch.obs_types().items()
+        }
+
+    def write_epoch(self, epoch: ObsEpoch):
+        if not epoch.sats:
+            return
+        period = int((epoch.time - GPS_EPOCH).total_seconds() // self.period_s)
+        needed = self._types_for(epoch)
+        new_codes = any(not set(v) <= set(self._types.get(k, ())) for k, v in needed.items())
+        if self._f is None or period != self._period or new_codes:
+            if self._f is not None and period == self._period:
+                # 同一周期内出现新观测码：与已有观测码合并后开新文件
+                for k, v in self._types.items():
+                    needed[k] = sorted(set(v) | set(needed.get(k, ())), key=lambda o: (o[1:], _OBS_KINDS.index(o[0])))
+            self._open(epoch, needed)
+            self._period = period
+        f = self._f
+        t = epoch.time
+        sec = t.second + t.microsecond / 1e6
+        sats = sorted(epoch.sats, key=lambda s: (_SYS_ORDER.index(s[0]), s))
+        lines = [f"> {t.year:4d} {t.month:02d} {t.day:02d} {t.hour:02d} {t.minute:02d}{sec:11.7f}  0{len(sats):3d}\n"]
+        for sat in sats:
+            obs = epoch.sats[sat]
+            parts = [sat]
+            for otype in self._types[sat[0]]:
+                o = obs.get(otype[1:])
+                val = o.values()[_OBS_KINDS.index(otype[0])] if o else None
+                if val is None:
+                    parts.append(" " * 16)
+                    continue
+                lli = str(o.lli) if (otype[0] == "L" and o.lli) else " "
+                ssi = _ssi(o.snr)
+                parts.append(f"{val:14.3f}{lli}{ssi if ssi else ' '}")
+            lines.append("".join(parts).rstrip() + "\n")
+        f.write("".join(lines))
+        f.flush()
+        self.epochs_written += 1
+
+    def close(self):
+        if self._f is not None:
+            try:
+                self._f.close()
+            finally:
+                self._f = None
+
+
+class RinexConverter:
+    """后台 RTCM -> RINEX 转换：feed() 只入队，解码与写文件在独立线程完成。"""
+
+    def __init__(self, writer: RinexObsWriter, max_queue: int = 2048,
+                 clock: Callable[[], float] = time.time,
+                 log: Optional[LogCallback] = None,
+                 decode_cache: Optional[DecodeCache] = None):
+        self.writer = writer
+        self.log = log or (lambda m: None)
+        self.decode_cache = decode_cache or DecodeCache()
+        self.assembler = MsmObsAssembler(clock=clock)
+        self._q: "queue.Queue[Optional[Tuple[int, bytes]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.frames_dropped = 0
+        self.frames_skipped = 0  # MSM1~3 或无法解码
+        self.errors = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.log("RINEX 转换线程启动")
+
+    def stop(self, timeout: float = 2.0):
+        if self._thread is None:
+            return
+        try:
+            self._q.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self.log("RINEX 转换已停止")
+
+    def feed(self, msg_num: int, frame) -> bool:
+        """放入一帧（可为 memoryview，会复制）；无关帧忽略，队列满返回 False。"""
+        if not (is_msm(msg_num) or msg_num == 1005 or msg_num == 1006):
+            return True
+        try:
+            self._q.put_nowait((msg_num, bytes(frame)))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def _handle(self, msg_num: int, frame: bytes):
+        payload = frame[3:-3]
+        if msg_num == 1005 or msg_num == 1006:
+            info = self.decode_cache.decode(msg_num, payload)
+            if info:
+                self.writer.approx_xyz = (info.ecef_x_m, info.ecef_y_m, info.ecef_z_m)
+            return
+        msg = decode_msm(payload)
+        if msg is None:
+            self.frames_skipped += 1
+            return
+        for epoch in self.assembler.feed(msg):
+            self.writer.write_epoch(epoch)
+
+    def _run(self):
+        try:
+            while True:
+                item = self._q.get()
+                if item is None:
+                    break
+                try:
+                    self._handle(*item)
+                except Exception as e:  # noqa
+                    self.errors += 1
+                    self.log(f"RINEX 转换异常(忽略): {e}")
+            for epoch in self.assembler.flush():
+                self.writer.write_epoch(epoch)
+        finally:
+            self.writer.close()
+
+
+__all__ = [
+    "MsmObsAssembler",
+    "ObsEpoch",
+    "Observation",
+    "RinexConverter",
+    "RinexObsWriter",
+    "gps_time_from_tow",
+]
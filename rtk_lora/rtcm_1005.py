@@ -1,7 +1,7 @@
-"""RTCM 1005 解析与坐标转换。
+"""RTCM 1005/1006 解析与坐标转换。
 
 说明：
-- 仅解析 1005 的 ECEF (X,Y,Z)，单位 0.0001m。
+- 仅解析 1005/1006 的 ECEF (X,Y,Z)，单位 0.0001m；1006 另含天线高（0.0001m）。
 - 不做 CRC 校验（由上层 RTCMParser 负责帧同步）。
 - 将 ECEF 转换为 WGS84 (lat, lon, alt) 供发送 GGA 使用。
 """
@@ -22,6 +22,7 @@ class Rtcm1005:
     lat_deg: float
     lon_deg: float
     alt_m: float
+    antenna_height_m: float = 0.0  # 仅 1006
 
 
 class _BitReader:
@@ -56,12 +57,21 @@ def parse_1005(payload: bytes) -> Optional[Rtcm1005]:
 
     返回：解析成功 -> Rtcm1005；否则 None。
     """
-    if len(payload) < 8:
+    return _parse_arp(payload, 1005)
+
+
+def parse_1006(payload: bytes) -> Optional[Rtcm1005]:
+    """解析 RTCM 1006 payload（1005 + 天线高），返回同一结构。"""
+    return _parse_arp(payload, 1006)
+
+
+def _parse_arp(payload: bytes, expected: int) -> Optional[Rtcm1005]:
+    if len(payload) < (19 if expected == 1005 else 21):
         return None
 
     br = _BitReader(payload)
     msg_num = br.read_uint(12)
-    if msg_num != 1005:
+    if msg_num != expected:
         return None
 
     ref_station_id = br.read_uint(12)
@@ -78,6 +88,7 @@ def parse_1005(payload: bytes) -> Optional[Rtcm1005]:
     y = br.read_int(38) * 0.0001
     _quarter_cycle = br.read_uint(2)
     z = br.read_int(38) * 0.0001
+    antenna_height = br.read_uint(16) * 0.0001 if expected == 1006 else 0.0
 
     lat, lon, alt = ecef_to_lla(x, y, z)
     return Rtcm1005(
@@ -88,6 +99,7 @@ def parse_1005(payload: bytes) -> Optional[Rtcm1005]:
         lat_deg=lat,
         lon_deg=lon,
         alt_m=alt,
+        antenna_height_m=antenna_height,
     )
 
 
@@ -128,4 +140,4 @@ def ecef_to_lla(x_m: float, y_m: float, z_m: float) -> tuple[float, float, float
     return math.degrees(lat), math.degrees(lon), alt
 
 
-__all__ = ["Rtcm1005", "parse_1005", "ecef_to_lla"]
+__all__ = ["Rtcm1005", "parse_1005", "parse_1006", "ecef_to_lla"]
@@ -0,0 +1,421 @@
+"""RTCM MSM1~7 消息头与掩码解码。
+
+说明：
+- 支持 GPS(107x) / GLONASS(108x) / Galileo(109x) / QZSS(111x) / BeiDou(112x)
+- 消息头：历元时间、多消息标志、IODS、卫星掩码、信号掩码、单元掩码
+- 掩码展开使用预计算的逐字节 popcount / 置位位置表，避免逐位循环
+- 历元时间统一换算为 GPS 周内毫秒 (tow_ms)，便于跨星座归并同一历元；
+  GLONASS 星期字段为 7（未知）时按当前 GPS 周内时刻取最近的一天
+- MSM4~7 观测数据：粗距离(DF397/398)、扩展信息、粗相位距离变化率(DF399)、
+  精伪距/精相位距离(DF400/401 或 DF405/406)、锁定时间(DF402/407)、半周(DF420)、
+  载噪比(DF403/408)、精相位距离变化率(DF404)，换算为米、米/秒、dBHz；
+  同一字段按卫星/单元成组存放，整组一次移位截取后再拆分
+- 信号号 -> RINEX 观测码与频率表（MSM1~3 无整毫秒粗距离，不做观测换算）
+
+MSM 头布局（位偏移）：
+0 消息号(12) 12 基站ID(12) 24 历元时间(30) 54 多消息标志(1) 55 IODS(3)
+58 保留(7) 65 钟差调整(2) 67 外部时钟(2) 69 平滑标志(1) 70 平滑区间(3)
+73 卫星掩码(64) 137 信号掩码(32) 169 单元掩码(Nsat*Nsig)
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+CLIGHT = 299792458.0
+
+CONSTELLATIONS: Dict[int, str] = {
+    107: "GPS",
+    108: "GLONASS",
+    109: "Galileo",
+    111: "QZSS",
+    112: "BeiDou",
+}
+
+WEEK_MS = 7 * 86400 * 1000
+DAY_MS = 86400 * 1000
+# GPS 与 UTC 的闰秒差（2017 年起为 18s）
+GPS_UTC_LEAP_MS = 18000
+# BDT = GPST - 14s
+BDT_OFFSET_MS = 14000
+# GPS 时起点 1980-01-06 的 Unix 时间
+GPS_EPOCH_UNIX = 315964800.0
+
+_HEADER_BITS = 169
+_HEADER_BYTES = 30  # 169 + 64 位单元掩码 向上取整
+
+# 预计算表：字节 -> 置位数 / 置位位置（高位在前，0..7）
+_POPCOUNT8 = bytes(bin(i).count("1") for i in range(256))
+_BITPOS8: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(j for j in range(8) if i & (0x80 >> j)) for i in range(256)
+)
+
+
+@dataclass(frozen=True)
+class MsmHeader:
+    msg_num: int
+    constellation: str
+    msm_type: int
+    station_id: int
+    epoch_time: int  # 原始历元时间字段（GLONASS 含星期）
+    tow_ms: int  # 换算到 GPS 周内毫秒
+    multiple_message: bool
+    iods: int
+    satellites: Tuple[int, ...]  # 卫星号（1 起）
+    signals: Tuple[int, ...]  # 信号号（1 起）
+    cell_mask: int
+    num_cells: int
+
+
+def is_msm(msg_num: int) -> bool:
+    return msg_num // 10 in CONSTELLATIONS and 1 <= msg_num % 10 <= 7
+
+
+def _mask_positions(mask: int, nbytes: int) -> Tuple[int, ...]:
+    out: List[int] = []
+    for k, b in enumerate(mask.to_bytes(nbytes, "big")):
+        if b:
+            base = k * 8 + 1
+            out.extend(base + p for p in _BITPOS8[b])
+    return tuple(out)
+
+
+def _popcount(mask: int, nbits: int) -> int:
+    return sum(_POPCOUNT8[b] for b in mask.to_bytes((nbits + 7) // 8, "big"))
+
+
+def gps_tow_now_ms(now_unix: Optional[float] = None) -> int:
+    """当前 GPS 周内毫秒（按系统时钟）。"""
+    if now_unix is None:
+        now_unix = time.time()
+    return int((now_unix - GPS_EPOCH_UNIX) * 1000.0 + GPS_UTC_LEAP_MS) % WEEK_MS
+
+
+def to_gps_tow_ms(constellation: str, epoch_time: int, ref_tow_ms: Optional[int] = None) -> int:
+    """历元时间字段 -> GPS 周内毫秒。
+
+    GLONASS 星期未知(7)时取与 ref_tow_ms（缺省为当前 GPS 周内时刻）最近的一天。
+    """
+    if constellation == "GLONASS":
+        dow = epoch_time >> 27
+        tod = epoch_time & 0x7FFFFFF
+        # GLONASS 时 = UTC + 3h
+        t = tod - 3 * 3600 * 1000 + GPS_UTC_LEAP_MS
+        if dow < 7:
+            t += dow * DAY_MS
+        else:
+            if ref_tow_ms is None:
+                ref_tow_ms = gps_tow_now_ms()
+            t += round((ref_tow_ms - t) / DAY_MS) * DAY_MS
+        return t % WEEK_MS
+    if constellation == "BeiDou":
+        return (epoch_time + BDT_OFFSET_MS) % WEEK_MS
+    return epoch_time
+
+
+def decode_msm_header(payload: bytes) -> Optional[MsmHeader]:
+    """解析 MSM payload（不含 D3 头与 CRC）的消息头，非 MSM 或长度不足返回 None。"""
+    if len(payload) < 22:
+        return None
+    msg_num = (payload[0] << 4) | (payload[1] >> 4)
+    constellation = CONSTELLATIONS.get(msg_num // 10)
+    msm_type = msg_num % 10
+    if constellation is None or not 1 <= msm_type <= 7:
+        return None
+    raw = payload[:_HEADER_BYTES]
+    total_bits = 8 * _HEADER_BYTES
+    v = int.from_bytes(raw, "big") << (8 * (_HEADER_BYTES - len(raw)))
+
+    def bits(off: int, n: int) -> int:
+        return (v >> (total_bits - off - n)) & ((1 << n) - 1)
+
+    sat_mask = bits(73, 64)
+    sig_mask = bits(137, 32)
+    sats = _mask_positions(sat_mask, 8)
+    sigs = _mask_positions(sig_mask, 4)
+    ncell_bits = len(sats) * len(sigs)
+    if ncell_bits > 64 or len(payload) * 8 < _HEADER_BITS + ncell_bits:
+        return None
+    cell_mask = bits(_HEADER_BITS, ncell_bits) if ncell_bits else 0
+    epoch_time = bits(24, 30)
+    return MsmHeader(
+        msg_num=msg_num,
+        constellation=constellation,
+        msm_type=msm_type,
+        station_id=bits(12, 12),
+        epoch_time=epoch_time,
+        tow_ms=to_gps_tow_ms(constellation, epoch_time),
+        multiple_message=bool(bits(54, 1)),
+        iods=bits(55, 3),
+        satellites=sats,
+        signals=sigs,
+        cell_mask=cell_mask,
+        num_cells=_popcount(cell_mask, ncell_bits) if ncell_bits else 0,
+    )
+
+
+# RTCM 信号号 -> RINEX 3 观测码（频段 + 跟踪模式），RTCM 10403.3 表 3.5-91 等
+SIGNAL_CODES: Dict[str, Dict[int, str]] = {
+    "GPS": {2: "1C", 3: "1P", 4: "1W", 8: "2C", 9: "2P", 10: "2W", 15: "2S", 16: "2L",
+            17: "2X", 22: "5I", 23: "5Q", 24: "5X", 30: "1S", 31: "1L", 32: "1X"},
+    "GLONASS": {2: "1C", 3: "1P", 8: "2C", 9: "2P"},
+    "Galileo": {2: "1C", 3: "1A", 4: "1B", 5: "1X", 6: "1Z", 8: "6C", 9: "6A", 10: "6B",
+                11: "6X", 12: "6Z", 14: "7I", 15: "7Q", 16: "7X", 18: "8I", 19: "8Q",
+                20: "8X", 22: "5I", 23: "5Q", 24: "5X"},
+    "QZSS": {2: "1C", 9: "6S", 10: "6L", 11: "6X", 15: "2S", 16: "2L", 17: "2X",
+             22: "5I", 23: "5Q", 24: "5X", 30: "1S", 31: "1L", 32: "1X"},
+    "BeiDou": {2: "2I", 3: "2Q", 4: "2X", 8: "6I", 9: "6Q", 10: "6X", 14: "7I", 15: "7Q",
+               16: "7X", 22: "5D", 23: "5P", 24: "5X", 25: "7D", 30: "1D", 31: "1P", 32: "1X"},
+}
+
+# 频段 -> 载波频率 (Hz)；GLONASS FDMA 另按频道号计算
+_FREQ_HZ: Dict[str, Dict[str, float]] = {
+    "GPS": {"1": 1575.42e6, "2": 1227.60e6, "5": 1176.45e6},
+    "Galileo": {"1": 1575.42e6, "5": 1176.45e6, "7": 1207.14e6, "8": 1191.795e6, "6": 1278.75e6},
+    "QZSS": {"1": 1575.42e6, "2": 1227.60e6, "5": 1176.45e6, "6": 1278.75e6},
+    "BeiDou": {"2": 1561.098e6, "1": 1575.42e6, "5": 1176.45e6, "6": 1268.52e6,
+               "7": 1207.14e6, "8": 1191.795e6},
+}
+
+
+def carrier_frequency(constellation: str, code: str, glonass_channel: Optional[int] = None) -> Optional[float]:
+    """观测码对应的载波频率 (Hz)；GLONASS 频道未知时返回 None。"""
+    band = code[:1]
+    if constellation == "GLONASS":
+        if glonass_channel is None:
+            return None
+        if band == "1":
+            return 1602.0e6 + glonass_channel * 0.5625e6
+        if band == "2":
+            return 1246.0e6 + glonass_channel * 0.4375e6
+        return None
+    return _FREQ_HZ.get(constellation, {}).get(band)
+
+
+# DF402 锁定时间指示 -> 最小锁定时间 (ms)
+_LOCK_TIME_4 = (0, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768,
+                65536, 131072, 262144, 524288)
+
+
+def lock_time_ms(indicator: int, extended: bool) -> int:
+    """DF402（4 位）或 DF407（10 位，extended=True）换算为最小锁定时间 (ms)。"""
+    if not extended:
+        return _LOCK_TIME_4[indicator & 0x0F]
+    if indicator < 64:
+        return indicator
+    if indicator >= 704:
+        return 67108864
+    k = indicator // 32 - 1
+    return (1 << k) * (indicator - 32 * k)
+
+
+@dataclass(frozen=True)
+class MsmSignal:
+    satellite: int
+    signal: int
+    pseudorange_m: Optional[float]
+    phaserange_m: Optional[float]
+    phaserange_rate_m_s: Optional[float]  # 仅 MSM5/7
+    cnr_dbhz: Optional[float]
+    lock_time_ms: int
+    half_cycle: bool
+
+
+@dataclass(frozen=True)
+class MsmMessage:
+    header: MsmHeader
+    # 与 header.satellites 对齐；仅 MSM5/7 的 GLONASS 有频道号，其余为 None
+    glonass_channels: Tuple[Optional[int], ...]
+    signals: Tuple[MsmSignal, ...]
+
+
+# 每种 MSM 的卫星字段 / 信号字段位宽（按出现顺序）
+_SAT_FIELDS = {
+    4: (("rough_ms", 8), ("rough_mod", 10)),
+    5: (("rough_ms", 8), ("ext", 4), ("rough_mod", 10), ("rate", 14)),
+    6: (("rough_ms", 8), ("rough_mod", 10)),
+    7: (("rough_ms", 8), ("ext", 4), ("rough_mod", 10), ("rate", 14)),
+}
+_SIG_FIELDS = {
+    4: (("pr", 15), ("cp", 22), ("lock", 4), ("half", 1), ("cnr", 6)),
+    5: (("pr", 15), ("cp", 22), ("lock", 4), ("half", 1), ("cnr", 6), ("rate", 15)),
+    6: (("pr", 20), ("cp", 24), ("lock", 10), ("half", 1), ("cnr", 10)),
+    7: (("pr", 20), ("cp", 24), ("lock", 10), ("half", 1), ("cnr", 10), ("rate", 15)),
+}
+# 精伪距 / 精相位距离 / 载噪比的比例因子
+_SIG_SCALE = {
+    4: (2.0 ** -24, 2.0 ** -29, 1.0),
+    5: (2.0 ** -24, 2.0 ** -29, 1.0),
+    6: (2.0 ** -29, 2.0 ** -31, 2.0 ** -4),
+    7: (2.0 ** -29, 2.0 ** -31, 2.0 ** -4),
+}
+_SIGNED = frozenset({"rate", "pr", "cp"})
+_MS_TO_M = CLIGHT / 1000.0
+
+
+def _split(chunk: int, count: int, width: int, signed: bool) -> List[int]:
+    mask = (1 << width) - 1
+    sign = 1 << (width - 1)
+    out = [(chunk >> (width * (count - 1 - i))) & mask for i in range(count)]
+    if signed:
+        out = [x - (1 << width) if x & sign else x for x in out]
+    return out
+
+
+def decode_msm(payload: bytes) -> Optional[MsmMessage]:
+    """解析 MSM4~7 的完整观测数据；MSM1~3、非 MSM 或长度不足返回 None。"""
+    hdr = decode_msm_header(payload)
+    if hdr is None or hdr.msm_type < 4:
+        return None
+    t = hdr.msm_type
+    nsat = len(hdr.satellites)
+    nsig = len(hdr.signals)
+    ncell = hdr.num_cells
+    sat_bits = sum(w for _n, w in _SAT_FIELDS[t]) * nsat
+    sig_bits = sum(w for _n, w in _SIG_FIELDS[t]) * ncell
+    start = _HEADER_BITS + nsat * nsig
+    total = len(payload) * 8
+    if total < start + sat_bits + sig_bits:
+        return None
+    v = int.from_bytes(payload, "big")
+    off = start
+
+    def group(count: int, width: int, signed: bool) -> List[int]:
+        nonlocal off
+        n = count * width
+        chunk = (v >> (total - off - n)) & ((1 << n) - 1) if n else 0
+        off += n
+        return _split(chunk, count, width, signed) if count else []
+
+    sat = {name: group(nsat, w, name in _SIGNED) for name, w in _SAT_FIELDS[t]}
+    sig = {name: group(ncell, w, name in _SIGNED) for name, w in _SIG_FIELDS[t]}
+
+    rough: List[Optional[float]] = []
+    for ms, mod in zip(sat["rough_ms"], sat["rough_mod"]):
+        rough.append(None if ms == 255 else ms + mod / 1024.0)
+    rough_rate: List[Optional[float]] = [None] * nsat
+    if "rate" in sat:
+        rough_rate = [None if r == -8192 else float(r) for r in sat["rate"]]
+    channels: List[Optional[int]] = [None] * nsat
+    if "ext" in sat and hdr.constellation == "GLONASS":
+        channels = [e - 7 if e <= 13 else None for e in sat["ext"]]
+
+    pr_scale, cp_scale, cnr_scale = _SIG_SCALE[t]
+    pr_invalid = -(1 << (_SIG_FIELDS[t][0][1] - 1))
+    cp_invalid = -(1 << (_SIG_FIELDS[t][1][1] - 1))
+    extended = t >= 6
+    fine_rate = sig.get("rate")
+    signals: List[MsmSignal] = []
+    cell_bits = nsat * nsig
+    k = 0
+    for i, sat_id in enumerate(hdr.satellites):
+        r = rough[i]
+        for j, sig_id in enumerate(hdr.signals):
+            if not (hdr.cell_mask >> (cell_bits - 1 - (i * nsig + j))) & 1:
+                continue
+            pr = sig["pr"][k]
+            cp = sig["cp"][k]
+            cnr = sig["cnr"][k]
+            rate = None
+            if fine_rate is not None and rough_rate[i] is not None and fine_rate[k] != -16384:
+                rate = rough_rate[i] + fine_rate[k] * 0.0001
+            signals.append(MsmSignal(
+                satellite=sat_id,
+                signal=sig_id,
+                pseudorange_m=None if r is None or pr == pr_invalid else (r + pr * pr_scale) * _MS_TO_M,
+                phaserange_m=None if r is None or cp == cp_invalid else (r + cp * cp_scale) * _MS_TO_M,
+                phaserange_rate_m_s=rate,
+                cnr_dbhz=cnr * cnr_scale if cnr else None,
+                lock_time_ms=lock_time_ms(sig["lock"][k], extended),
+                half_cycle=bool(sig["half"][k]),
+            ))
+            k += 1
+    return MsmMessage(header=hdr, glonass_channels=tuple(channels), signals=tuple(signals))
+
+
+@dataclass(frozen=True)
+class ConstellationCount:
+    satellites: int
+    signals: int
+    cells: int
+
+
+@dataclass(frozen=True)
+class MsmEpoch:
+    tow_ms: int
+    station_id: int
+    counts: Tuple[Tuple[str, ConstellationCount], ...]
+    complete: bool  # 以多消息标志=0 正常结束；False 表示因历元切换被动结束
+
+    def as_dict(self) -> Dict[str, ConstellationCount]:
+        return dict(self.counts)
+
+    @property
+    def total_satellites(self) -> int:
+        return sum(c.satellites for _n, c in self.counts)
+
+
+class MsmEpochTracker:
+    """把连续的 MSM 消息头归并为历元，输出每历元各星座的卫星/信号/观测数。
+
+    结束条件：多消息标志为 0，或历元时间变化（上一历元缺少结束消息）。
+    """
+
+    def __init__(self, on_epoch: Optional[Callable[[MsmEpoch], None]] = None):
+        self.on_epoch = on_epoch
+        self.last_epoch: Optional[MsmEpoch] = None
+        self._tow: Optional[int] = None
+        self._station = 0
+        # 星座 -> (卫星集合, 信号集合, 单元数)
+        self._acc: Dict[str, Tuple[set, set, int]] = {}
+
+    def feed(self, header: MsmHeader) -> List[MsmEpoch]:
+        done: List[MsmEpoch] = []
+        if self._tow is not None and header.tow_ms != self._tow:
+            done.append(self._close(complete=False))
+        if self._tow is None:
+            self._tow = header.tow_ms
+            self._station = header.station_id
+        sats, sigs, cells = self._acc.get(header.constellation, (set(), set(), 0))
+        sats.update(header.satellites)
+        sigs.update(header.signals)
+        self._acc[header.constellation] = (sats, sigs, cells + header.num_cells)
+        if not header.multiple_message:
+            done.append(self._close(complete=True))
+        return done
+
+    def _close(self, complete: bool) -> MsmEpoch:
+        epoch = MsmEpoch(
+            tow_ms=self._tow if self._tow is not None else 0,
+            station_id=self._station,
+            counts=tuple(
+                (name, ConstellationCount(len(s), len(g), c))
+                for name, (s, g, c) in self._acc.items()
+            ),
+            complete=complete,
+        )
+        self._tow = None
+        self._acc = {}
+        self.last_epoch = epoch
+        if self.on_epoch:
+            self.on_epoch(epoch)
+        return epoch
+
+
+__all__ = [
+    "CLIGHT",
+    "SIGNAL_CODES",
+    "MsmHeader",
+    "MsmMessage",
+    "MsmSignal",
+    "MsmEpoch",
+    "MsmEpochTracker",
+    "ConstellationCount",
+    "carrier_frequency",
+    "decode_msm",
+    "decode_msm_header",
+    "is_msm",
+    "lock_time_ms",
+    "gps_tow_now_ms",
+    "to_gps_tow_ms",
+]
@@ -9,7 +9,8 @@ RTCM3 帧格式（简化）：
 我们只做：
 - 按 D3 帧同步
 - 读取长度，拿到 payload 前2字节，从中提取 12bit 的 message number
-- 不做 CRC 校验（仅用于日志统计）
+- 默认不做 CRC 校验（仅用于日志统计）；verify_crc=True 时校验 CRC24Q，
+  校验失败的帧丢弃并从下一字节重新同步（用于需要转发/上传的场景）
 - 以流式状态机方式处理分包
 
 参考：RTCM 10403.x
@@ -19,10 +20,46 @@ from typing import Dict, List, Tuple
 
 D3 = 0xD3
 
+_CRC24Q_POLY = 0x1864CFB
+
+
+def _make_crc24q_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= _CRC24Q_POLY
+        table.append(crc & 0xFFFFFF)
+    return table
+
+
+_CRC24Q_TABLE = _make_crc24q_table()
+
+
+def crc24q(data) -> int:
+    crc = 0
+    table = _CRC24Q_TABLE
+    for b in data:
+        crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ b]
+    return crc
+
+
+def check_frame_crc(frame) -> bool:
+    """校验完整帧（D3 头 + payload + CRC）的 CRC24Q。"""
+    if len(frame) < 6:
+        return False
+    crc = (frame[-3] << 16) | (frame[-2] << 8) | frame[-1]
+    return crc24q(frame[:-3]) == crc
+
+
 class RTCMParser:
-    def __init__(self):
+    def __init__(self, verify_crc: bool = False):
         self.buf = bytearray()
         self.stats: Dict[int, int] = {}
+        self.verify_crc = verify_crc
+        self.crc_errors = 0
 
     def feed(self, data: bytes) -> List[int]:
         """喂入数据，返回本次解析出的消息号列表。"""
@@ -34,6 +71,10 @@ class RTCMParser:
 
     def feed_messages(self, data: bytes) -> List[Tuple[int, bytes]]:
         """喂入数据，返回 (msg_num, payload) 列表。"""
+        return [(msg_num, frame[3:-3]) for msg_num, frame in self.feed_frames(data)]
+
+    def feed_frames(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """喂入数据，返回 (msg_num, 完整帧) 列表（含 D3 头与 CRC，可原样转发）。"""
         self.buf.extend(data)
         found: List[Tuple[int, bytes]] = []
         while True:
@@ -55,10 +96,15 @@ class RTCMParser:
             total = 3 + length + 3  # 头(3) + payload(length) + CRC(3)
             if len(self.buf) < total:
                 break
-            payload = bytes(self.buf[3:3 + length])
-            msg_num = self._get_msg_num(payload)
+            frame = bytes(self.buf[:total])
+            if self.verify_crc and not check_frame_crc(frame):
+                # 伪帧头或传输损坏：只跳过当前 D3，继续搜索下一个帧头
+                self.crc_errors += 1
+                del self.buf[0]
+                continue
+            msg_num = self._get_msg_num(frame[3:5])
             if msg_num is not None:
-                found.append((msg_num, payload))
+                found.append((msg_num, frame))
             # 丢弃一帧
             del self.buf[:total]
         return found
@@ -84,4 +130,4 @@ class RTCMParser:
     def reset_stats(self):
         self.stats.clear()
 
-__all__ = ["RTCMParser"]
+__all__ = ["RTCMParser", "crc24q", "check_frame_crc"]
@@ -1,15 +1,42 @@
 """串口转发模块：负责打开串口并写入 RTCM 二进制数据。
 
 注意：LoRa 模块需设置为透明传输模式。过高的数据速率可能导致丢包。
+
+热插拔恢复：
+- 打开时记录设备身份（VID/PID/序列号），读写异常或设备从端口列表消失即判定丢失；
+  枚举端口列表要遍历全部设备（SetupAPI/sysfs），接收线程空闲时才按
+  presence_check_interval（默认 5s）检查一次，大多数拔出由读写异常直接发现
+- 丢失期间 send 不再抛异常，数据按 RTCM 帧切分后写入有界缓冲：
+  超出 buffer_limit 或早于 buffer_max_age 秒的帧从最旧一端整帧丢弃
+  （过期改正数对流动站无用，只会占满低速电台链路）
+- 后台按身份匹配重新出现的设备（COM 号/设备名可能变化）并重新打开，
+  恢复后补发缓冲数据，记录中断时长，并通过 on_reopen 通知上层
+
+暖启动：
+- 提供 warm_start（返回帧列表）时，每次打开/恢复后先按 warm_start_rate
+  逐帧限速发送这些帧，期间实时数据进入缓冲，发送完毕后再补发，保证帧不交错；
+  恢复/暖启动结束到补发写完之间始终处于缓冲状态，补发与实时发送共用同一把锁写串口
+- 暖启动实际发出了缓存帧时，中断期间的旧缓冲直接丢弃，只补发暖启动期间缓冲的数据，
+  避免在最新快照之后再发更早的改正数（时间倒序）
 """
 from __future__ import annotations
+from collections import deque
 import serial  # type: ignore
 import threading
 import time
-from typing import Optional, Callable
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+from .rtcm_parser import RTCMParser
 
 LogCallback = Callable[[str], None]
 RxCallback = Callable[[bytes], None]
+PortLister = Callable[[], List[Any]]
+DeviceIdentity = Tuple[Optional[int], Optional[int], Optional[str]]
+
+
+def _default_port_lister() -> List[Any]:
+    import serial.tools.list_ports  # type: ignore
+    return list(serial.tools.list_ports.comports())
 
 
 class SerialForwarder:
@@ -21,6 +48,15 @@ class SerialForwarder:
         on_rx: Optional[RxCallback] = None,
         rx_read_size: int = 4096,
         rx_poll_interval: float = 0.02,
+        serial_factory: Optional[Callable[..., Any]] = None,
+        port_lister: Optional[PortLister] = None,
+        reopen_interval: float = 0.5,
+        presence_check_interval: float = 5.0,
+        buffer_limit: int = 64 * 1024,
+        buffer_max_age: float = 3.0,
+        on_reopen: Optional[Callable[[], None]] = None,
+        warm_start: Optional[Callable[[], List[bytes]]] = None,
+        warm_start_rate: float = 1000.0,
     ):
         self.port = port
         self.baudrate = baudrate
@@ -28,38 +64,177 @@ class SerialForwarder:
         self.on_rx = on_rx
         self.rx_read_size = rx_read_size
         self.rx_poll_interval = rx_poll_interval
+        self.serial_factory = serial_factory or serial.Serial
+        self.port_lister = port_lister or _default_port_lister
+        self.reopen_interval = reopen_interval
+        self.presence_check_interval = presence_check_interval
+        self.buffer_limit = buffer_limit
+        self.buffer_max_age = buffer_max_age
+        self.on_reopen = on_reopen
         self._ser: Optional[serial.Serial] = None
         self._lock = threading.Lock()
         self.bytes_sent = 0
         self.bytes_received = 0
         self._rx_stop_evt = threading.Event()
         self._rx_thread: Optional[threading.Thread] = None
+        # 热插拔状态
+        self.identity: Optional[DeviceIdentity] = None
+        self._lost_since: Optional[float] = None
+        # 中断/暖启动期间缓冲的完整帧 (缓冲时刻, 帧)；未成帧的尾部留在 _framer 中
+        self._pending: Deque[Tuple[float, bytes]] = deque()
+        self._pending_bytes = 0
+        self._framer = RTCMParser(verify_crc=True)
+        # 暖启动开始时 _pending 中属于中断期间的帧数（位于队首）
+        self._stale_frames = 0
+        self._reopen_thread: Optional[threading.Thread] = None
+        self.outages = 0
+        self.last_outage_s: Optional[float] = None
+        self.bytes_dropped = 0
+        self.warm_start = warm_start
+        self.warm_start_rate = warm_start_rate
+        self._priming = False
+        self._prime_thread: Optional[threading.Thread] = None
+        self.warm_start_bytes = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._lost_since is None and self._ser is not None
+
+    def outage_elapsed(self) -> float:
+        """当前中断已持续的秒数（未中断时为 0）。"""
+        lost = self._lost_since
+        return time.monotonic() - lost if lost is not None else 0.0
 
     def open(self):
         if self._ser and self._ser.is_open:
             return
+        self._rx_stop_evt.clear()
         # timeout 用于接收线程，避免忙等；写入不受影响
-        self._ser = serial.Serial(self.port, self.baudrate, timeout=0.2)
+        self._ser = self.serial_factory(self.port, self.baudrate, timeout=0.2)
         self.log(f"串口打开: {self.port} @ {self.baudrate}")
+        self.identity = self._lookup_identity(self.port)
 
         if self.on_rx:
             self._start_rx_thread()
+        self._begin_prime()
+
+    def _begin_prime(self):
+        """启动暖启动突发；无暖启动时直接补发缓冲。"""
+        if self.warm_start is None:
+            self._flush_pending()
+            return
+        with self._lock:
+            self._priming = True
+            self._stale_frames = len(self._pending)
+        self._prime_thread = threading.Thread(target=self._prime_worker, daemon=True)
+        self._prime_thread.start()
+
+    def _prime_worker(self):
+        sent = 0
+        try:
+            frames = self.warm_start() if self.warm_start else []
+            for f in frames:
+                if self._rx_stop_evt.is_set():
+                    break
+                with self._lock:
+                    ser = self._ser
+                    if ser is None or self._lost_since is not None:
+                        break
+                    try:
+                        n = ser.write(f)
+                    except (serial.SerialException, OSError):
+                        break
+                    self.bytes_sent += n
+                    sent += n
+                # 按帧限速，避免一次性灌满 LoRa 模块缓冲
+                if self.warm_start_rate > 0:
+                    self._rx_stop_evt.wait(len(f) / self.warm_start_rate)
+        except Exception as e:  # noqa
+            self.log(f"暖启动发送异常: {e}")
+        finally:
+            self.warm_start_bytes += sent
+            stale = 0
+            with self._lock:
+                if sent:
+                    while self._stale_frames and self._pending:
+                        _t, f = self._pending.popleft()
+                        self._pending_bytes -= len(f)
+                        self.bytes_dropped += len(f)
+                        self._stale_frames -= 1
+                        stale += 1
+                self._stale_frames = 0
+            if sent:
+                note = f"，丢弃中断期间旧数据 {stale} 帧" if stale else ""
+                self.log(f"暖启动: 已发送 {sent} 字节缓存数据{note}")
+            self._flush_pending()
+
+    def _flush_pending(self):
+        """补发缓冲并解除缓冲状态；整个过程持有 _lock，实时数据只能排在补发数据之后。"""
+        frames = 0
+        pending = b""
+        lost = None
+        with self._lock:
+            if self._ser is not None and self._lost_since is None:
+                self._trim_pending(time.monotonic())
+                # 末尾未成帧的部分与随后的实时数据相连，一并发出
+                tail = bytes(self._framer.buf)
+                self._framer.buf.clear()
+                frames = len(self._pending)
+                pending = b"".join(f for _t, f in self._pending) + tail
+                self._pending.clear()
+                self._pending_bytes = 0
+                if pending:
+                    lost = self._write_locked(pending)
+            self._priming = False
+        if frames:
+            self.log(f"补发缓冲数据: {frames} 帧 {len(pending)} 字节")
+        if lost is not None:
+            self._device_lost(lost)
+
+    def _lookup_identity(self, device: str) -> Optional[DeviceIdentity]:
+        try:
+            for p in self.port_lister():
+                if p.device == device:
+                    ident = (getattr(p, "vid", None), getattr(p, "pid", None),
+                             getattr(p, "serial_number", None))
+                    return ident if any(ident) else None
+        except Exception:  # noqa
+            pass
+        return None
+
+    def _find_device(self) -> Optional[str]:
+        """在当前端口列表中查找与原设备身份一致的端口名。"""
+        ports = self.port_lister()
+        if self.identity is None:
+            # 无 USB 身份（虚拟串口等）：只能按原端口名等待其重新出现
+            return self.port if any(p.device == self.port for p in ports) else None
+        for p in ports:
+            ident = (getattr(p, "vid", None), getattr(p, "pid", None),
+                     getattr(p, "serial_number", None))
+            if ident == self.identity:
+                return p.device
+        return None
 
     def _start_rx_thread(self):
         if self._rx_thread and self._rx_thread.is_alive():
             return
-        self._rx_stop_evt.clear()
         self._rx_thread = threading.Thread(target=self._rx_loop, daemon=True)
         self._rx_thread.start()
 
     def _rx_loop(self):
+        last_check = time.monotonic()
         while not self._rx_stop_evt.is_set():
             ser = self._ser
-            if not ser or not ser.is_open:
+            if not ser or not ser.is_open or self._lost_since is not None:
                 break
             try:
                 n_waiting = getattr(ser, "in_waiting", 0) or 0
                 if n_waiting <= 0:
+                    now = time.monotonic()
+                    if self.identity and now - last_check >= self.presence_check_interval:
+                        last_check = now
+                        if self._find_device() is None:
+                            raise serial.SerialException("设备已从端口列表中消失")
                     time.sleep(self.rx_poll_interval)
                     continue
                 data = ser.read(min(self.rx_read_size, n_waiting))
@@ -68,15 +243,80 @@ class SerialForwarder:
                 self.bytes_received += len(data)
                 if self.on_rx:
                     self.on_rx(data)
+            except (serial.SerialException, OSError) as e:
+                self._device_lost(e)
+                break
             except Exception as e:  # noqa
                 self.log(f"串口接收异常(忽略): {e}")
                 time.sleep(0.2)
 
+    def _device_lost(self, err: Exception):
+        with self._lock:
+            if self._lost_since is not None or self._rx_stop_evt.is_set():
+                return
+            self._lost_since = time.monotonic()
+            ser, self._ser = self._ser, None
+        self.log(f"串口设备丢失: {self.port} ({err})，等待重新插入...")
+        try:
+            if ser:
+                ser.close()
+        except Exception:  # noqa
+            pass
+        self._reopen_thread = threading.Thread(target=self._reopen_loop, daemon=True)
+        self._reopen_thread.start()
+
+    def _reopen_loop(self):
+        while not self._rx_stop_evt.wait(self.reopen_interval):
+            try:
+                device = self._find_device()
+                if device is None:
+                    continue
+                ser = self.serial_factory(device, self.baudrate, timeout=0.2)
+            except Exception:  # noqa
+                continue
+            with self._lock:
+                if self._rx_stop_evt.is_set():
+                    ser.close()
+                    return
+                lost_since = self._lost_since or time.monotonic()
+                self.last_outage_s = time.monotonic() - lost_since
+                self.outages += 1
+                self.port = device
+                self._ser = ser
+                self._lost_since = None
+                # 补发完成前实时数据继续缓冲，避免插到中断期间的数据之前
+                self._priming = True
+            self.log(f"串口恢复: {device}，中断 {self.last_outage_s:.1f}s")
+            if self.on_rx:
+                old = self._rx_thread
+                if old and old is not threading.current_thread():
+                    old.join(timeout=1.0)
+                self._start_rx_thread()
+            if self.on_reopen:
+                try:
+                    self.on_reopen()
+                except Exception as e:  # noqa
+                    self.log(f"串口恢复回调异常: {e}")
+            self._begin_prime()
+            return
+
     def close(self):
         self._rx_stop_evt.set()
         if self._rx_thread:
             self._rx_thread.join(timeout=1.0)
             self._rx_thread = None
+        if self._reopen_thread:
+            self._reopen_thread.join(timeout=1.0)
+            self._reopen_thread = None
+        if self._prime_thread:
+            self._prime_thread.join(timeout=1.0)
+            self._prime_thread = None
+        with self._lock:
+            self._lost_since = None
+            self._priming = False
+            self._pending.clear()
+            self._pending_bytes = 0
+            self._framer.buf.clear()
         if self._ser:
             try:
                 self._ser.close()
@@ -85,15 +325,46 @@ class SerialForwarder:
             self._ser = None
             self.log("串口已关闭")
 
+    def _buffer(self, data: bytes):
+        now = time.monotonic()
+        for _msg_num, f in self._framer.feed_frames(data):
+            self._pending.append((now, f))
+            self._pending_bytes += len(f)
+        self._trim_pending(now)
+
+    def _trim_pending(self, now: float):
+        """整帧丢弃超出容量或过期的最旧缓冲（调用方持有 _lock）。"""
+        pending = self._pending
+        oldest = now - self.buffer_max_age
+        while pending and (self._pending_bytes > self.buffer_limit or pending[0][0] < oldest):
+            _t, f = pending.popleft()
+            self._pending_bytes -= len(f)
+            self.bytes_dropped += len(f)
+            if self._stale_frames:
+                self._stale_frames -= 1
+
+    def _write_locked(self, data: bytes) -> Optional[Exception]:
+        """写串口（调用方持有 _lock）；设备异常时数据转入缓冲并返回异常。"""
+        try:
+            n = self._ser.write(data)
+            self.bytes_sent += n
+        except (serial.SerialException, OSError) as e:
+            self._buffer(data)
+            return e
+        except Exception as e:  # noqa
+            self.log(f"串口发送失败: {e}")
+            raise
+        return None
+
     def send(self, data: bytes):
         with self._lock:
+            if self._lost_since is not None or self._priming:
+                self._buffer(data)
+                return
             if not self._ser or not self._ser.is_open:
                 raise RuntimeError("串口未打开")
-            try:
-                n = self._ser.write(data)
-                self.bytes_sent += n
-            except Exception as e:  # noqa
-                self.log(f"串口发送失败: {e}")
-                raise
+            lost = self._write_locked(data)
+        if lost is not None:
+            self._device_lost(lost)
 
 __all__ = ["SerialForwarder"]
@@ -0,0 +1,589 @@
+"""可插拔 RTCM 输入源：TCP 客户端/服务端、UDP 与附加串口，共用一个事件循环。
+
+功能点：
+- SourceLoop：单线程 selectors 事件循环 + 定时器，所有输入源的 I/O 都在该线程完成，
+  数据在循环线程内直接回调给处理函数，没有逐包的线程切换/队列
+- 每个输入源带 role：
+  - "base"：本地基站数据，与串口 RX 走同一逻辑（App._on_serial_rx：基站在线判定、1005、上传）
+  - "net"：网络改正数据，经 FramedFeed 分帧后只把完整帧交给 App._on_input_frames
+    （备用模式判定与转发串口）；半帧不会转发，不会与 NTRIP 主连接的数据交错
+- 每条数据流（TCP 连接、UDP 套接字、串口）有独立的分帧状态，互不交错
+- TcpClientSource：非阻塞连接，断开后按 Backoff 退避重连
+- TcpServerSource：监听端口，可同时接入多个客户端，每个连接一条数据流
+- UdpSource：一次可读事件内循环 recv_into 预分配缓冲，直到无数据或达到 max_batch，
+  整批数据一次回调（高报文速率下回调次数按唤醒次数而非报文数计）；支持组播加入
+  注意：整批合并要求报文按顺序来自同一发送端；多发送端请用 allow_from 限定
+  seq_header=True 时按 udp_sink 的报文头校验、去头，并用 SeqTracker 统计丢包
+- SerialSource：按 poll_interval 在循环定时器内读取 in_waiting（Windows 串口句柄
+  不能加入 select），设备丢失后按间隔重新打开
+
+注意：回调收到的 data 可能是接收缓冲的 memoryview，只在回调期间有效；
+需要保留的数据请自行 bytes(data)。
+
+配置（config.json 的 "inputs" 列表）：
+    {"type": "tcp_client", "host": "192.168.1.10", "port": 5018, "role": "base"}
+    {"type": "tcp_server", "port": 5019, "role": "net"}
+    {"type": "udp", "port": 5020, "group": "239.0.0.1", "role": "net"}
+    {"type": "serial", "port": "COM5", "baudrate": 115200, "role": "base"}
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .connection import Backoff, tune_socket
+from .ingest import FrameRing
+from .udp_sink import HEADER, SeqTracker, unpack_datagram
+
+LogCallback = Callable[[str], None]
+DataCallback = Callable[[Any], None]
+FramesCallback = Callable[[List[Tuple[int, bytes]]], None]
+# (输入源, 数据流标识) -> 该数据流的处理函数
+HandlerFactory = Callable[["InputSource", str], DataCallback]
+
+ROLES = ("base", "net")
+
+
+class FramedFeed:
+    """网络改正数据流的分帧适配：每次输入只以本次凑齐的完整帧列表回调一次 on_frames。
+
+    帧为 bytes 副本，可在回调外保留；未凑齐的半帧留在环形缓冲中等待后续数据。
+    """
+
+    def __init__(self, on_frames: FramesCallback, capacity: int = 64 * 1024):
+        self.on_frames = on_frames
+        self._ring = FrameRing(capacity)
+        self._step = capacity // 2
+
+    def __call__(self, data):
+        ring = self._ring
+        frames: List[Tuple[int, bytes]] = []
+        mv = memoryview(data)
+        # 大批量数据（UDP 整批）分段写入，每段后立即取帧，避免超出环形缓冲容量
+        step = self._step
+        for off in range(0, len(mv), step):
+            ring.write(mv[off:off + step])
+            while True:
+                item = ring.next_frame()
+                if item is None:
+                    break
+                frames.append((item[0], bytes(item[1])))
+        if frames:
+            self.on_frames(frames)
+
+
+class InputSource:
+    kind = ""
+
+    def __init__(self, name: str = "", role: str = "base"):
+        if role not in ROLES:
+            raise ValueError(f"未知的输入角色: {role}")
+        self.name = name or self.kind
+        self.role = role
+        self.loop: Optional["SourceLoop"] = None
+        self.bytes_in = 0
+        self.reconnects = 0
+
+    def open(self, loop: "SourceLoop"):
+        self.loop = loop
+
+    def close(self):
+        pass
+
+    def _deliver(self, stream: str, data):
+        self.bytes_in += len(data)
+        self.loop._dispatch(self, stream, data)
+
+
+class SourceLoop:
+    def __init__(self, make_handler: HandlerFactory, log: Optional[LogCallback] = None):
+        self.make_handler = make_handler
+        self.log = log or (lambda m: None)
+        self.sel = selectors.DefaultSelector()
+        self.sources: List[InputSource] = []
+        self._handlers: Dict[Tuple[int, str], DataCallback] = {}
+        self._timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self._seq = itertools.count()
+        self._pending: List[Callable[[], None]] = []
+        self._pending_lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.sel.register(self._wake_r, selectors.EVENT_READ, self._on_wake)
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 对外接口（可在任意线程调用） ----
+
+    def add(self, source: InputSource):
+        self.sources.append(source)
+        self.call_soon(lambda: self._open(source))
+
+    def start(self):
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="rtcm-inputs", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for s in self.sources:
+            try:
+                s.close()
+            except Exception:  # noqa
+                pass
+        self._handlers.clear()
+        try:
+            self.sel.unregister(self._wake_r)
+        except (KeyError, ValueError):
+            pass
+        self.sel.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def call_soon(self, fn: Callable[[], None]):
+        with self._pending_lock:
+            self._pending.append(fn)
+        self._wake()
+
+    # ---- 以下仅在循环线程内调用 ----
+
+    def call_later(self, delay: float, fn: Callable[[], None]):
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._seq), fn))
+
+    def register(self, sock, events: int, callback: Callable[[int], None]):
+        self.sel.register(sock, events, callback)
+
+    def modify(self, sock, events: int, callback: Callable[[int], None]):
+        self.sel.modify(sock, events, callback)
+
+    def unregister(self, sock):
+        try:
+            self.sel.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def close_stream(self, source: InputSource, stream: str):
+        self._handlers.pop((id(source), stream), None)
+
+    def _dispatch(self, source: InputSource, stream: str, data):
+        key = (id(source), stream)
+        h = self._handlers.get(key)
+        if h is None:
+            h = self._handlers[key] = self.make_handler(source, stream)
+        try:
+            h(data)
+        except Exception as e:  # noqa
+            self.log(f"输入 {source.name} 数据处理异常(忽略): {e}")
+
+    def _open(self, source: InputSource):
+        try:
+            source.open(self)
+        except Exception as e:  # noqa
+            self.log(f"输入 {source.name} 打开失败: {e}")
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _on_wake(self, _events: int):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _run(self):
+        while not self._stop_evt.is_set():
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            for fn in pending:
+                fn()
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, fn = heapq.heappop(self._timers)
+                try:
+                    fn()
+                except Exception as e:  # noqa
+                    self.log(f"输入定时任务异常: {e}")
+            timeout = 0.5
+            if self._timers:
+                timeout = max(0.0, min(timeout, self._timers[0][0] - time.monotonic()))
+            for key, events in self.sel.select(timeout):
+                try:
+                    key.data(events)
+                except Exception as e:  # noqa
+                    self.log(f"输入事件处理异常: {e}")
+
+
+class TcpClientSource(InputSource):
+    kind = "tcp_client"
+
+    def __init__(self, host: str, port: int, name: str = "", role: str = "base",
+                 read_size: int = 16 * 1024, backoff: Optional[Backoff] = None):
+        super().__init__(name or f"tcp://{host}:{port}", role)
+        self.host = host
+        self.port = int(port)
+        self.read_size = read_size
+        self.backoff = backoff or Backoff(cap=30.0)
+        self.connected = False
+        self._sock: Optional[socket.socket] = None
+        self._buf = bytearray(read_size)
+        self._mv = memoryview(self._buf)
+        self._closed = False
+
+    def open(self, loop: SourceLoop):
+        super().open(loop)
+        self._closed = False
+        self._connect()
+
+    def _connect(self):
+        if self._closed:
+            return
+        try:
+            # 局域网场景通常为 IP 字面量，解析不会阻塞事件循环
+            family, stype, proto, _cn, addr = socket.getaddrinfo(
+                self.host, self.port, type=socket.SOCK_STREAM)[0]
+            s = socket.socket(family, stype, proto)
+            tune_socket(s)
+            s.setblocking(False)
+            err = s.connect_ex(addr)
+        except OSError as e:
+            self.loop.log(f"输入 {self.name} 连接失败: {e}")
+            self._retry()
+            return
+        self._sock = s
+        if err == 0:
+            self._on_connected()
+        else:
+            self.loop.register(s, selectors.EVENT_WRITE, self._on_connect_ready)
+
+    def _on_connect_ready(self, _events: int):
+        err = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            self._drop(f"连接失败: {err}")
+            return
+        self.loop.unregister(self._sock)
+        self._on_connected()
+
+    def _on_connected(self):
+        self.connected = True
+        self.backoff.reset()
+        self.loop.log(f"输入 {self.name} 已连接")
+        self.loop.register(self._sock, selectors.EVENT_READ, self._on_readable)
+
+    def _on_readable(self, _events: int):
+        try:
+            n = self._sock.recv_into(self._mv)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._drop(f"接收异常: {e}")
+            return
+        if not n:
+            self._drop("对端关闭")
+            return
+        self._deliver("tcp", self._mv[:n])
+
+    def _drop(self, why: str):
+        was_connected = self.connected
+        self.connected = False
+        if self._sock:
+            self.loop.unregister(self._sock)
+            self._sock.close()
+            self._sock = None
+        self.loop.close_stream(self, "tcp")
+        self.loop.log(f"输入 {self.name} {why}")
+        if was_connected:
+            self.reconnects += 1
+        self._retry()
+
+    def _retry(self):
+        if not self._closed:
+            self.loop.call_later(self.backoff.next(), self._connect)
+
+    def close(self):
+        self._closed = True
+        self.connected = False
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+
+class TcpServerSource(InputSource):
+    kind = "tcp_server"
+
+    def __init__(self, port: int, bind: str = "0.0.0.0", name: str = "", role: str = "base",
+                 read_size: int = 16 * 1024, max_clients: int = 8):
+        super().__init__(name or f"tcp-listen:{port}", role)
+        self.bind = bind
+        self.port = int(port)
+        self.max_clients = max_clients
+        self._buf = bytearray(read_size)
+        self._mv = memoryview(self._buf)
+        self._listener: Optional[socket.socket] = None
+        self._clients: Dict[socket.socket, str] = {}
+        self.connections = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._listener.getsockname()[:2] if self._listener else (self.bind, self.port)
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def open(self, loop: SourceLoop):
+        super().open(loop)
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind((self.bind, self.port))
+        s.listen(self.max_clients)
+        s.setblocking(False)
+        self._listener = s
+        loop.register(s, selectors.EVENT_READ, self._on_accept)
+        loop.log(f"输入 {self.name} 监听 {self.address[0]}:{self.address[1]}")
+
+    def _on_accept(self, _events: int):
+        try:
+            conn, addr = self._listener.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        if len(self._clients) >= self.max_clients:
+            conn.close()
+            self.loop.log(f"输入 {self.name} 拒绝 {addr[0]}:{addr[1]}（连接数已满）")
+            return
+        conn.setblocking(False)
+        stream = f"{addr[0]}:{addr[1]}"
+        self._clients[conn] = stream
+        self.connections += 1
+        self.loop.log(f"输入 {self.name} 接入 {stream}")
+        self.loop.register(conn, selectors.EVENT_READ, lambda ev, c=conn: self._on_readable(c))
+
+    def _on_readable(self, conn: socket.socket):
+        try:
+            n = conn.recv_into(self._mv)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            n = 0
+        if not n:
+            self._close_client(conn)
+            return
+        self._deliver(self._clients[conn], self._mv[:n])
+
+    def _close_client(self, conn: socket.socket):
+        stream = self._clients.pop(conn, "")
+        self.loop.unregister(conn)
+        conn.close()
+        self.loop.close_stream(self, stream)
+        self.loop.log(f"输入 {self.name} 断开 {stream}")
+
+    def close(self):
+        for conn in list(self._clients):
+            conn.close()
+        self._clients.clear()
+        if self._listener:
+            self._listener.close()
+            self._listener = None
+
+
+class UdpSource(InputSource):
+    kind = "udp"
+
+    def __init__(self, port: int, bind: str = "0.0.0.0", group: Optional[str] = None,
+                 name: str = "", role: str = "net", max_datagram: int = 2048,
+                 max_batch: int = 256, allow_from: Optional[str] = None,
+                 rcvbuf: int = 1024 * 1024, seq_header: bool = False,
+                 interface: str = "0.0.0.0"):
+        super().__init__(name or f"udp:{port}", role)
+        self.bind = bind
+        self.port = int(port)
+        self.group = group
+        self.interface = interface  # 加入组播所用网卡 IP
+        self.max_datagram = max_datagram
+        self.max_batch = max_batch
+        self.allow_from = allow_from
+        self.rcvbuf = rcvbuf
+        self.seq_header = seq_header
+        self.seq = SeqTracker()
+        self._buf = bytearray(max_datagram * max_batch)
+        self._mv = memoryview(self._buf)
+        self._sock: Optional[socket.socket] = None
+        self.datagrams = 0
+        self.datagrams_rejected = 0
+        self.wakeups = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._sock.getsockname()[:2] if self._sock else (self.bind, self.port)
+
+    def open(self, loop: SourceLoop):
+        super().open(loop)
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        except OSError:
+            pass
+        s.bind((self.bind, self.port))
+        if self.group:
+            mreq = struct.pack("4s4s", socket.inet_aton(self.group), socket.inet_aton(self.interface))
+            s.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        s.setblocking(False)
+        self._sock = s
+        loop.register(s, selectors.EVENT_READ, self._on_readable)
+
+    def _on_readable(self, _events: int):
+        # 一次唤醒尽量取空接收队列，整批一次回调
+        sock = self._sock
+        mv = self._mv
+        size = self.max_datagram
+        allow = self.allow_from
+        off = 0
+        n_dgrams = 0
+        self.wakeups += 1
+        for _ in range(self.max_batch):
+            try:
+                n, addr = sock.recvfrom_into(mv[off:off + size])
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # Windows 下超长报文 / ICMP 端口不可达会以异常形式出现，丢弃该报文继续
+                self.loop.log(f"输入 {self.name} 接收异常(忽略): {e}")
+                continue
+            if allow and addr[0] != allow:
+                self.datagrams_rejected += 1
+                continue
+            if self.seq_header:
+                parsed = unpack_datagram(mv[off:off + n])
+                if parsed is None:
+                    self.datagrams_rejected += 1
+                    continue
+                self.seq.feed(parsed[0])
+                # 去掉报文头，帧数据前移紧接上一报文
+                n -= HEADER.size
+                mv[off:off + n] = mv[off + HEADER.size:off + HEADER.size + n]
+            off += n
+            n_dgrams += 1
+        if off:
+            self.datagrams += n_dgrams
+            self._deliver("udp", mv[:off])
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+
+class SerialSource(InputSource):
+    kind = "serial"
+
+    def __init__(self, port: str, baudrate: int = 115200, name: str = "", role: str = "base",
+                 poll_interval: float = 0.02, reopen_interval: float = 1.0,
+                 serial_factory: Optional[Callable[..., Any]] = None):
+        super().__init__(name or port, role)
+        self.port = port
+        self.baudrate = int(baudrate)
+        self.poll_interval = poll_interval
+        self.reopen_interval = reopen_interval
+        self.serial_factory = serial_factory
+        self._ser = None
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._ser is not None
+
+    def open(self, loop: SourceLoop):
+        super().open(loop)
+        self._closed = False
+        self._reopen()
+
+    def _reopen(self):
+        if self._closed:
+            return
+        factory = self.serial_factory
+        if factory is None:
+            import serial  # type: ignore
+            factory = serial.Serial
+        try:
+            self._ser = factory(self.port, self.baudrate, timeout=0)
+        except Exception as e:  # noqa
+            self.loop.log(f"输入 {self.name} 打开失败: {e}")
+            self.loop.call_later(self.reopen_interval, self._reopen)
+            return
+        self.loop.log(f"输入 {self.name} 已打开")
+        self.loop.call_later(0.0, self._poll)
+
+    def _poll(self):
+        ser = self._ser
+        if ser is None or self._closed:
+            return
+        try:
+            n = ser.in_waiting
+            data = ser.read(n) if n else b""
+        except Exception as e:  # noqa
+            self.loop.log(f"输入 {self.name} 读取异常: {e}")
+            try:
+                ser.close()
+            except Exception:  # noqa
+                pass
+            self._ser = None
+            self.reconnects += 1
+            self.loop.close_stream(self, "serial")
+            self.loop.call_later(self.reopen_interval, self._reopen)
+            return
+        if data:
+            self._deliver("serial", data)
+        self.loop.call_later(self.poll_interval, self._poll)
+
+    def close(self):
+        self._closed = True
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:  # noqa
+                pass
+            self._ser = None
+
+
+INPUT_TYPES: Dict[str, Callable[..., InputSource]] = {
+    "tcp_client": TcpClientSource,
+    "tcp_server": TcpServerSource,
+    "udp": UdpSource,
+    "serial": SerialSource,
+}
+
+
+def build_input(cfg: Dict[str, Any]) -> InputSource:
+    """按配置字典构造输入源（除 type/enabled 外的键作为构造参数）。"""
+    kind = cfg.get("type")
+    cls = INPUT_TYPES.get(kind)
+    if cls is None:
+        raise ValueError(f"未知的输入类型: {kind}")
+    kwargs = {k: v for k, v in cfg.items() if k not in ("type", "enabled")}
+    return cls(**kwargs)
+
+
+__all__ = [
+    "FramedFeed",
+    "INPUT_TYPES",
+    "InputSource",
+    "SerialSource",
+    "SourceLoop",
+    "TcpClientSource",
+    "TcpServerSource",
+    "UdpSource",
+    "build_input",
+]
@@ -0,0 +1,271 @@
+"""NTRIP Sourcetable 获取、解析、缓存与最近挂载点选择。
+
+功能点：
+- SourcetableParser: 流式（增量）解析 caster 返回的 sourcetable，逐行产出 STR 记录
+- SourcetableCache: 按 host:port 缓存到磁盘 JSON，带 TTL
+- MountpointIndex: 在单位球面坐标上建立 k-d 树，按大圆距离查询最近的兼容挂载点；
+  兼容性条件在建树时预先过滤，查询保持对数复杂度
+- MountpointSelector: 随位置变化重新评估，带滞回避免在两个挂载点之间来回切换
+
+STR 行格式（NTRIP 2.0）：
+STR;mountpoint;identifier;format;format-details;carrier;nav-system;network;country;
+latitude;longitude;nmea;solution;generator;compr-encryp;authentication;fee;bitrate;misc
+"""
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@dataclass(frozen=True)
+class StreamEntry:
+    mountpoint: str
+    identifier: str
+    format: str
+    format_details: str
+    carrier: int
+    nav_system: str
+    network: str
+    country: str
+    lat_deg: float
+    lon_deg: float
+    nmea: bool
+    solution: int  # 0: 单基站  1: 网络(VRS 等)
+    bitrate: int
+
+
+def _to_int(s: str, default: int = 0) -> int:
+    try:
+        return int(s)
+    except ValueError:
+        return default
+
+
+def _to_float(s: str, default: float = 0.0) -> float:
+    try:
+        return float(s)
+    except ValueError:
+        return default
+
+
+def parse_str_line(line: str) -> Optional[StreamEntry]:
+    """解析一行 STR 记录，非 STR 行或字段不足返回 None。"""
+    if not line.startswith("STR;"):
+        return None
+    f = line.split(";")
+    if len(f) < 12:
+        return None
+    f += [""] * (19 - len(f))
+    lon = _to_float(f[10])
+    if lon > 180.0:  # 部分 caster 使用 0~360
+        lon -= 360.0
+    return StreamEntry(
+        mountpoint=f[1],
+        identifier=f[2],
+        format=f[3],
+        format_details=f[4],
+        carrier=_to_int(f[5]),
+        nav_system=f[6],
+        network=f[7],
+        country=f[8],
+        lat_deg=_to_float(f[9]),
+        lon_deg=lon,
+        nmea=f[11].strip() == "1",
+        solution=_to_int(f[12]),
+        bitrate=_to_int(f[17]),
+    )
+
+
+class SourcetableParser:
+    """增量解析：可按任意分包喂入数据。"""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.entries: List[StreamEntry] = []
+        self.done = False
+        self.status: Optional[str] = None
+
+    def feed(self, data: bytes) -> List[StreamEntry]:
+        self._buf.extend(data)
+        found: List[StreamEntry] = []
+        while not self.done:
+            nl = self._buf.find(b"\n")
+            if nl < 0:
+                break
+            line = self._buf[:nl].rstrip(b"\r").decode("utf-8", "replace")
+            del self._buf[:nl + 1]
+            if self.status is None:
+                self.status = line
+                if "200" not in line:
+                    raise ConnectionError(f"Sourcetable 请求失败: {line[:100]}")
+                continue
+            if line.startswith("ENDSOURCETABLE"):
+                self.done = True
+                break
+            entry = parse_str_line(line)
+            if entry:
+                found.append(entry)
+        self.entries.extend(found)
+        return found
+
+
+class SourcetableCache:
+    def __init__(self, path: str = "sourcetable_cache.json", ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+
+    def _read_all(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, host: str, port: int) -> Optional[List[StreamEntry]]:
+        item = self._read_all().get(f"{host}:{port}")
+        if not item or time.time() - float(item.get("fetched_at", 0)) > self.ttl:
+            return None
+        return [StreamEntry(**e) for e in item.get("entries", [])]
+
+    def store(self, host: str, port: int, entries: List[StreamEntry]):
+        data = self._read_all()
+        data[f"{host}:{port}"] = {
+            "fetched_at": time.time(),
+            "entries": [asdict(e) for e in entries],
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def is_compatible(entry: StreamEntry, fmt: str = "RTCM3", msm: Optional[int] = None) -> bool:
+    """格式兼容判断：RTCM 3.x，可选要求指定 MSM 类型（如 4 / 7）。"""
+    if fmt and not entry.format.replace(" ", "").upper().startswith(fmt.upper()):
+        return False
+    if not msm:
+        return True
+    details = entry.format_details.upper()
+    if f"MSM{msm}" in details:
+        return True
+    for tok in details.replace(";", ",").split(","):
+        num = _to_int(tok.split("(")[0].strip(), -1)
+        if 1071 <= num <= 1137 and num % 10 == msm:
+            return True
+    return False
+
+
+def _unit_vec(lat_deg: float, lon_deg: float) -> Tuple[float, float, float]:
+    lat = math.radians(lat_deg)
+    lon = math.radians(lon_deg)
+    c = math.cos(lat)
+    return (c * math.cos(lon), c * math.sin(lon), math.sin(lat))
+
+
+def chord_to_meters(chord: float) -> float:
+    return 2.0 * EARTH_RADIUS_M * math.asin(min(1.0, chord / 2.0))
+
+
+class MountpointIndex:
+    """球面 k-d 树：在单位球三维坐标上做最近邻，弦长与大圆距离单调对应。"""
+
+    def __init__(self, entries: List[StreamEntry],
+                 accept: Optional[Callable[[StreamEntry], bool]] = None):
+        # 坐标 (0,0) 基本都是未填写位置的占位条目，不参与空间选择；
+        # accept（格式/导航系统等固定条件）在建树前过滤，树中只有兼容条目
+        self.entries = [e for e in entries
+                        if (e.lat_deg or e.lon_deg) and (accept is None or accept(e))]
+        self._pts = [_unit_vec(e.lat_deg, e.lon_deg) for e in self.entries]
+        n = len(self._pts)
+        self._left = [-1] * n
+        self._right = [-1] * n
+        self._axis = [0] * n
+        self._root = self._build(list(range(n)), 0)
+
+    def _build(self, idx: List[int], depth: int) -> int:
+        if not idx:
+            return -1
+        axis = depth % 3
+        idx.sort(key=lambda i: self._pts[i][axis])
+        mid = len(idx) // 2
+        node = idx[mid]
+        self._axis[node] = axis
+        self._left[node] = self._build(idx[:mid], depth + 1)
+        self._right[node] = self._build(idx[mid + 1:], depth + 1)
+        return node
+
+    def nearest(self, lat_deg: float, lon_deg: float,
+                accept: Optional[Callable[[StreamEntry], bool]] = None
+                ) -> Optional[Tuple[StreamEntry, float]]:
+        """返回 (最近条目, 距离米)。
+
+        accept 为查询时的额外过滤：被拒绝的节点不会缩小搜索范围，过滤严格时退化为
+        线性遍历；固定的兼容性条件应在构造索引时传入。
+        """
+        if self._root < 0:
+            return None
+        q = _unit_vec(lat_deg, lon_deg)
+        best = [-1, float("inf")]  # [索引, 弦长平方]
+        pts = self._pts
+        entries = self.entries
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            p = pts[node]
+            d2 = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if d2 < best[1] and (accept is None or accept(entries[node])):
+                best[0], best[1] = node, d2
+            diff = q[self._axis[node]] - p[self._axis[node]]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            # 后入栈先处理：先近侧；远侧仅在可能更近时才访问
+            if far >= 0 and diff * diff < best[1]:
+                stack.append(far)
+            if near >= 0:
+                stack.append(near)
+        if best[0] < 0:
+            return None
+        return entries[best[0]], chord_to_meters(math.sqrt(best[1]))
+
+
+class MountpointSelector:
+    def __init__(self, index: MountpointIndex,
+                 accept: Optional[Callable[[StreamEntry], bool]] = None,
+                 hysteresis_m: float = 2000.0):
+        self.index = index
+        self.accept = accept
+        self.hysteresis_m = hysteresis_m
+        self.current: Optional[StreamEntry] = None
+
+    def choose(self, lat_deg: float, lon_deg: float) -> Optional[StreamEntry]:
+        """返回应使用的挂载点；新候选需比当前近 hysteresis_m 以上才切换。"""
+        res = self.index.nearest(lat_deg, lon_deg, self.accept)
+        if res is None:
+            return self.current
+        cand, dist = res
+        if self.current is None or cand.mountpoint == self.current.mountpoint:
+            self.current = cand
+            return cand
+        cur_dist = chord_to_meters(math.sqrt(sum(
+            (a - b) ** 2 for a, b in zip(_unit_vec(self.current.lat_deg, self.current.lon_deg),
+                                         _unit_vec(lat_deg, lon_deg)))))
+        if dist + self.hysteresis_m < cur_dist:
+            self.current = cand
+        return self.current
+
+
+__all__ = [
+    "StreamEntry",
+    "parse_str_line",
+    "SourcetableParser",
+    "SourcetableCache",
+    "is_compatible",
+    "MountpointIndex",
+    "MountpointSelector",
+]
@@ -0,0 +1,104 @@
+"""启动耗时记录：导入/初始化各阶段耗时与关键时间点（窗口出现、端口枚举完成、首字节转发）。
+
+功能点：
+- 本模块应最先导入（run_app.py 第一行），模块导入时刻作为 t0
+- phase(name)：记录一段代码的耗时；mark(name)：记录某时间点距 t0 的时长（只记第一次）
+- 每个时间点同时记录墙钟时间，外部基准可据此计算“进程启动 -> 窗口出现”
+  （打包版的解压/加载发生在 Python 启动之前，只能从外部测量）
+- 环境变量（供 benchmarks/bench_startup.py 使用）：
+  RTKLORA_STARTUP_REPORT=路径  每次新增时间点后把报告写成 JSON
+  RTKLORA_EXIT_AFTER=window_shown|first_forward  到达该时间点后退出程序
+  RTKLORA_AUTOSTART=1  窗口出现后立即按 config.json 连接（测量首字节转发耗时）
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+REPORT_ENV = "RTKLORA_STARTUP_REPORT"
+EXIT_ENV = "RTKLORA_EXIT_AFTER"
+AUTOSTART_ENV = "RTKLORA_AUTOSTART"
+
+
+class StartupTimer:
+    def __init__(self, t0: Optional[float] = None, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.t0 = clock() if t0 is None else t0
+        self.wall0 = time.time() - (clock() - self.t0)
+        self._lock = threading.Lock()
+        self.phases: List[Tuple[str, float]] = []
+        self.marks: Dict[str, float] = {}
+        self.listeners: List[Callable[[str], None]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = self.clock()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, self.clock() - t))
+
+    def mark(self, name: str) -> bool:
+        """记录时间点；已记录过返回 False。"""
+        with self._lock:
+            if name in self.marks:
+                return False
+            self.marks[name] = self.clock() - self.t0
+        for cb in list(self.listeners):
+            cb(name)
+        return True
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "wall0": self.wall0,
+                "phases_ms": {name: round(dt * 1000.0, 2) for name, dt in self.phases},
+                "marks_ms": {name: round(t * 1000.0, 2) for name, t in self.marks.items()},
+                "marks_wall": {name: self.wall0 + t for name, t in self.marks.items()},
+            }
+
+    def format(self) -> str:
+        r = self.report()
+        parts = [f"{k} {v:.0f}ms" for k, v in r["phases_ms"].items()]
+        marks = [f"{k} {v:.0f}ms" for k, v in sorted(r["marks_ms"].items(), key=lambda kv: kv[1])]
+        return "启动耗时: " + ", ".join(parts) + (" | 时间点: " + ", ".join(marks) if marks else "")
+
+    def write(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+
+# 进程级实例：以本模块首次导入的时刻为 t0
+STARTUP = StartupTimer()
+
+
+def install_env_hooks(timer: StartupTimer, on_exit: Callable[[], None]):
+    """按环境变量写报告/在指定时间点退出（退出回调需自行切回 UI 线程）。"""
+    path = os.environ.get(REPORT_ENV)
+    exit_after = os.environ.get(EXIT_ENV)
+    if not path and not exit_after:
+        return
+
+    def on_mark(name: str):
+        if path:
+            try:
+                timer.write(path)
+            except OSError:
+                pass
+        if exit_after and name == exit_after:
+            on_exit()
+
+    timer.listeners.append(on_mark)
+
+
+def autostart_requested() -> bool:
+    return os.environ.get(AUTOSTART_ENV) == "1"
+
+
+__all__ = ["AUTOSTART_ENV", "EXIT_ENV", "REPORT_ENV", "STARTUP", "StartupTimer", "autostart_requested", "install_env_hooks"]
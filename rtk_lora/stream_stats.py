@@ -0,0 +1,197 @@
+"""按消息类型的滚动流统计（固定内存）。
+
+由网络 RTK 逐帧回调在分帧时喂入 (msg_num, 帧长, 到达时间)。每种消息类型一组
+基于 array 的环形缓冲区（到达时间、帧长、到达间隔、是否新历元），每个
+统计窗口（默认 10s / 1min / 10min）维护一组整数滑动累加量，入队出队均摊 O(1)。
+到达间隔抖动在读取快照时对窗口内的缓冲内容做 Welford 计算（O(容量)），
+不用滑动的和/平方和相减，长时间运行也没有抵消误差与漂移。
+
+快照内容（每种消息、每个窗口）：
+- 消息速率 (Hz)、字节速率 (B/s)
+- 到达间隔抖动（标准差，秒）
+- 历元完整率：该消息出现的历元数 / 流中有数据的历元数
+- 最新消息的时效（秒）
+
+容量说明：每种类型最多保留 capacity 条记录；高频消息在长窗口上若超出容量，
+该窗口只统计仍在缓冲区中的部分，速率按实际覆盖时长计算。
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_WINDOWS: Tuple[float, ...] = (10.0, 60.0, 600.0)
+
+
+@dataclass(frozen=True)
+class WindowStats:
+    window_s: float
+    count: int
+    rate_hz: float
+    bytes_per_s: float
+    jitter_s: float
+    completeness: float
+
+
+@dataclass(frozen=True)
+class TypeStats:
+    msg_num: int
+    total: int
+    age_s: float
+    windows: Tuple[WindowStats, ...]
+
+
+class _Ring:
+    """单个消息类型的环形缓冲 + 各窗口滑动累加量。"""
+
+    __slots__ = (
+        "cap", "times", "sizes", "dts", "newep", "seq", "tails",
+        "w_cnt", "w_bytes", "w_ep",
+        "last_t", "last_epoch", "first_t",
+    )
+
+    def __init__(self, cap: int, nwin: int):
+        self.cap = cap
+        self.times = array("d", bytes(8 * cap))
+        self.dts = array("d", bytes(8 * cap))
+        self.sizes = array("I", bytes(4 * cap))
+        self.newep = array("B", bytes(cap))
+        self.seq = 0  # 已写入总条数
+        self.tails = [0] * nwin  # 各窗口中最旧记录的序号
+        self.w_cnt = [0] * nwin
+        self.w_bytes = [0] * nwin
+        self.w_ep = [0] * nwin
+        self.last_t = -1.0
+        self.last_epoch = -1
+        self.first_t = -1.0
+
+    def _drop(self, w: int):
+        i = self.tails[w] % self.cap
+        self.w_cnt[w] -= 1
+        self.w_bytes[w] -= self.sizes[i]
+        self.w_ep[w] -= self.newep[i]
+        self.tails[w] += 1
+
+    def expire(self, windows: Tuple[float, ...], now: float):
+        times = self.times
+        cap = self.cap
+        for w, span in enumerate(windows):
+            limit = now - span
+            while self.tails[w] < self.seq and times[self.tails[w] % cap] <= limit:
+                self._drop(w)
+
+    def push(self, t: float, size: int, epoch: int):
+        cap = self.cap
+        n = self.seq
+        # 即将被覆盖的槽位若仍在某窗口内，先将其移出
+        for w in range(len(self.tails)):
+            if self.tails[w] == n - cap:
+                self._drop(w)
+        i = n % cap
+        dt = t - self.last_t if self.last_t >= 0.0 else -1.0
+        new_ep = 1 if epoch != self.last_epoch else 0
+        self.times[i] = t
+        self.sizes[i] = size
+        self.dts[i] = dt
+        self.newep[i] = new_ep
+        self.seq = n + 1
+        for w in range(len(self.tails)):
+            self.w_cnt[w] += 1
+            self.w_bytes[w] += size
+            self.w_ep[w] += new_ep
+        if self.first_t < 0.0:
+            self.first_t = t
+        self.last_t = t
+        self.last_epoch = epoch
+
+    def jitter(self, w: int) -> float:
+        """窗口内到达间隔的标准差（Welford）。"""
+        dts = self.dts
+        cap = self.cap
+        n = 0
+        mean = m2 = 0.0
+        for k in range(self.tails[w], self.seq):
+            dt = dts[k % cap]
+            if dt < 0.0:
+                continue
+            n += 1
+            d = dt - mean
+            mean += d / n
+            m2 += d * (dt - mean)
+        return math.sqrt(m2 / n) if n > 1 else 0.0
+
+    def span(self, w: int, window: float, now: float, floor: float) -> float:
+        covered = now - self.first_t
+        if self.seq - self.tails[w] >= self.cap:
+            # 窗口被容量截断：按缓冲区实际覆盖时长计算
+            covered = now - self.times[self.tails[w] % self.cap]
+        return max(min(window, covered), floor)
+
+
+class StreamStats:
+    def __init__(self, windows: Tuple[float, ...] = DEFAULT_WINDOWS,
+                 capacity: int = 1024, max_types: int = 64,
+                 epoch_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.windows = tuple(windows)
+        self.capacity = capacity
+        self.max_types = max_types
+        self.epoch_interval = epoch_interval
+        self.clock = clock
+        self._types: Dict[int, _Ring] = {}
+        # 全局历元环：只在进入新历元时记录一条，用于计算完整率的分母
+        self._all = _Ring(capacity, len(self.windows))
+        self._lock = threading.Lock()
+        self.dropped_types = 0
+
+    def record(self, msg_num: int, size: int, now: Optional[float] = None):
+        t = self.clock() if now is None else now
+        epoch = int(t / self.epoch_interval)
+        with self._lock:
+            ring = self._types.get(msg_num)
+            if ring is None:
+                if len(self._types) >= self.max_types:
+                    self.dropped_types += 1
+                    return
+                ring = self._types[msg_num] = _Ring(self.capacity, len(self.windows))
+            ring.expire(self.windows, t)
+            ring.push(t, size, epoch)
+            if epoch != self._all.last_epoch:
+                self._all.expire(self.windows, t)
+                self._all.push(t, 0, epoch)
+
+    def snapshot(self, now: Optional[float] = None) -> List[TypeStats]:
+        t = self.clock() if now is None else now
+        out: List[TypeStats] = []
+        with self._lock:
+            allr = self._all
+            allr.expire(self.windows, t)
+            for msg_num in sorted(self._types):
+                ring = self._types[msg_num]
+                ring.expire(self.windows, t)
+                wins = []
+                for w, span in enumerate(self.windows):
+                    cnt = ring.w_cnt[w]
+                    covered = ring.span(w, span, t, self.epoch_interval)
+                    all_ep = allr.w_ep[w]
+                    wins.append(WindowStats(
+                        window_s=span,
+                        count=cnt,
+                        rate_hz=cnt / covered,
+                        bytes_per_s=ring.w_bytes[w] / covered,
+                        jitter_s=ring.jitter(w),
+                        completeness=min(1.0, ring.w_ep[w] / all_ep) if all_ep else 0.0,
+                    ))
+                out.append(TypeStats(msg_num, ring.seq, t - ring.last_t, tuple(wins)))
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._types.clear()
+            self._all = _Ring(self.capacity, len(self.windows))
+
+
+__all__ = ["StreamStats", "TypeStats", "WindowStats", "DEFAULT_WINDOWS"]
@@ -0,0 +1,359 @@
+"""会话遥测存储：把每秒的链路/数据流指标与事件写入本地 SQLite，供事后分析。
+
+功能点：
+- 每次“连接”为一个会话（sessions），记录起止时间、挂载点、串口、模式
+- samples：每秒一行（字节计数、转发/基站状态、两套 1005 坐标、基准差异、卫星数等），
+  未列入固定列的指标以 JSON 存入 extra
+- events：重连、转发模式切换、基站坐标移动、串口中断等离散事件
+- 写入批量化：sample()/event() 只向内存队列追加（不做 I/O），后台线程按间隔
+  一次事务批量写入；队列有上限，超出丢弃最旧数据并计数
+- SQLite 使用 WAL + synchronous=NORMAL，按 (session, t) 建索引，数周数据查询仍快
+
+命令行（事后分析）：
+    python -m rtk_lora.telemetry sessions [--since 2024-05-01]
+    python -m rtk_lora.telemetry events --session 12 [--kind base_moved]
+    python -m rtk_lora.telemetry export --session 12 --format csv --out s12.csv
+    python -m rtk_lora.telemetry summary [--since 2024-05-01]
+"""
+from __future__ import annotations
+import argparse
+from collections import deque
+import csv
+from datetime import datetime
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+LogCallback = Callable[[str], None]
+
+DEFAULT_DB = "telemetry.db"
+
+SAMPLE_FIELDS: Tuple[str, ...] = (
+    "ntrip_bytes",
+    "serial_bytes",
+    "serial_connected",
+    "forward_enabled",
+    "base_online",
+    "base_age_s",
+    "base_lat",
+    "base_lon",
+    "base_alt",
+    "net_lat",
+    "net_lon",
+    "net_alt",
+    "offset_h_m",
+    "offset_v_m",
+    "satellites",
+    "reconnects",
+)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    ended REAL,
+    mode TEXT,
+    host TEXT,
+    mountpoint TEXT,
+    serial_port TEXT,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    session_id INTEGER NOT NULL,
+    t REAL NOT NULL,
+    {", ".join(f"{f} REAL" for f in SAMPLE_FIELDS)},
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    session_id INTEGER NOT NULL,
+    t REAL NOT NULL,
+    kind TEXT NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_samples_session_t ON samples(session_id, t);
+CREATE INDEX IF NOT EXISTS idx_events_session_t ON events(session_id, t);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started);
+"""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class TelemetryStore:
+    def __init__(self, path: str = DEFAULT_DB, flush_interval: float = 2.0,
+                 max_pending: int = 10000, log: Optional[LogCallback] = None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.log = log or (lambda m: None)
+        self._conn = _connect(path)
+        self._db_lock = threading.Lock()
+        self._samples: Deque[tuple] = deque()
+        self._events: Deque[tuple] = deque()
+        self._q_lock = threading.Lock()
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.session_id: Optional[int] = None
+        self.dropped = 0
+        self.rows_written = 0
+
+    # 会话（不在热路径，直接写库）
+    def start_session(self, mode: str = "", host: str = "", mountpoint: str = "",
+                      serial_port: str = "", **meta: Any) -> int:
+        with self._db_lock:
+            cur = self._conn.execute(
+                "INSERT INTO sessions (started, mode, host, mountpoint, serial_port, meta) VALUES (?,?,?,?,?,?)",
+                (time.time(), mode, host, mountpoint, serial_port, json.dumps(meta, ensure_ascii=False)),
+            )
+            self._conn.commit()
+            self.session_id = int(cur.lastrowid)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_evt.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self.event("session_start")
+        return self.session_id
+
+    def end_session(self):
+        if self.session_id is None:
+            return
+        self.event("session_end")
+        self.flush()
+        with self._db_lock:
+            self._conn.execute("UPDATE sessions SET ended=? WHERE id=?", (time.time(), self.session_id))
+            self._conn.commit()
+        self.session_id = None
+
+    # 热路径可调用：只追加到内存队列
+    def sample(self, t: Optional[float] = None, **fields: Any):
+        sid = self.session_id
+        if sid is None:
+            return
+        row = [sid, time.time() if t is None else t]
+        row.extend(fields.pop(f, None) for f in SAMPLE_FIELDS)
+        row.append(json.dumps(fields, ensure_ascii=False) if fields else None)
+        self._append(self._samples, tuple(row))
+
+    def event(self, kind: str, detail: Any = None, t: Optional[float] = None):
+        sid = self.session_id
+        if sid is None:
+            return
+        if detail is not None and not isinstance(detail, str):
+            detail = json.dumps(detail, ensure_ascii=False)
+        self._append(self._events, (sid, time.time() if t is None else t, kind, detail))
+
+    def _append(self, q: Deque[tuple], row: tuple):
+        with self._q_lock:
+            q.append(row)
+            if len(self._samples) + len(self._events) > self.max_pending:
+                (self._samples or self._events).popleft()
+                self.dropped += 1
+
+    def flush(self):
+        with self._q_lock:
+            samples = list(self._samples)
+            events = list(self._events)
+            self._samples.clear()
+            self._events.clear()
+        if not samples and not events:
+            return
+        cols = ", ".join(("session_id", "t") + SAMPLE_FIELDS + ("extra",))
+        marks = ", ".join("?" * (len(SAMPLE_FIELDS) + 3))
+        with self._db_lock:
+            with self._conn:
+                if samples:
+                    self._conn.executemany(f"INSERT INTO samples ({cols}) VALUES ({marks})", samples)
+                if events:
+                    self._conn.executemany("INSERT INTO events VALUES (?,?,?,?)", events)
+        self.rows_written += len(samples) + len(events)
+
+    def _run(self):
+        while not self._stop_evt.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:  # noqa
+                self.log(f"遥测写入失败: {e}")
+
+    def close(self):
+        self.end_session()
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            with self._db_lock:
+                self._conn.close()
+
+
+# ---- 查询 ----
+
+def _parse_time(s: Optional[str]) -> Optional[float]:
+    if not s:
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return datetime.fromisoformat(s).timestamp()
+
+
+def _fmt_time(t: Optional[float]) -> str:
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") if t else "-"
+
+
+def list_sessions(conn: sqlite3.Connection, since: Optional[float] = None,
+                  until: Optional[float] = None) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        """
+        SELECT s.id, s.started, s.ended, s.mode, s.host, s.mountpoint, s.serial_port,
+               (SELECT COUNT(*) FROM samples WHERE session_id = s.id),
+               (SELECT COUNT(*) FROM events WHERE session_id = s.id)
+        FROM sessions s
+        WHERE s.started >= ? AND s.started <= ?
+        ORDER BY s.started
+        """,
+        (since or 0.0, until or 1e12),
+    ).fetchall()
+    keys = ("id", "started", "ended", "mode", "host", "mountpoint", "serial_port", "samples", "events")
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def session_summary(conn: sqlite3.Connection, session_id: int) -> Dict[str, Any]:
+    row = conn.execute(
+        """
+        SELECT COUNT(*), MIN(t), MAX(t), AVG(forward_enabled), AVG(base_online),
+               MAX(offset_h_m), MAX(offset_v_m), MIN(satellites), MAX(reconnects)
+        FROM samples WHERE session_id = ?
+        """,
+        (session_id,),
+    ).fetchone()
+    kinds = dict(conn.execute(
+        "SELECT kind, COUNT(*) FROM events WHERE session_id = ? GROUP BY kind", (session_id,)
+    ).fetchall())
+    n, t0, t1, fwd, base, off_h, off_v, min_sats, reconnects = row
+    return {
+        "session": session_id,
+        "samples": n,
+        "duration_s": (t1 - t0) if n else 0.0,
+        "forward_ratio": fwd,
+        "base_online_ratio": base,
+        "max_offset_h_m": off_h,
+        "max_offset_v_m": off_v,
+        "min_satellites": min_sats,
+        "reconnects": reconnects,
+        "events": kinds,
+    }
+
+
+def export_samples(conn: sqlite3.Connection, out, fmt: str = "csv",
+                   session_id: Optional[int] = None, since: Optional[float] = None,
+                   until: Optional[float] = None) -> int:
+    where = ["t >= ?", "t <= ?"]
+    args: List[Any] = [since or 0.0, until or 1e12]
+    if session_id is not None:
+        where.append("session_id = ?")
+        args.append(session_id)
+    cols = ("session_id", "t") + SAMPLE_FIELDS + ("extra",)
+    cur = conn.execute(f"SELECT {', '.join(cols)} FROM samples WHERE {' AND '.join(where)} ORDER BY t", args)
+    n = 0
+    if fmt == "csv":
+        w = csv.writer(out)
+        w.writerow(cols)
+        for r in cur:
+            w.writerow(r)
+            n += 1
+    else:
+        for r in cur:
+            out.write(json.dumps(dict(zip(cols, r)), ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtk_lora.telemetry", description="会话遥测查询/导出")
+    ap.add_argument("--db", default=DEFAULT_DB, help="数据库路径 (默认 telemetry.db)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("sessions", help="列出会话")
+    p.add_argument("--since")
+    p.add_argument("--until")
+
+    p = sub.add_parser("events", help="列出事件")
+    p.add_argument("--session", type=int)
+    p.add_argument("--kind")
+    p.add_argument("--since")
+    p.add_argument("--until")
+
+    p = sub.add_parser("export", help="导出每秒指标")
+    p.add_argument("--session", type=int)
+    p.add_argument("--since")
+    p.add_argument("--until")
+    p.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    p.add_argument("--out", help="输出文件（默认标准输出）")
+
+    p = sub.add_parser("summary", help="按会话汇总")
+    p.add_argument("--since")
+    p.add_argument("--until")
+
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"数据库不存在: {args.db}", file=sys.stderr)
+        return 1
+    conn = sqlite3.connect(args.db)
+    since = _parse_time(getattr(args, "since", None))
+    until = _parse_time(getattr(args, "until", None))
+    try:
+        if args.cmd == "sessions":
+            for s in list_sessions(conn, since, until):
+                print(f"{s['id']:>5}  {_fmt_time(s['started'])}  {_fmt_time(s['ended'])}  "
+                      f"{s['mode'] or '-':<7} {s['mountpoint'] or '-':<12} {s['serial_port'] or '-':<8} "
+                      f"样本 {s['samples']:>6}  事件 {s['events']:>4}")
+        elif args.cmd == "events":
+            where = ["t >= ?", "t <= ?"]
+            params: List[Any] = [since or 0.0, until or 1e12]
+            if args.session is not None:
+                where.append("session_id = ?")
+                params.append(args.session)
+            if args.kind:
+                where.append("kind = ?")
+                params.append(args.kind)
+            for sid, t, kind, detail in conn.execute(
+                    f"SELECT session_id, t, kind, detail FROM events WHERE {' AND '.join(where)} ORDER BY t", params):
+                print(f"{sid:>5}  {_fmt_time(t)}  {kind:<16} {detail or ''}")
+        elif args.cmd == "export":
+            if args.out:
+                with open(args.out, "w", encoding="utf-8", newline="") as f:
+                    n = export_samples(conn, f, args.format, args.session, since, until)
+                print(f"已导出 {n} 行 -> {args.out}", file=sys.stderr)
+            else:
+                export_samples(conn, sys.stdout, args.format, args.session, since, until)
+        elif args.cmd == "summary":
+            for s in list_sessions(conn, since, until):
+                print(json.dumps(session_summary(conn, s["id"]), ensure_ascii=False))
+    finally:
+        conn.close()
+    return 0
+
+
+__all__ = [
+    "SAMPLE_FIELDS",
+    "TelemetryStore",
+    "export_samples",
+    "list_sessions",
+    "main",
+    "session_summary",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""按帧对齐的 UDP 单播/组播输出：供 IP 自组网电台（mesh）替代透明 LoRa 串口。
+
+功能点：
+- 只发送完整 RTCM 帧：输入原始数据块时内部分帧，帧不会跨报文
+- 按历元打包：同一历元的帧依次装入报文，装满（不超过 mtu）即发出；
+  历元结束（多消息标志=0 的 MSM）时发出剩余部分，并置 FLAG_EPOCH_END
+- 不在历元内（无未结束的 MSM）的帧（1005/1033 等，或不含 MSM 的数据流）在本次
+  send/send_frames 调用结束时即发出，不等待下一个历元
+- 每个报文带 8 字节头：b"RL" + 版本 + 标志 + 序号(uint32, 大端)，接收端用 SeqTracker 统计丢包
+- 报文在一块预分配缓冲内组装一次，对每个目标直接 sendto 同一视图，接收端数量不增加复制；
+  大量接收端优先使用组播（一个目标即可覆盖整个组）
+- send() 与 SerialForwarder.send 接口一致，可直接挂在转发路径上；线程安全
+
+接收端：
+    seq, flags, payload = unpack_datagram(data)
+    lost = tracker.feed(seq)
+"""
+from __future__ import annotations
+import socket
+import struct
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .rtcm_msm import decode_msm_header, is_msm
+from .rtcm_parser import RTCMParser
+
+LogCallback = Callable[[str], None]
+Target = Tuple[str, int]
+
+MAGIC = b"RL"
+VERSION = 1
+FLAG_EPOCH_END = 0x01
+HEADER = struct.Struct(">2sBBI")
+_SEQ_MOD = 1 << 32
+
+
+def parse_target(t: Union[str, Sequence]) -> Target:
+    """"host:port" 或 (host, port) -> (host, port)。"""
+    if isinstance(t, str):
+        host, _, port = t.rpartition(":")
+        return host, int(port)
+    return str(t[0]), int(t[1])
+
+
+def is_multicast(host: str) -> bool:
+    try:
+        return 224 <= int(host.split(".")[0]) <= 239
+    except ValueError:
+        return False
+
+
+def unpack_datagram(data) -> Optional[Tuple[int, int, memoryview]]:
+    """解析报文头，返回 (序号, 标志, 帧数据视图)；不是本格式返回 None。"""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, flags, seq = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return seq, flags, memoryview(data)[HEADER.size:]
+
+
+class SeqTracker:
+    """按序号统计丢包：跳号计为丢失，迟到/重复报文忽略，序号大幅回退视为发送端重启。"""
+
+    def __init__(self, restart_window: int = 1024):
+        self.restart_window = restart_window
+        self.expected: Optional[int] = None
+        self.received = 0
+        self.lost = 0
+        self.late = 0
+        self.restarts = 0
+
+    def feed(self, seq: int) -> int:
+        """记录一个序号，返回本次新发现的丢失报文数。"""
+        self.received += 1
+        if self.expected is None:
+            self.expected = (seq + 1) % _SEQ_MOD
+            return 0
+        gap = (seq - self.expected) % _SEQ_MOD
+        if gap == 0:
+            self.expected = (seq + 1) % _SEQ_MOD
+            return 0
+        if gap < _SEQ_MOD // 2:
+            self.lost += gap
+            self.expected = (seq + 1) % _SEQ_MOD
+            return gap
+        # 序号落后于期望值
+        if _SEQ_MOD - gap <= self.restart_window:
+            self.late += 1
+            if self.lost:
+                self.lost -= 1  # 之前判为丢失的报文迟到了
+            return 0
+        self.restarts += 1
+        self.expected = (seq + 1) % _SEQ_MOD
+        return 0
+
+
+class UdpSink:
+    def __init__(self, targets: Iterable[Union[str, Sequence]], mtu: int = 1400,
+                 ttl: int = 1, interface: Optional[str] = None,
+                 multicast_loop: bool = True, log: Optional[LogCallback] = None):
+        self.targets: List[Target] = [parse_target(t) for t in targets]
+        if not self.targets:
+            raise ValueError("UDP 输出至少需要一个目标")
+        if mtu < HEADER.size + 6:
+            raise ValueError("mtu 过小")
+        self.mtu = mtu
+        self.log = log or (lambda m: None)
+        self._parser = RTCMParser()
+        self._buf = bytearray(max(mtu, HEADER.size + 3 + 1023 + 3))
+        self._mv = memoryview(self._buf)
+        self._len = HEADER.size
+        # 已收到多消息标志=1 的 MSM、尚未收到本历元最后一条
+        self._in_epoch = False
+        self._lock = threading.Lock()
+        self.seq = 0
+        self.datagrams_sent = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.send_errors = 0
+        self.oversize_frames = 0
+
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1024 * 1024)
+        except OSError:
+            pass
+        if any(is_multicast(h) for h, _p in self.targets):
+            s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, int(multicast_loop))
+            if interface:
+                s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+        self._sock = s
+
+    def send(self, data):
+        """输入原始 RTCM 数据块（可含半帧），按帧打包发送。"""
+        with self._lock:
+            for msg_num, frame in self._parser.feed_frames(data):
+                self._add(msg_num, frame)
+            self._flush_outside_epoch()
+
+    def send_frames(self, frames: Iterable[Tuple[int, bytes]]):
+        """输入已分好的完整帧 (msg_num, frame)。"""
+        with self._lock:
+            for msg_num, frame in frames:
+                self._add(msg_num, frame)
+            self._flush_outside_epoch()
+
+    def _flush_outside_epoch(self):
+        if not self._in_epoch and self._len > HEADER.size:
+            self._emit(0)
+
+    def flush(self):
+        """立即发出未满的报文（不标记历元结束）。"""
+        with self._lock:
+            if self._len > HEADER.size:
+                self._emit(0)
+
+    def _add(self, msg_num: int, frame):
+        n = len(frame)
+        room = self.mtu - self._len
+        if n > room and self._len > HEADER.size:
+            self._emit(0)
+            room = self.mtu - self._len
+        if n > room:
+            # 单帧超过 mtu（mtu 设得过小）：单独成包，由 IP 层分片
+            self.oversize_frames += 1
+        self._mv[self._len:self._len + n] = frame
+        self._len += n
+        self.frames_sent += 1
+        if is_msm(msg_num):
+            hdr = decode_msm_header(memoryview(frame)[3:-3])
+            if hdr:
+                self._in_epoch = bool(hdr.multiple_message)
+                if not hdr.multiple_message:
+                    self._emit(FLAG_EPOCH_END)
+
+    def _emit(self, flags: int):
+        HEADER.pack_into(self._buf, 0, MAGIC, VERSION, flags, self.seq)
+        self.seq = (self.seq + 1) % _SEQ_MOD
+        view = self._mv[:self._len]
+        sendto = self._sock.sendto
+        for target in self.targets:
+            try:
+                sendto(view, target)
+                self.bytes_sent += self._len
+            except OSError as e:
+                self.send_errors += 1
+                if self.send_errors in (1, 10, 100) or self.send_errors % 1000 == 0:
+                    self.log(f"UDP 发送失败 {target[0]}:{target[1]}: {e}（累计 {self.send_errors} 次）")
+        self.datagrams_sent += 1
+        self._len = HEADER.size
+
+    def close(self):
+        self.flush()
+        self._sock.close()
+
+
+__all__ = [
+    "FLAG_EPOCH_END",
+    "SeqTracker",
+    "UdpSink",
+    "is_multicast",
+    "parse_target",
+    "unpack_datagram",
+]
@@ -0,0 +1,128 @@
+"""暖启动缓存：新接入/重新打开的输出立即获得可用于收敛的数据。
+
+背景：流动站上电或串口重新打开后，需要等到下一条 1005/1006/1033/1230
+（不同挂载点 5~30s 不等）才能开始解算。本模块保存：
+- 最近的静态消息（基站坐标、天线信息、GLONASS 码相位偏差等），按类型各保留一条
+- 最近一个完整的 MSM 历元（以多消息标志=0 结束的全部 MSM 帧）
+
+输出（重新）打开时，通过 snapshot() 取出这些帧，由 SerialForwarder 按设定
+速率分帧限速突发发送，之后再继续实时数据。
+
+add() 可接收 memoryview（如 FrameRing 的帧视图）：MSM 帧复制进两块预分配的
+历元缓冲（累积中 / 最近完整）交替使用，实时路径上不为每帧分配 bytes。
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Union
+
+from .rtcm_msm import decode_msm_header, is_msm
+
+# 静态消息：基站坐标(1005/1006)、天线描述(1007/1008/1033)、系统参数(1013)、GLONASS 码相位偏差(1230)
+STATIC_TYPES: FrozenSet[int] = frozenset({1005, 1006, 1007, 1008, 1013, 1033, 1230})
+# 发送顺序：先坐标与天线，再其他
+_STATIC_ORDER = (1005, 1006, 1033, 1007, 1008, 1230, 1013)
+
+FrameLike = Union[bytes, bytearray, memoryview]
+
+
+class _EpochArena:
+    """预分配的历元帧缓冲：frames 依次追加，ends 记录各帧结束偏移。"""
+
+    __slots__ = ("buf", "size", "ends", "overflow")
+
+    def __init__(self, capacity: int):
+        self.buf = bytearray(capacity)
+        self.size = 0
+        self.ends: List[int] = []
+        self.overflow = False
+
+    def reset(self):
+        self.size = 0
+        self.ends.clear()
+        self.overflow = False
+
+    def append(self, frame: FrameLike):
+        n = len(frame)
+        if self.size + n > len(self.buf):
+            self.overflow = True
+            return
+        self.buf[self.size:self.size + n] = frame
+        self.size += n
+        self.ends.append(self.size)
+
+    def frames(self) -> List[bytes]:
+        out: List[bytes] = []
+        start = 0
+        for end in self.ends:
+            out.append(bytes(self.buf[start:end]))
+            start = end
+        return out
+
+
+class WarmStartCache:
+    def __init__(self, static_types: FrozenSet[int] = STATIC_TYPES,
+                 max_epoch_age: float = 5.0, max_static_age: float = 600.0,
+                 max_epoch_bytes: int = 16 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        self.static_types = static_types
+        self.max_epoch_age = max_epoch_age
+        self.max_static_age = max_static_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        # msg_num -> (接收时间, 帧)
+        self._static: Dict[int, tuple] = {}
+        self._epoch = _EpochArena(max_epoch_bytes)
+        self._epoch_tow: Optional[int] = None
+        self._last = _EpochArena(max_epoch_bytes)
+        self._last_epoch_time = 0.0
+
+    def add(self, msg_num: int, frame: FrameLike, now: Optional[float] = None):
+        """喂入一帧完整 RTCM（含 D3 头与 CRC）。"""
+        t = self.clock() if now is None else now
+        if msg_num in self.static_types:
+            with self._lock:
+                self._static[msg_num] = (t, bytes(frame))
+            return
+        if not is_msm(msg_num):
+            return
+        hdr = decode_msm_header(frame[3:-3])
+        if hdr is None:
+            return
+        with self._lock:
+            if self._epoch_tow is not None and hdr.tow_ms != self._epoch_tow:
+                # 上一历元缺少结束消息：不完整，丢弃
+                self._epoch.reset()
+            self._epoch_tow = hdr.tow_ms
+            self._epoch.append(frame)
+            if not hdr.multiple_message:
+                if not self._epoch.overflow:
+                    # 交换两块缓冲，避免复制
+                    self._last, self._epoch = self._epoch, self._last
+                    self._last_epoch_time = t
+                self._epoch.reset()
+                self._epoch_tow = None
+
+    def snapshot(self, now: Optional[float] = None) -> List[bytes]:
+        """返回用于暖启动的帧列表：静态消息在前，最近完整历元在后。"""
+        t = self.clock() if now is None else now
+        frames: List[bytes] = []
+        with self._lock:
+            order = list(_STATIC_ORDER) + sorted(set(self._static) - set(_STATIC_ORDER))
+            for msg_num in order:
+                item = self._static.get(msg_num)
+                if item and t - item[0] <= self.max_static_age:
+                    frames.append(item[1])
+            if self._last.ends and t - self._last_epoch_time <= self.max_epoch_age:
+                frames.extend(self._last.frames())
+        return frames
+
+    def clear(self):
+        with self._lock:
+            self._static.clear()
+            self._epoch.reset()
+            self._epoch_tow = None
+            self._last.reset()
+
+
+__all__ = ["WarmStartCache", "STATIC_TYPES"]
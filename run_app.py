@@ -1,4 +1,8 @@
-from rtk_lora.app import main
+# 先导入启动计时模块：其导入时刻作为启动耗时的起点
+from rtk_lora.startup import STARTUP
+
+with STARTUP.phase("import_app"):
+    from rtk_lora.app import main
 
 if __name__ == "__main__":
     main()
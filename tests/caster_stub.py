@@ -0,0 +1,80 @@
+"""测试用本地替身 Caster：按脚本对每个连接做出（可能故意异常的）响应。"""
+from __future__ import annotations
+import socket
+import threading
+import time
+from typing import Callable, List
+
+Behaviour = Callable[[socket.socket], None]
+
+
+def refuse(conn: socket.socket):
+    """接受后立即关闭。"""
+    conn.close()
+
+
+def go_silent(hold: float = 5.0, payload: bytes = b"\xd3\x00\x00\x00\x00\x00") -> Behaviour:
+    """回应 ICY 200 OK、发送少量数据，然后保持连接但不再发送（模拟半开连接）。"""
+    def run(conn: socket.socket):
+        conn.recv(4096)
+        conn.sendall(b"ICY 200 OK\r\n\r\n" + payload)
+        time.sleep(hold)
+        conn.close()
+    return run
+
+
+def stream(chunk: bytes = b"\xd3\x00\x00\x00\x00\x00", interval: float = 0.02,
+           duration: float = 5.0) -> Behaviour:
+    """正常持续推流。"""
+    def run(conn: socket.socket):
+        conn.recv(4096)
+        conn.sendall(b"ICY 200 OK\r\n\r\n")
+        end = time.monotonic() + duration
+        try:
+            while time.monotonic() < end:
+                conn.sendall(chunk)
+                time.sleep(interval)
+        except OSError:
+            pass
+        conn.close()
+    return run
+
+
+class StubCaster:
+    def __init__(self, behaviours: List[Behaviour], host: str = "127.0.0.1"):
+        self.behaviours = behaviours
+        self._srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._srv.bind((host, 0))
+        self._srv.listen(8)
+        self.host, self.port = self._srv.getsockname()[:2]
+        self.accept_times: List[float] = []
+        self.received: List[bytes] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self) -> "StubCaster":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._srv.close()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._srv.accept()
+            except OSError:
+                return
+            idx = len(self.accept_times)
+            self.accept_times.append(time.monotonic())
+            b = self.behaviours[min(idx, len(self.behaviours) - 1)]
+            threading.Thread(target=self._handle, args=(b, conn), daemon=True).start()
+
+    @staticmethod
+    def _handle(b: Behaviour, conn: socket.socket):
+        try:
+            b(conn)
+        except OSError:
+            pass
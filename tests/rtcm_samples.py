@@ -0,0 +1,110 @@
+"""测试用 RTCM 帧构造工具。"""
+from __future__ import annotations
+from typing import Iterable, List
+
+from rtk_lora.rtcm_parser import crc24q
+
+
+class BitWriter:
+    def __init__(self):
+        self.bits: List[int] = []
+
+    def uint(self, value: int, n: int) -> "BitWriter":
+        for i in range(n - 1, -1, -1):
+            self.bits.append((value >> i) & 1)
+        return self
+
+    def int(self, value: int, n: int) -> "BitWriter":
+        return self.uint(value & ((1 << n) - 1), n)
+
+    def to_bytes(self) -> bytes:
+        bits = self.bits + [0] * (-len(self.bits) % 8)
+        out = bytearray()
+        for i in range(0, len(bits), 8):
+            b = 0
+            for bit in bits[i:i + 8]:
+                b = (b << 1) | bit
+            out.append(b)
+        return bytes(out)
+
+
+def mask(ids: Iterable[int], nbits: int) -> int:
+    m = 0
+    for i in ids:
+        m |= 1 << (nbits - i)
+    return m
+
+
+def msm_header(bw: BitWriter, msg_num: int, station: int, epoch: int, mmb: int,
+               sats: List[int], sigs: List[int], cells: List[int] = None) -> BitWriter:
+    bw.uint(msg_num, 12).uint(station, 12).uint(epoch, 30).uint(mmb, 1).uint(0, 3)
+    bw.uint(0, 7).uint(0, 2).uint(0, 2).uint(0, 1).uint(0, 3)
+    bw.uint(mask(sats, 64), 64).uint(mask(sigs, 32), 32)
+    ncell = len(sats) * len(sigs)
+    if cells is None:
+        cells = [1] * ncell
+    for c in cells:
+        bw.uint(c, 1)
+    return bw
+
+
+def msm_payload(msg_num: int, epoch: int, sats: List[int], sigs: List[int],
+                mmb: int = 0, station: int = 1, cells: List[int] = None) -> bytes:
+    """只含消息头的 MSM payload（观测数据部分以 0 填充）。"""
+    bw = msm_header(BitWriter(), msg_num, station, epoch, mmb, sats, sigs, cells)
+    bw.uint(0, 8 * 16)
+    return bw.to_bytes()
+
+
+def msm_obs_payload(msg_num: int, epoch: int, sats: List[tuple], sigs: List[int],
+                    cells: List[tuple], mmb: int = 0, station: int = 1) -> bytes:
+    """带观测数据的 MSM4~7 payload（全部单元存在）。
+
+    sats: [(卫星号, 整毫秒, 扩展信息, 毫秒小数(1/1024), 粗变化率)]，MSM4/6 忽略后两项外的扩展字段
+    cells: 按卫星优先顺序 [(精伪距, 精相位, 锁定, 半周, 载噪比, 精变化率)]
+    """
+    t = msg_num % 10
+    bw = msm_header(BitWriter(), msg_num, station, epoch, mmb, [s[0] for s in sats], sigs)
+    full = t in (5, 7)
+    for s in sats:
+        bw.uint(s[1], 8)
+    if full:
+        for s in sats:
+            bw.uint(s[2], 4)
+    for s in sats:
+        bw.uint(s[3], 10)
+    if full:
+        for s in sats:
+            bw.int(s[4], 14)
+    widths = (15, 22, 4, 1, 6) if t in (4, 5) else (20, 24, 10, 1, 10)
+    for k, w in enumerate(widths):
+        for c in cells:
+            bw.int(c[k], w)
+    if full:
+        for c in cells:
+            bw.int(c[5], 15)
+    return bw.to_bytes()
+
+
+def payload_1005(station: int, x_m: float, y_m: float, z_m: float) -> bytes:
+    """1005 payload：ECEF 坐标单位 0.0001m。"""
+    bw = BitWriter().uint(1005, 12).uint(station, 12).uint(0, 6).uint(0b1000, 4)
+    bw.int(round(x_m * 10000), 38).uint(0, 2)
+    bw.int(round(y_m * 10000), 38).uint(0, 2)
+    bw.int(round(z_m * 10000), 38)
+    return bw.to_bytes()
+
+
+def payload_1006(station: int, x_m: float, y_m: float, z_m: float, height_m: float) -> bytes:
+    """1006 payload：1005 + 16 位天线高（0.0001m）。"""
+    bw = BitWriter().uint(1006, 12).uint(station, 12).uint(0, 6).uint(0b1000, 4)
+    bw.int(round(x_m * 10000), 38).uint(0, 2)
+    bw.int(round(y_m * 10000), 38).uint(0, 2)
+    bw.int(round(z_m * 10000), 38).uint(round(height_m * 10000), 16)
+    return bw.to_bytes()
+
+
+def frame(payload: bytes) -> bytes:
+    n = len(payload)
+    body = bytes([0xD3, n >> 8, n & 0xFF]) + payload
+    return body + crc24q(body).to_bytes(3, "big")
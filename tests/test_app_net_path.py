@@ -0,0 +1,102 @@
+import os
+import pty
+import threading
+
+import pytest
+
+from rtk_lora.app import AppState, RTKLoRaApp
+from rtk_lora.gga import build_gga
+from rtk_lora.rtcm_parser import RTCMParser
+
+from rtcm_samples import frame, msm_payload, payload_1005
+from test_nmea_tap import nav_pvt
+
+
+class FakeSerial:
+    def __init__(self):
+        self.out = bytearray()
+        self.lock = threading.Lock()
+
+    def send(self, data):
+        with self.lock:
+            self.out += bytes(data)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # 不创建窗口：只构造网络/基站数据路径用到的状态
+    monkeypatch.chdir(tmp_path)
+    a = RTKLoRaApp.__new__(RTKLoRaApp)
+    a.state = AppState()
+    a._log = lambda m: None
+    a._forwarded = True
+    a.state.serial = FakeSerial()
+    return a
+
+
+def _ntrip_feed(app, data, step):
+    # 与 NTRIPClient._on_data 相同的回调顺序：本块内的完整帧逐帧回调，再交出原始数据块
+    parser = RTCMParser()
+    for i in range(0, len(data), step):
+        chunk = data[i:i + step]
+        for msg_num, f in parser.feed_frames(chunk):
+            app._on_net_frame(msg_num, memoryview(f))
+        app._on_rtcm(memoryview(chunk))
+
+
+def test_ntrip_and_net_input_frames_do_not_interleave(app):
+    app.state.net_inputs = True
+    ntrip = [frame(msm_payload(1074, 100000 + i, [1, 2, 3], [2], mmb=0)) for i in range(300)]
+    extra = [(1005, frame(payload_1005(9, -2148744.1, 4426641.2, 4044655.9 + i))) for i in range(300)]
+    t = threading.Thread(target=_ntrip_feed, args=(app, b"".join(ntrip), 13))
+    t.start()
+    for i in range(0, len(extra), 3):
+        app._on_input_frames(extra[i:i + 3])
+    t.join()
+    parser = RTCMParser(verify_crc=True)
+    got = [f for _m, f in parser.feed_frames(bytes(app.state.serial.out))]
+    assert parser.crc_errors == 0 and not parser.buf
+    # 两路各自保持顺序，且全部转发
+    assert [f for f in got if f in set(ntrip)] == ntrip
+    assert [f for f in got if f not in set(ntrip)] == [f for _m, f in extra]
+
+
+def test_rover_nmea_ubx_on_serial_rx_does_not_hold_backup(app):
+    app.state.cfg['mode'] = 'backup'
+    f1005 = frame(payload_1005(7, -2148744.1, 4426641.2, 4044655.9))
+    # 串口 RX 上只有流动站的 GGA 与 NAV-PVT：不算基站在线，网络 RTK 放行
+    for _ in range(5):
+        app._on_serial_rx(build_gga(31.5, 121.25, 12.0, fix_quality=4, utc=0))
+        app._on_serial_rx(nav_pvt(31.6, 121.3, 40.0, 35.0))
+    assert app.state.base_last_rx_time == 0.0
+    _ntrip_feed(app, f1005, len(f1005))
+    assert app.state.forward_enabled and bytes(app.state.serial.out) == f1005
+    # 收到有效的基站 RTCM 帧后抑制转发
+    app._on_serial_rx(f1005)
+    _ntrip_feed(app, f1005, len(f1005))
+    assert not app.state.forward_enabled and bytes(app.state.serial.out) == f1005
+
+
+class FakeWidget:
+    def config(self, **kw):
+        pass
+
+
+def test_start_failure_tears_down_started_subsystems(app):
+    master, slave = pty.openpty()
+    app._save_from_widgets = lambda: None
+    app.btn_start = app.lbl_status = FakeWidget()
+    cfg = app.state.cfg
+    cfg['serial']['port'] = os.ttyname(slave)
+    cfg['inputs'] = [{"type": "udp", "port": 0, "role": "net"}]
+    cfg['pipelines'] = [{"name": "bad", "sinks": [{"type": "nope"}]}]
+    try:
+        with pytest.raises(ValueError):
+            app._start()
+        # 流水线配置无效：已打开的串口、附加输入与 NTRIP 客户端全部关闭
+        st = app.state
+        assert st.serial is None and st.inputs is None and st.ntrip is None
+        assert st.pipeline_ctx is None and not st.running
+    finally:
+        os.close(master)
+        os.close(slave)
@@ -0,0 +1,96 @@
+import math
+
+from rtk_lora.base_monitor import BaseMonitor, ecef_delta_to_enu
+from rtk_lora.rtcm_1005 import parse_1005
+
+from rtcm_samples import payload_1005
+
+BASE = (-2148744.1, 4426641.2, 4044655.9)
+
+
+def info(station, x, y, z):
+    return parse_1005(payload_1005(station, x, y, z))
+
+
+def enu_shift(e, n, u, at=BASE):
+    # 在 BASE 处把 ENU 位移转为 ECEF 坐标（旋转矩阵的转置）
+    ref = info(1, *at)
+    lat, lon = math.radians(ref.lat_deg), math.radians(ref.lon_deg)
+    sl, cl, so, co = math.sin(lat), math.cos(lat), math.sin(lon), math.cos(lon)
+    return (at[0] - so * e - sl * co * n + cl * co * u,
+            at[1] + co * e - sl * so * n + cl * so * u,
+            at[2] + cl * n + sl * u)
+
+
+def test_enu_offset_matches_constructed_displacement():
+    ref = info(1, *BASE)
+    x, y, z = enu_shift(120.0, -35.5, 2.25)
+    e, n, u = ecef_delta_to_enu(x - BASE[0], y - BASE[1], z - BASE[2], ref.lat_deg, ref.lon_deg)
+    assert abs(e - 120.0) < 1e-3 and abs(n + 35.5) < 1e-3 and abs(u - 2.25) < 1e-3
+
+    mon = BaseMonitor()
+    mon.feed("base", ref, 0.0)
+    mon.feed("net", info(9, x, y, z), 0.0)
+    e, n, u = mon.offset_enu()
+    assert abs(e - 120.0) < 1e-3 and abs(n + 35.5) < 1e-3 and abs(u - 2.25) < 1e-3
+
+
+def test_running_mean_and_std_without_events():
+    events = []
+    mon = BaseMonitor(jump_threshold_m=0.05, on_event=lambda *a: events.append(a))
+    # 东向 ±1cm 交替抖动
+    for i in range(200):
+        d = 0.01 if i % 2 else -0.01
+        assert mon.feed("base", info(3, *enu_shift(d, 0.0, 0.0)), float(i)) == []
+    snap = mon.current("base")
+    assert events == [] and snap.count == 200 and snap.station_id == 3
+    assert all(abs(a - b) < 1e-4 for a, b in zip(snap.mean_ecef, BASE))
+    e_std, n_std, u_std = snap.std_enu_m
+    assert abs(e_std - 0.01) < 1e-3 and n_std < 1e-3 and u_std < 1e-3
+
+
+def test_jump_detected_on_first_moved_message_and_stats_restart():
+    events = []
+    mon = BaseMonitor(jump_threshold_m=0.05, on_event=lambda *a: events.append(a))
+    for i in range(10):
+        mon.feed("base", info(3, *BASE), float(i))
+    moved = enu_shift(0.0, 0.30, -0.10)
+    assert mon.feed("base", info(3, *moved), 10.0) == ["jump"]
+    stream, kind, detail = events[0]
+    assert (stream, kind, detail["station_id"], detail["after"]) == ("base", "jump", 3, 10)
+    assert abs(detail["n_m"] - 0.30) < 1e-3 and abs(detail["u_m"] + 0.10) < 1e-3
+    snap = mon.current("base")
+    m = info(3, *moved)
+    assert snap.count == 1 and snap.jumps == 1
+    assert snap.mean_ecef == (m.ecef_x_m, m.ecef_y_m, m.ecef_z_m)
+    assert mon.feed("base", info(3, *moved), 11.0) == []
+
+
+def test_station_change_detected_and_previous_stats_kept():
+    events = []
+    mon = BaseMonitor(on_event=lambda *a: events.append(a))
+    for i in range(5):
+        mon.feed("net", info(100, *BASE), float(i))
+    other = enu_shift(3000.0, 4000.0, 12.0)
+    assert mon.feed("net", info(200, *other), 5.0) == ["station_changed"]
+    _, kind, detail = events[-1]
+    assert (detail["from"], detail["to"]) == (100, 200)
+    assert abs(detail["h_m"] - 5000.0) < 1.0 and abs(detail["v_m"] - 12.0) < 1.0
+    # 本地基站流不受影响；切回原站沿用原统计
+    assert mon.current("base") is None
+    mon.feed("net", info(100, *BASE), 6.0)
+    assert mon.current("net").count == 6
+
+
+def test_switch_back_with_jump_reports_both_events():
+    events = []
+    mon = BaseMonitor(on_event=lambda *a: events.append(a))
+    for i in range(5):
+        mon.feed("net", info(100, *BASE), float(i))
+    mon.feed("net", info(200, *enu_shift(3000.0, 0.0, 0.0)), 5.0)
+    # 切回 100，但其坐标已移动 0.5m
+    moved = enu_shift(0.5, 0.0, 0.0)
+    assert mon.feed("net", info(100, *moved), 6.0) == ["station_changed", "jump"]
+    assert [k for _s, k, _d in events[-2:]] == ["station_changed", "jump"]
+    assert events[-1][2]["station_id"] == 100 and abs(events[-1][2]["e_m"] - 0.5) < 1e-3
+    assert mon.current("net").jumps == 1
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from rtk_lora.decode_cache import DecodeCache
+from rtk_lora.rtcm_1005 import Rtcm1005, parse_1005
+
+from rtcm_samples import frame, payload_1005
+
+# 北京附近某基站 ECEF
+P1 = payload_1005(7, -2148744.1, 4426641.2, 4044655.9)
+P2 = payload_1005(7, -2148744.1, 4426641.2, 4044656.9)
+
+
+def test_repeated_payload_hits_cache():
+    cache = DecodeCache()
+    first = cache.decode(1005, P1)
+    assert isinstance(first, Rtcm1005)
+    assert first == parse_1005(P1)
+    # 帧视图切片（memoryview）与 bytes 得到同一缓存条目
+    view = memoryview(frame(P1))[3:-3]
+    assert cache.decode(1005, view) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    second = cache.decode(1005, P2)
+    assert second is not first and abs(second.ecef_z_m - first.ecef_z_m - 1.0) < 1e-3
+    assert cache.misses == 2
+
+
+def test_results_are_immutable():
+    info = DecodeCache().decode(1005, P1)
+    with pytest.raises(Exception):
+        info.lat_deg = 0.0
+
+
+def test_lru_eviction_and_unknown_types():
+    cache = DecodeCache(capacity=2)
+    p3 = payload_1005(8, 1.0e6, 2.0e6, 3.0e6)
+    cache.decode(1005, P1)
+    cache.decode(1005, P2)
+    cache.decode(1005, P1)  # P1 变为最近使用
+    cache.decode(1005, p3)  # 淘汰 P2
+    assert len(cache) == 2
+    hits = cache.hits
+    cache.decode(1005, P1)
+    assert cache.hits == hits + 1
+    cache.decode(1005, P2)
+    assert cache.misses == 4
+    # 无解码器的类型不进入缓存
+    assert cache.decode(1077, P1) is None
+    assert not cache.supports(1077)
+
+
+def test_register_decoder_and_negative_results_cached():
+    calls = []
+
+    def dec(payload):
+        calls.append(payload)
+        return None
+
+    cache = DecodeCache(decoders={1033: dec})
+    assert cache.decode(1033, b"\x40\x90bad") is None
+    assert cache.decode(1033, b"\x40\x90bad") is None
+    assert len(calls) == 1
+    cache.register(1033, lambda p: ("v2", len(p)))
+    assert cache.decode(1033, b"\x40\x90bad") == ("v2", 5)
+
+
+def test_concurrent_access():
+    cache = DecodeCache(capacity=4)
+    payloads = [payload_1005(i, 1.0e6 + i, 2.0e6, 3.0e6) for i in range(8)]
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(50):
+                for i, p in enumerate(payloads):
+                    assert cache.decode(1005, p).reference_station_id == i
+        except Exception as e:  # noqa
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(cache) <= 4
+    assert cache.hits + cache.misses == 4 * 50 * 8
@@ -19,3 +19,31 @@ def test_build_gga_basic():
     assert fields[7].isdigit()
     # 海拔
     assert float(fields[9]) == 10.5
+
+
+def _checksum_ok(s: str) -> bool:
+    body, cs = s[1:].rstrip('\r\n').split('*')
+    c = 0
+    for ch in body:
+        c ^= ord(ch)
+    return f"{c:02X}" == cs
+
+
+def test_build_gga_minutes_carry_and_hemispheres():
+    # 59.99999 分四舍五入后进位到下一度，不能出现 "60.0000"
+    s = build_gga(-33.99999999, -70.999999999, -5.0, utc=0).decode()
+    fields = s.split(',')
+    assert fields[1] == '000000'
+    assert fields[2:6] == ['3400.0000', 'S', '07100.0000', 'W']
+    assert _checksum_ok(s)
+
+
+def test_build_gga_cache_tracks_inputs_and_time():
+    a = build_gga(31.5, 121.25, 10.0, utc=3600)
+    b = build_gga(31.5, 121.25, 10.0, utc=3661)
+    c = build_gga(31.6, 121.25, 10.0, fix_quality=5, num_sats=20, hdop=1.25, utc=3661)
+    assert a.split(b',')[1] == b'010000' and b.split(b',')[1] == b'010101'
+    assert a.split(b',')[2:] == b.split(b',')[2:]
+    assert c.split(b',')[2] == b'3136.0000' and c.split(b',')[6:9] == [b'5', b'20', b'1.2']
+    for g in (a, b, c):
+        assert _checksum_ok(g.decode())
@@ -0,0 +1,144 @@
+import random
+import socket
+import tracemalloc
+
+from rtk_lora.ingest import FrameRing
+from rtk_lora.rtcm_parser import RTCMParser
+
+from rtcm_samples import frame, msm_payload
+
+
+def _stream(n=200):
+    rng = random.Random(5)
+    frames = []
+    for i in range(n):
+        if i % 10 == 0:
+            frames.append(frame(bytes([1005 >> 4, (1005 & 0x0F) << 4]) + bytes(17)))
+        else:
+            frames.append(frame(msm_payload(1077, i, [1, 2, 3, 4], [2, 16]) + bytes(rng.randint(0, 300))))
+    return frames
+
+
+def _drain(ring, out):
+    while True:
+        item = ring.next_frame()
+        if item is None:
+            return
+        out.append((item[0], bytes(item[1])))
+
+
+def test_in_place_framing_any_split_with_noise():
+    frames = _stream()
+    data = b"\x00\x11garbage" + b"".join(frames)
+    ring = FrameRing(capacity=4096)
+    out = []
+    rng = random.Random(1)
+    i = 0
+    while i < len(data):
+        n = rng.randint(1, 700)
+        ring.write(data[i:i + n])
+        i += n
+        _drain(ring, out)
+    assert [f for _m, f in out] == frames
+    assert out[0][0] == 1005 and out[1][0] == 1077
+    assert ring.bytes_discarded == 9
+
+
+def test_recv_into_ingest_allocates_nothing_per_byte():
+    a, b = socket.socketpair()
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    b.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    chunk = b"".join(_stream(40))
+    ring = FrameRing()
+    seen = [0]
+
+    def consume():
+        while True:
+            item = ring.next_frame()
+            if item is None:
+                return
+            seen[0] += 1
+
+    # 预热（首次调用会产生少量一次性对象）
+    a.sendall(chunk)
+    while ring.bytes_in < len(chunk):
+        ring.recv_into(b)
+        consume()
+
+    rounds = 200
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(rounds):
+            a.sendall(chunk)
+            got = 0
+            while got < len(chunk):
+                got += ring.recv_into(b)
+                consume()
+        cur, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        a.close()
+        b.close()
+    total = rounds * len(chunk)
+    assert total > 1_000_000
+    # 处理 >1MB 数据，峰值额外内存仅为几个临时小对象（帧视图/元组）
+    assert peak - base < 2048
+    assert cur - base < 512
+    assert seen[0] == 40 * (rounds + 1)
+
+
+def test_legacy_recv_path_allocates_per_chunk():
+    # 对照：recv + RTCMParser 每次都会分配新的 bytes 与 payload 副本
+    a, b = socket.socketpair()
+    chunk = b"".join(_stream(40))
+    parser = RTCMParser()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(20):
+            a.sendall(chunk)
+            got = 0
+            while got < len(chunk):
+                data = b.recv(4096)
+                got += len(data)
+                parser.feed_messages(data)
+        _cur, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        a.close()
+        b.close()
+    assert peak - base > 4096
+
+
+def test_ntrip_client_hands_frame_views_downstream():
+    import threading
+    from rtk_lora.ntrip_client import NTRIPClient
+    from caster_stub import StubCaster, stream
+
+    frames = _stream(20)
+    caster = StubCaster([stream(chunk=b"".join(frames), interval=0.05)]).start()
+    got = []
+    chunks = []
+    done = threading.Event()
+
+    def on_frame(msg_num, view):
+        assert isinstance(view, memoryview)
+        got.append(bytes(view))
+        if len(got) >= len(frames):
+            done.set()
+
+    client = NTRIPClient(caster.host, caster.port, "M", "u", "p",
+                         get_position=lambda: (31.0, 121.0, 0.0),
+                         on_rtcm=lambda d: chunks.append(type(d)),
+                         on_frame=on_frame)
+    client.start()
+    try:
+        assert done.wait(3.0)
+        assert got[:len(frames)] == frames
+        assert chunks[0] is memoryview
+    finally:
+        client.stop()
+        caster.stop()
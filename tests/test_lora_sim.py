@@ -0,0 +1,75 @@
+from rtk_lora.lora_sim import LinkProfile, LoRaLink, replay
+from rtk_lora.serial_forwarder import SerialForwarder
+
+from rtcm_samples import BitWriter, frame, msm_header, payload_1005
+
+STATIC = frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9))
+
+
+def _msm(msg_num, tow, mmb, size):
+    bw = msm_header(BitWriter(), msg_num, 1, tow, mmb, [1, 3, 5, 7], [2, 16])
+    bw.uint(0, 8 * size)
+    return frame(bw.to_bytes())
+
+
+def _schedule(epochs=20, size=150):
+    """每秒一历元：GPS(多消息=1) + BDS(多消息=0)，每 5 历元附带 1005。"""
+    out = []
+    for k in range(epochs):
+        tow = 100000 + 1000 * k
+        data = _msm(1077, tow, 1, size) + _msm(1127, tow, 0, size)
+        if k % 5 == 0:
+            data = STATIC + data
+        out.append((float(k), data))
+    return out
+
+
+def _run(profile, schedule=None):
+    link = LoRaLink(profile)
+    fwd = SerialForwarder("SIM0", profile.baudrate,
+                          serial_factory=link.serial_factory, port_lister=lambda: [])
+    fwd.open()
+    summary = replay(link, fwd.send, schedule or _schedule())
+    fwd.close()
+    return link, summary
+
+
+def test_lossless_link_delivers_every_epoch_with_expected_latency():
+    p = LinkProfile(baudrate=57600, air_rate_bps=19200, max_packet=240, fill_timeout_s=0.02)
+    link, s = _run(p)
+    assert s.epochs == 20 and s.complete_epochs == 20
+    assert s.mean_completeness == 1.0
+    assert link.rover.crc_errors == 0 and link.packets_lost == 0
+    # 单历元数据量 < 2 包：延迟下限为纯空中时间，上限再加串口与组包超时
+    reports = link.rover.reports()
+    nbytes = len(_schedule()[1][1])
+    floor = nbytes * 8 / p.air_rate_bps
+    ceil = floor + 3 * p.packet_overhead_s + 2 * nbytes * p.byte_time + p.fill_timeout_s
+    assert all(floor < r.latency_s < ceil for r in reports if r.index % 5)
+
+
+def test_slow_air_rate_overflows_module_buffer():
+    _link, fast = _run(LinkProfile(air_rate_bps=19200))
+    link, slow = _run(LinkProfile(air_rate_bps=2400, buffer_size=500))
+    assert link.bytes_overflow > 0
+    assert slow.mean_completeness < fast.mean_completeness == 1.0
+    assert slow.complete_epochs < slow.epochs
+
+
+def test_duty_cycle_adds_latency():
+    _l1, free = _run(LinkProfile(air_rate_bps=9600, buffer_size=4000))
+    _l2, limited = _run(LinkProfile(air_rate_bps=9600, buffer_size=4000, duty_cycle=0.5))
+    assert limited.latency_p50_s > free.latency_p50_s
+
+
+def test_seeded_loss_is_deterministic_and_rover_resyncs():
+    p = LinkProfile(air_rate_bps=19200, max_packet=64, loss=0.1, seed=42)
+    link_a, a = _run(p)
+    link_b, b = _run(p)
+    assert a == b
+    assert link_a.packets_lost == link_b.packets_lost > 0
+    assert 0 < a.mean_completeness < 1.0
+    # 丢包后接收端仍能重新同步，后续完整历元照常统计
+    assert a.complete_epochs > 0
+    _l, other = _run(LinkProfile(air_rate_bps=19200, max_packet=64, loss=0.1, seed=7))
+    assert other != a
@@ -0,0 +1,138 @@
+import struct
+
+from rtk_lora.gga import build_gga
+from rtk_lora.nmea_tap import GgaScheduler, NmeaTap, parse_gga, parse_nav_pvt
+from rtk_lora.ntrip_client import NTRIPClient
+
+from rtcm_samples import frame, payload_1005
+
+F1005 = frame(payload_1005(7, -2148744.1, 4426641.2, 4044655.9))
+
+
+def nav_pvt(lat, lon, hmsl_m, height_m, num_sv=18, carr=2, fix_type=3, pdop=0.9):
+    p = bytearray(92)
+    flags = 0x01 | 0x02 | (carr << 6)
+    struct.pack_into("<BBxBiiii", p, 20, fix_type, flags, num_sv,
+                     round(lon * 1e7), round(lat * 1e7), round(height_m * 1000), round(hmsl_m * 1000))
+    struct.pack_into("<H", p, 76, round(pdop * 100))
+    body = bytes([0x01, 0x07]) + struct.pack("<H", len(p)) + bytes(p)
+    a = b = 0
+    for x in body:
+        a = (a + x) & 0xFF
+        b = (b + a) & 0xFF
+    return b"\xb5\x62" + body + bytes([a, b])
+
+
+def test_parse_gga_roundtrip_and_rejects_bad():
+    g = build_gga(31.2345678, -121.5, 56.78, fix_quality=5, num_sats=17, hdop=0.9, geoid_sep=-3.2)
+    fix = parse_gga(g, now=100.0)
+    assert abs(fix.lat_deg - 31.2345678) < 2e-6 and abs(fix.lon_deg + 121.5) < 2e-6
+    assert (fix.alt_m, fix.quality, fix.num_sats, fix.geoid_sep_m, fix.t) == (56.78, 5, 17, -3.2, 100.0)
+    bad = g[:20] + (b"9" if g[20:21] != b"9" else b"8") + g[21:]
+    assert parse_gga(bad) is None
+    assert parse_gga(build_gga(31.0, 121.0, 0.0, fix_quality=0)) is None  # 无定位
+
+
+def test_nav_pvt_quality_mapping():
+    fix = parse_nav_pvt(nav_pvt(22.5, 114.0, 30.0, 27.5)[6:-2], now=1.0)
+    assert (fix.quality, fix.num_sats, fix.source) == (4, 18, "ubx")
+    assert abs(fix.lat_deg - 22.5) < 1e-7 and fix.alt_m == 30.0 and fix.geoid_sep_m == -2.5
+    assert parse_nav_pvt(nav_pvt(22.5, 114.0, 30.0, 27.5, carr=1)[6:-2]).quality == 5
+    assert parse_nav_pvt(nav_pvt(22.5, 114.0, 30.0, 27.5, fix_type=0)[6:-2]) is None
+
+
+def test_tap_extracts_positions_from_mixed_stream_in_any_chunking():
+    gga = build_gga(31.5, 121.25, 12.0, fix_quality=4, utc=0)
+    pvt = nav_pvt(31.6, 121.3, 40.0, 35.0)
+    # RTCM 中混入 '$'、非 GGA 语句、NMEA 与 UBX
+    stream = (F1005 + b"\xd3$\x00" + b"$GPRMC,foo*00\r\n" + gga + F1005 + pvt + F1005) * 3
+    for size in (1, 7, 64, len(stream)):
+        fixes = []
+        tap = NmeaTap(on_fix=fixes.append, clock=lambda: 50.0)
+        for i in range(0, len(stream), size):
+            tap.feed(stream[i:i + size])
+        assert [f.source for f in fixes] == ["gga", "ubx"] * 3, size
+        assert tap.latest.lat_deg == fixes[-1].lat_deg
+        assert len(tap._buf) < 64
+
+
+def test_tap_fresh_respects_age():
+    now = [10.0]
+    tap = NmeaTap(clock=lambda: now[0])
+    tap.feed(build_gga(31.0, 121.0, 5.0))
+    assert tap.fresh(5.0) is not None
+    now[0] = 16.0
+    assert tap.fresh(5.0) is None
+
+
+def test_scheduler_sends_on_move_and_backs_off_when_still():
+    s = GgaScheduler(interval=5.0, max_interval=20.0, min_interval=1.0, move_threshold_m=50.0)
+    here = (31.0, 121.0, 10.0)
+    t = 0.0
+    sent = []
+    while t <= 60.0:
+        if s.due(here, t):
+            s.sent(here, t)
+            sent.append(t)
+        t += 0.5
+    # 首次立即，之后 5, 10, 20, 20 秒间隔
+    assert sent == [0.0, 5.0, 15.0, 35.0, 55.0]
+    # 移动约 111m：1s 最小间隔后立即发送，间隔复位
+    moved = (31.001, 121.0, 10.0)
+    assert not s.due(moved, 55.5)
+    assert s.due(moved, 56.0)
+    s.sent(moved, 56.0)
+    assert s.current_interval == 5.0 and s.sent_moving == 1
+    # 小幅移动不触发
+    assert not s.due((31.0012, 121.0, 10.0), 58.0)
+
+
+class _Sock:
+    def __init__(self):
+        self.sent = []
+
+    def sendall(self, b):
+        self.sent.append(b)
+
+
+def test_ntrip_client_uses_rover_fix_for_gga():
+    fix = [None]
+    client = NTRIPClient("h", 2101, "M", "", "", get_position=lambda: (31.0, 121.0, 10.0),
+                         on_rtcm=lambda b: None, gga_scheduler=GgaScheduler(move_threshold_m=50.0),
+                         get_fix=lambda: fix[0])
+    sock = _Sock()
+    sched = client.gga_scheduler
+    client._maybe_send_gga(sock, sched, 0.0)
+    assert sock.sent[-1].split(b",")[2] == b"3100.0000"
+    # 流动站飞离 1km：下一次检查立即上报流动站位置与质量
+    fix[0] = parse_gga(build_gga(31.01, 121.0, 80.0, fix_quality=5, num_sats=21), now=0.0)
+    client._maybe_send_gga(sock, sched, 1.5)
+    assert len(sock.sent) == 2
+    f = sock.sent[-1].split(b",")
+    assert f[2] == b"3100.6000" and f[6:8] == [b"5", b"21"]
+
+
+def test_ntrip_client_default_schedule_is_fixed_interval():
+    client = NTRIPClient("h", 2101, "M", "", "", get_position=lambda: (31.0, 121.0, 10.0),
+                         on_rtcm=lambda b: None, send_gga_interval=15.0)
+    sock = _Sock()
+    for t in range(0, 31):
+        client._maybe_send_gga(sock, client.gga_scheduler, float(t))
+    assert len(sock.sent) == 3  # 0, 15, 30
+
+
+def test_ntrip_client_polls_fallback_position_only_when_due():
+    calls = []
+
+    def get_position():
+        calls.append(1)
+        return (31.0, 121.0, 10.0)
+
+    client = NTRIPClient("h", 2101, "M", "", "", get_position=get_position, on_rtcm=lambda b: None,
+                         gga_scheduler=GgaScheduler(interval=5.0, max_interval=5.0),
+                         get_fix=lambda: None)
+    sock = _Sock()
+    # 接收循环每次迭代都会检查；回退位置只在到期时读取
+    for i in range(101):
+        client._maybe_send_gga(sock, client.gga_scheduler, i * 0.1)
+    assert len(sock.sent) == 3 and len(calls) == 3  # 0, 5, 10 秒
@@ -0,0 +1,115 @@
+import random
+import socket
+import threading
+import time
+
+from rtk_lora.connection import AddressCache, Backoff, StallWatchdog, happy_eyeballs_connect
+from rtk_lora.ntrip_client import NTRIPClient
+
+from caster_stub import StubCaster, go_silent, refuse, stream
+
+
+def _client(caster, on_rtcm, **kw):
+    return NTRIPClient(
+        caster.host, caster.port, "MOUNT", "u", "p",
+        get_position=lambda: (31.0, 121.0, 10.0),
+        on_rtcm=on_rtcm,
+        timeout=2.0,
+        **kw,
+    )
+
+
+def test_silent_caster_triggers_fast_reconnect():
+    # 第一次连接发完少量数据后静默（半开连接），第二次正常推流
+    caster = StubCaster([go_silent(hold=5.0), stream()]).start()
+    got = threading.Event()
+    counts = {"n": 0}
+
+    def on_rtcm(data):
+        counts["n"] += 1
+        if len(caster.accept_times) >= 2:
+            got.set()
+
+    client = _client(caster, on_rtcm, epoch_interval=0.05, stall_epochs=4)
+    client.start()
+    try:
+        assert got.wait(3.0), "未能在 3s 内从静默 Caster 恢复"
+        # 停滞判定 0.2s + 首次短退避(≤0.2s)，重连应远小于 1s
+        assert client.last_reconnect_time is not None
+        assert client.last_reconnect_time < 1.0
+        assert client.reconnects >= 1
+    finally:
+        client.stop()
+        caster.stop()
+
+
+def test_refusing_caster_retries_quickly_first():
+    caster = StubCaster([refuse, stream()]).start()
+    got = threading.Event()
+    client = _client(caster, lambda d: got.set())
+    t0 = time.monotonic()
+    client.start()
+    try:
+        assert got.wait(3.0)
+        assert time.monotonic() - t0 < 1.0
+    finally:
+        client.stop()
+        caster.stop()
+
+
+def test_backoff_short_first_and_bounded():
+    b = Backoff(first=0.2, base=1.0, factor=2.0, cap=8.0, jitter=0.5, rng=random.Random(1))
+    delays = [b.next() for _ in range(8)]
+    assert 0.1 <= delays[0] <= 0.2
+    assert all(d <= 8.0 for d in delays)
+    assert delays[-1] >= 4.0  # 上限附近（抖动最多减半）
+    b.reset()
+    assert b.next() <= 0.2
+
+
+def test_watchdog():
+    t = [0.0]
+    w = StallWatchdog(epoch_interval=1.0, max_missed_epochs=3, clock=lambda: t[0])
+    t[0] = 2.9
+    assert not w.stalled()
+    t[0] = 3.0
+    assert w.stalled()
+    w.kick()
+    assert not w.stalled()
+
+
+def test_happy_eyeballs_skips_dead_address():
+    # 一个拒绝连接的端口 + 一个可用端口
+    dead = socket.socket()
+    dead.bind(("127.0.0.1", 0))
+    dead_port = dead.getsockname()[1]
+    dead.close()
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(1)
+    good = srv.getsockname()
+    addrs = [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", dead_port)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", good),
+    ]
+    s = happy_eyeballs_connect(addrs, timeout=2.0, attempt_delay=1.0)
+    try:
+        assert s.getpeername() == good
+    finally:
+        s.close()
+        srv.close()
+
+
+def test_address_cache_falls_back_to_stale_entry():
+    calls = {"n": 0}
+
+    def resolver(host, port, family, stype):
+        calls["n"] += 1
+        if calls["n"] > 1:
+            raise socket.gaierror("dns down")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", port))]
+
+    cache = AddressCache(ttl=0.0, resolver=resolver)
+    first = cache.resolve("caster", 2101)
+    assert cache.resolve("caster", 2101) == first
+    assert calls["n"] == 2
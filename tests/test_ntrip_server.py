@@ -0,0 +1,121 @@
+import threading
+import time
+
+from rtk_lora.ntrip_server import NTRIPServer
+from rtk_lora.rtcm_parser import RTCMParser, check_frame_crc
+
+from caster_stub import StubCaster
+from rtcm_samples import frame, msm_payload
+
+F1005 = frame(bytes([1005 >> 4, (1005 & 0x0F) << 4]) + bytes(17))
+F1077 = frame(msm_payload(1077, 1000, [1, 2], [2]))
+
+
+def _collecting_caster(reply: bytes, received: list, got: threading.Event, need: int):
+    def run(conn):
+        buf = b""
+        while b"\r\n\r\n" not in buf:
+            buf += conn.recv(4096)
+        head, body = buf.split(b"\r\n\r\n", 1)
+        received.append(head)
+        conn.sendall(reply)
+        data = body
+        conn.settimeout(3.0)
+        while len(data) < need:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        received.append(data)
+        got.set()
+        time.sleep(0.5)
+        conn.close()
+    return run
+
+
+def test_v1_source_uploads_validated_frames():
+    corrupt = bytearray(F1077)
+    corrupt[10] ^= 0xFF
+    serial_rx = b"noise" + F1005 + bytes(corrupt) + F1077
+
+    # 与 app._on_serial_rx 相同：CRC 校验后再上传
+    parser = RTCMParser(verify_crc=True)
+    frames = [f for _m, f in parser.feed_frames(serial_rx)]
+    assert frames == [F1005, F1077]
+    assert parser.crc_errors >= 1
+
+    received, got = [], threading.Event()
+    need = len(F1005) + len(F1077)
+    caster = StubCaster([_collecting_caster(b"ICY 200 OK\r\n\r\n", received, got, need)]).start()
+    server = NTRIPServer(caster.host, caster.port, "BASE1", "secret")
+    server.start()
+    try:
+        for f in frames:
+            server.push(f)
+        assert got.wait(3.0)
+        assert received[0].startswith(b"SOURCE secret /BASE1\r\n")
+        assert received[1] == F1005 + F1077
+        assert all(check_frame_crc(f) for f in frames)
+        # 计数在 sendall 返回后更新，稍作等待
+        deadline = time.monotonic() + 2.0
+        while server.frames_sent < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server.frames_sent == 2
+    finally:
+        server.stop()
+        caster.stop()
+
+
+def test_v2_post_uses_chunked_encoding():
+    received, got = [], threading.Event()
+    chunk = f"{len(F1005):X}\r\n".encode() + F1005 + b"\r\n"
+    need = len(chunk)
+    caster = StubCaster([_collecting_caster(b"HTTP/1.1 200 OK\r\n\r\n", received, got, need)]).start()
+    server = NTRIPServer(caster.host, caster.port, "BASE2", "pw", username="me", version=2)
+    server.push(F1005)
+    server.start()
+    try:
+        assert got.wait(3.0)
+        assert received[0].startswith(b"POST /BASE2 HTTP/1.1\r\n")
+        assert b"Authorization: Basic bWU6cHc=" in received[0]
+        assert received[1] == chunk
+    finally:
+        server.stop()
+        caster.stop()
+
+
+def test_backpressure_drops_oldest_whole_frames():
+    server = NTRIPServer("127.0.0.1", 1, "M", "p", max_queue_bytes=3 * len(F1077))
+    results = [server.push(F1077) for _ in range(5)]
+    assert results[:3] == [True, True, True]
+    assert results[3:] == [False, False]
+    assert server.frames_dropped == 2
+    assert server.queued_bytes == 3 * len(F1077)
+
+
+def test_reconnects_after_caster_rejects():
+    received, got = [], threading.Event()
+
+    def reject(conn):
+        conn.recv(4096)
+        conn.sendall(b"ERROR - Bad Password\r\n")
+        conn.close()
+
+    caster = StubCaster([reject, _collecting_caster(b"ICY 200 OK\r\n\r\n", received, got, len(F1005))]).start()
+    server = NTRIPServer(caster.host, caster.port, "M", "p")
+    server.push(F1005)
+    server.start()
+    try:
+        assert got.wait(3.0)
+        assert received[1] == F1005
+        assert server.reconnects == 1
+    finally:
+        server.stop()
+        caster.stop()
+
+
+def test_crc24q_check_value():
+    from rtk_lora.rtcm_parser import crc24q
+    assert crc24q(b"123456789") == 0xCDE703
+    assert check_frame_crc(F1005)
+    assert not check_frame_crc(F1005[:-1] + bytes([F1005[-1] ^ 1]))
@@ -0,0 +1,134 @@
+import pytest
+
+from rtk_lora.lora_sim import LinkProfile, LoRaLink
+from rtk_lora.pipeline import (
+    Frame,
+    PipelineContext,
+    RateLimitStage,
+    STAGES,
+    Stage,
+    build_pipeline,
+    register_stage,
+)
+from rtk_lora.rtcm_parser import RTCMParser, check_frame_crc
+
+from rtcm_samples import frame, msm_payload, payload_1005
+
+F1005 = frame(payload_1005(7, -2148744.1, 4426641.2, 4044655.9))
+F1077 = frame(msm_payload(1077, 1000, [1, 2], [2], station=7))
+F1013 = frame(bytes([1013 >> 4, (1013 & 0x0F) << 4]) + bytes(8))
+
+
+def _capture_stage(seen):
+    class Capture(Stage):
+        def process(self, frames):
+            seen.extend(frames)
+            return frames
+    return Capture
+
+
+def test_file_replay_through_stages_to_serial_and_file(tmp_path):
+    src = tmp_path / "in.rtcm"
+    src.write_bytes(b"junk" + (F1005 + F1013 + F1077) * 3)
+    out = tmp_path / "out.rtcm"
+    link = LoRaLink(LinkProfile())
+    ctx = PipelineContext(serial_factory=link.serial_factory)
+    cfg = {
+        "name": "replay",
+        "source": {"type": "file", "path": str(src), "chunk": 37},
+        "stages": [{"type": "filter", "exclude": [1013]},
+                   {"type": "station_id", "station_id": 42}],
+        "sinks": [{"type": "serial", "port": "SIM1"}, {"type": "file", "path": str(out)}],
+    }
+    p = build_pipeline(cfg, ctx)
+    p.start()
+    assert p.source.done.wait(3.0)
+    p.stop()
+    ctx.close()
+
+    link.flush()
+    written = out.read_bytes()
+    frames = RTCMParser(verify_crc=True).feed_frames(written)
+    assert [m for m, _f in frames] == [1005, 1077] * 3
+    # 基站 ID 已改写且 CRC 重新计算
+    assert all(check_frame_crc(f) and (((f[4] & 0x0F) << 8) | f[5]) == 42 for _m, f in frames)
+    # 串口与文件收到相同字节
+    assert link.bytes_in == len(written)
+
+    m = {x.name: x for x in p.metrics()}
+    assert m["framer"].frames_out == 9
+    assert m["filter#0"].frames_in == 9 and m["filter#0"].frames_out == 6
+    assert m["serial#0"].frames_out == 6 and m["serial#0"].bytes_out == len(written)
+    assert m["file#1"].mean_age_ms is not None and m["file#1"].mean_us > 0
+
+
+def test_frames_are_shared_not_copied():
+    seen_a, seen_b = [], []
+    register_stage("capture_a")(_capture_stage(seen_a))
+    register_stage("capture_b")(_capture_stage(seen_b))
+    try:
+        p = build_pipeline({"stages": [{"type": "capture_a"}, {"type": "capture_b"}]}, PipelineContext())
+        p.push(F1005 + F1077)
+        assert len(seen_a) == 2
+        assert all(a is b for a, b in zip(seen_a, seen_b))
+        assert seen_a[0].data == F1005 and bytes(seen_a[1].payload) == F1077[3:-3]
+    finally:
+        del STAGES["capture_a"], STAGES["capture_b"]
+
+
+def test_rate_limit_decimation_and_token_bucket():
+    now = [0.0]
+    st = RateLimitStage({"min_interval": {"1005": 10}, "max_bytes_per_s": 100, "burst_bytes": 60},
+                        PipelineContext(), clock=lambda: now[0])
+    f5 = Frame(1005, F1005, 0.0)
+    big = Frame(1077, bytes(50), 0.0)
+    assert st.process([f5, big]) == [f5]  # 25 字节通过，剩余令牌不足 50
+    now[0] = 1.0
+    assert st.process([f5, big]) == [big]  # 1005 未到间隔
+    now[0] = 11.0
+    assert st.process([f5]) == [f5]
+    assert st.dropped == 2
+
+
+def test_unknown_types_rejected():
+    with pytest.raises(ValueError):
+        build_pipeline({"stages": [{"type": "nope"}]}, PipelineContext())
+    with pytest.raises(ValueError):
+        build_pipeline({"source": {"type": "nope"}}, PipelineContext())
+
+
+def test_ntrip_source_reuses_main_connection_frames():
+    ctx = PipelineContext()
+    ctx.main_ntrip = ("caster.example", 2101, "MOUNT")
+    seen = []
+    register_stage("capture_main")(_capture_stage(seen))
+    try:
+        p = build_pipeline({"name": "tap", "source": {"type": "ntrip"},
+                            "stages": [{"type": "capture_main"}]}, ctx)
+        p.start()
+        assert p.source.client is None  # 不另开 caster 会话
+        for f in (F1005, F1077):
+            ctx.net_frame((f[3] << 4) | (f[4] >> 4), memoryview(f))
+        assert seen == []
+        ctx.net_chunk()
+        assert [f.data for f in seen] == [F1005, F1077]
+        assert ctx.shares_main_ntrip({"host": "caster.example", "mountpoint": "/MOUNT"})
+        assert not ctx.shares_main_ntrip({"host": "caster.example", "mountpoint": "OTHER"})
+        p.stop()
+    finally:
+        STAGES.pop("capture_main", None)
+
+
+def test_incomplete_source_and_sink_rejected():
+    from rtk_lora.pipeline import Sink, Source
+
+    class NoWrite(Sink):
+        pass
+
+    class NoStart(Source):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite({}, PipelineContext())
+    with pytest.raises(TypeError):
+        NoStart({}, PipelineContext(), None)
@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+
+from rtk_lora.profiling import SamplingProfiler, StageProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    prof = StageProfiler()
+    t0 = prof.t0()
+    assert t0 == 0
+    prof.record("x", t0)
+    assert prof.snapshot() == []
+
+
+def test_histogram_percentiles():
+    prof = StageProfiler(enabled=True)
+    for ns in [1000] * 98 + [1_000_000, 2_000_000]:
+        prof.record("stage", time.perf_counter_ns() - ns)
+    (s,) = prof.snapshot()
+    assert s.stage == "stage" and s.count == 100
+    # log2 分桶：p50 落在 1us 所在桶（上界 < 2.1us），p99 落在 ~1ms 桶
+    assert 1.0 <= s.p50_us < 2.1
+    assert 1000 <= s.p99_us <= 2100
+    assert s.max_us >= 2000
+    prof.enabled = False
+    assert prof.t0() == 0
+    prof.reset()
+    assert prof.snapshot() == []
+
+
+def _busy_marker_function(stop):
+    while not stop.is_set():
+        sum(range(200))
+
+
+def test_sampling_profiler_outputs(tmp_path):
+    stop = threading.Event()
+    t = threading.Thread(target=_busy_marker_function, args=(stop,), name="busy", daemon=True)
+    t.start()
+    done = threading.Event()
+    sp = SamplingProfiler(interval=0.002)
+    folded = str(tmp_path / "p.folded")
+    sp.start(0.2, output=folded, on_done=lambda _p: done.set())
+    assert done.wait(3.0)
+    stop.set()
+    assert sp.samples > 10
+    lines = open(folded, encoding="utf-8").read().splitlines()
+    assert any(line.startswith("busy;") and "_busy_marker_function" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    out = tmp_path / "p.speedscope.json"
+    sp.write(str(out))
+    doc = json.loads(out.read_text(encoding="utf-8"))
+    prof = doc["profiles"][0]
+    assert prof["type"] == "sampled" and len(prof["samples"]) == len(prof["weights"])
+    names = {f["name"] for f in doc["shared"]["frames"]}
+    assert "_busy_marker_function" in names and "[busy]" in names
+
+
+def test_sampling_profiler_calls_on_done_when_write_fails(tmp_path):
+    # 输出目录不存在：写入失败也必须回调，GUI 才能恢复按钮
+    results = []
+    done = threading.Event()
+    sp = SamplingProfiler(interval=0.002)
+    sp.start(0.05, output=str(tmp_path / "missing" / "p.folded"),
+             on_done=lambda p: (results.append(p), done.set()))
+    assert done.wait(3.0)
+    assert results == [None]
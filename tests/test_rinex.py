@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+import os
+
+from rtk_lora.decode_cache import DecodeCache
+from rtk_lora.rinex import RinexConverter, RinexObsWriter, gps_time_from_tow
+from rtk_lora.rtcm_msm import CLIGHT
+
+from rtcm_samples import frame, msm_obs_payload, payload_1005
+
+NOW = datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc).timestamp()
+TOW0 = (86400 + 12 * 3600 + 18) * 1000  # 周一 12:00:18 GPS
+
+
+def _epoch_frames(tow, lock=600, glo_lock=9):
+    gps = msm_obs_payload(1077, tow, [(3, 70, 0, 512, -300), (12, 75, 0, 0, 120)], [2, 16], [
+        (1000, 4000, lock, 0, 45 * 16, 25),
+        (-2000, -8000, lock, 0, 40 * 16, 0),
+        (0, 0, lock, 0, 44 * 16, 0),
+        (5, 6, lock, 0, 30 * 16, 0),
+    ], mmb=1)
+    # GLONASS 历元时间：星期 1，莫斯科时 15:00:00（= UTC 12:00:00）
+    glo_epoch = (1 << 27) | (15 * 3600 * 1000 + (tow - TOW0) - 18000 + 18000)
+    glo = msm_obs_payload(1085, glo_epoch, [(5, 68, 6, 256, 10)], [2], [(100, 200, glo_lock, 0, 42, 0)])
+    return [frame(gps), frame(glo)]
+
+
+def _read(path):
+    with open(path, encoding="ascii") as f:
+        return f.read().splitlines()
+
+
+def test_gps_week_resolved_from_clock():
+    assert gps_time_from_tow(TOW0, NOW) == datetime(2024, 1, 15, 12, 0, 18)
+    # 周末边界：系统时钟在周六深夜、TOW 已回绕到新一周
+    sat_night = datetime(2024, 1, 20, 23, 59, 50, tzinfo=timezone.utc).timestamp()
+    assert gps_time_from_tow(5000, sat_night) == datetime(2024, 1, 21, 0, 0, 5)
+
+
+def test_converter_writes_rinex_epochs(tmp_path):
+    writer = RinexObsWriter(str(tmp_path), marker="TEST")
+    conv = RinexConverter(writer, clock=lambda: NOW)
+    conv.start()
+    conv.feed(1005, memoryview(frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9))))
+    for k in range(3):
+        # 第 3 个历元 GLONASS 锁定时间回退 -> LLI
+        for f in _epoch_frames(TOW0 + 1000 * k, glo_lock=9 if k < 2 else 2):
+            conv.feed(f[3] << 4 | f[4] >> 4, memoryview(f))
+    conv.feed(1230, b"\xd3\x00\x00")  # 无关消息忽略
+    conv.stop()
+
+    assert len(writer.files) == 1
+    name = os.path.basename(writer.files[0])
+    assert name == "TEST00XXX_R_20240151200_01H_01S_MO.rnx"
+    lines = _read(writer.files[0])
+    head = lines[:lines.index(next(line for line in lines if "END OF HEADER" in line)) + 1]
+    assert head[0][60:] == "RINEX VERSION / TYPE" and head[0][40] == "M"
+    assert any(line.startswith(" -2148744.1000  4426641.2000  4044655.9000") for line in head)
+    types = [line for line in head if "SYS / # / OBS TYPES" in line]
+    assert types[0].startswith("G    8 C1C L1C D1C S1C C2L L2L D2L S2L")
+    assert types[1].startswith("R    4 C1C L1C D1C S1C")
+    assert any(line.startswith("  1 R05 -1") for line in head if "SLOT" in line)
+
+    body = lines[len(head):]
+    epochs = [line for line in body if line.startswith(">")]
+    assert epochs[0] == "> 2024 01 15 12 00 18.0000000  0  3"
+    assert len(epochs) == 3 and writer.epochs_written == 3
+    g03 = body[1]
+    assert g03.startswith("G03")
+    pr = float(g03[3:17])
+    assert abs(pr - (70.5 + 1000 * 2 ** -29) * CLIGHT / 1000) < 1e-3
+    phase = float(g03[19:33])
+    assert abs(phase - (70.5 + 4000 * 2 ** -31) * CLIGHT / 1000 / (CLIGHT / 1575.42e6)) < 1e-3
+    assert g03[34] == "7"  # SSI = 45 dBHz / 6
+    r05 = [line for line in body if line.startswith("R05")]
+    assert r05[0][33] == " " and r05[2][33] == "1"
+    assert conv.frames_dropped == 0 and conv.errors == 0
+
+
+def test_rotation_by_period_and_new_codes(tmp_path):
+    writer = RinexObsWriter(str(tmp_path), marker="ROT", period_s=3600)
+    conv = RinexConverter(writer, clock=lambda: NOW)
+    conv.start()
+    # 12:59:58 ~ 13:00:01 跨越整点
+    base = TOW0 + (59 * 60 + 40) * 1000
+    for k in range(4):
+        gps = msm_obs_payload(1077, base + 1000 * k, [(3, 70, 0, 512, 0)], [2], [(1, 2, 600, 0, 640, 0)])
+        conv.feed(1077, frame(gps))
+    # 同一小时内新出现 L5 信号：提前轮换，新文件头包含合并后的观测码
+    gps5 = msm_obs_payload(1077, base + 4000, [(3, 70, 0, 512, 0)], [2, 22],
+                           [(1, 2, 600, 0, 640, 0), (1, 2, 600, 0, 640, 0)])
+    conv.feed(1077, frame(gps5))
+    conv.stop()
+    assert [os.path.basename(p)[9:27] for p in writer.files] == [
+        "_R_20240151259_01H", "_R_20240151300_01H", "_R_20240151300_01H"]
+    last = _read(writer.files[-1])
+    assert any(line.startswith("G    8 C1C L1C D1C S1C C5I") for line in last)
+
+
+def test_feed_never_blocks_when_queue_full(tmp_path):
+    conv = RinexConverter(RinexObsWriter(str(tmp_path)), max_queue=2)
+    f = frame(msm_obs_payload(1077, TOW0, [(3, 70, 0, 512, 0)], [2], [(1, 2, 600, 0, 640, 0)]))
+    results = [conv.feed(1077, f) for _ in range(4)]
+    assert results == [True, True, False, False]
+    assert conv.frames_dropped == 2
+
+
+def test_station_position_uses_shared_decode_cache(tmp_path):
+    cache = DecodeCache()
+    f1005 = frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9))
+    # App 转发路径已解码过同一条 1005：RINEX 线程直接命中缓存
+    cache.decode(1005, f1005[3:-3])
+    writer = RinexObsWriter(str(tmp_path))
+    conv = RinexConverter(writer, clock=lambda: NOW, decode_cache=cache)
+    conv.start()
+    conv.feed(1005, memoryview(f1005))
+    conv.stop()
+    assert cache.hits == 1 and cache.misses == 1
+    xyz = (-2148744.1, 4426641.2, 4044655.9)
+    assert all(abs(a - b) < 1e-3 for a, b in zip(writer.approx_xyz, xyz))
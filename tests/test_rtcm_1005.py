@@ -30,3 +30,15 @@ def test_ecef_to_lla_pole():
     # lon is undefined at poles; our implementation returns atan2(0,0)=0
     assert abs(lon - 0.0) < 1e-6
     assert abs(alt - 0.0) < 1e-2
+
+
+def test_parse_1006_antenna_height():
+    from rtcm_samples import payload_1005, payload_1006
+    from rtk_lora.rtcm_1005 import parse_1005, parse_1006
+
+    info = parse_1006(payload_1006(2001, -2148744.1, 4426641.2, 4044655.9, 1.5432))
+    assert info.reference_station_id == 2001
+    assert abs(info.ecef_x_m + 2148744.1) < 1e-6 and abs(info.antenna_height_m - 1.5432) < 1e-9
+    assert parse_1005(payload_1005(1, -2148744.1, 4426641.2, 4044655.9)).antenna_height_m == 0.0
+    # 消息号不符
+    assert parse_1006(payload_1005(1, -2148744.1, 4426641.2, 4044655.9) + b"\x00\x00") is None
@@ -0,0 +1,105 @@
+from rtk_lora.rtcm_msm import MsmEpochTracker, decode_msm_header, is_msm, to_gps_tow_ms
+
+from rtcm_samples import msm_payload
+
+
+def test_decode_gps_msm4_header():
+    sats = [2, 5, 13, 32]
+    sigs = [2, 16]
+    cells = [1, 1, 1, 0, 1, 1, 1, 1]
+    h = decode_msm_header(msm_payload(1074, 345600000, sats, sigs, mmb=1, station=77, cells=cells))
+    assert h.constellation == "GPS"
+    assert h.msm_type == 4
+    assert h.station_id == 77
+    assert h.tow_ms == 345600000
+    assert h.multiple_message
+    assert h.satellites == (2, 5, 13, 32)
+    assert h.signals == (2, 16)
+    assert h.num_cells == 7
+
+
+def test_high_satellite_numbers_and_non_msm():
+    h = decode_msm_header(msm_payload(1127, 1000, [1, 40, 63], [2]))
+    assert h.constellation == "BeiDou"
+    assert h.satellites == (1, 40, 63)
+    assert h.tow_ms == 15000  # BDT + 14s
+    assert decode_msm_header(msm_payload(1074, 0, [1], [2])[:10]) is None
+    assert not is_msm(1005)
+    assert not is_msm(1078)
+    assert is_msm(1097)
+
+
+def test_glonass_epoch_to_gps_tow():
+    dow, tod = 2, 3 * 3600 * 1000 + 5000
+    epoch = (dow << 27) | tod
+    assert to_gps_tow_ms("GLONASS", epoch) == 2 * 86400000 + 5000 + 18000
+
+
+def test_glonass_unknown_day_of_week_uses_nearest_day():
+    tod = 3 * 3600 * 1000 + 5000
+    epoch = (7 << 27) | tod
+    # 星期未知：与同一历元的 GPS 消息（周三）对齐，而不是按周日计
+    wed = 3 * 86400000 + 5000 + 18000
+    assert to_gps_tow_ms("GLONASS", epoch, ref_tow_ms=wed + 300) == wed
+    assert to_gps_tow_ms("GLONASS", epoch, ref_tow_ms=wed - 2000) == wed
+    # 跨周边界：周六深夜的参考时刻对应下周日的历元
+    epoch = (7 << 27) | (3 * 3600 * 1000 - 30000)
+    assert to_gps_tow_ms("GLONASS", epoch, ref_tow_ms=604800000 - 5000) == 604800000 - 12000
+    assert to_gps_tow_ms("GLONASS", (7 << 27) | tod, ref_tow_ms=1000) == 5000 + 18000
+
+
+def test_tracker_groups_constellations_into_epochs():
+    done = []
+    tr = MsmEpochTracker(on_epoch=done.append)
+    assert tr.feed(decode_msm_header(msm_payload(1074, 1000, [1, 2, 3], [2, 16], mmb=1))) == []
+    assert tr.feed(decode_msm_header(msm_payload(1094, 1000, [4, 5], [2], mmb=1))) == []
+    epochs = tr.feed(decode_msm_header(msm_payload(1124, 1000 - 14000 + 604800000, [7], [2, 8, 14], mmb=0)))
+    assert len(epochs) == 1 and epochs[0].complete
+    d = epochs[0].as_dict()
+    assert (d["GPS"].satellites, d["GPS"].signals, d["GPS"].cells) == (3, 2, 6)
+    assert d["BeiDou"].signals == 3
+    assert epochs[0].total_satellites == 6
+    # 缺少结束消息时，历元切换会被动结束上一历元
+    tr.feed(decode_msm_header(msm_payload(1074, 2000, [1], [2], mmb=1)))
+    epochs = tr.feed(decode_msm_header(msm_payload(1074, 3000, [1], [2], mmb=1)))
+    assert len(epochs) == 1 and not epochs[0].complete
+    assert done[-1].tow_ms == 2000
+
+
+def test_decode_msm7_observables():
+    from rtk_lora.rtcm_msm import CLIGHT, decode_msm
+    from rtcm_samples import msm_obs_payload
+
+    sats = [(3, 70, 0, 512, -300), (12, 75, 0, 0, 120)]
+    cells = [
+        (1000, 4000, 600, 0, 45 * 16, 25),
+        (-2000, -8000, 40, 1, 40 * 16, -16384),  # 精变化率无效
+        (0, -(1 << 23), 600, 0, 0, 0),  # 精相位无效、载噪比未给出
+        (5, 6, 0, 0, 30 * 16, 0),
+    ]
+    msg = decode_msm(msm_obs_payload(1077, 100000, sats, [2, 16], cells))
+    assert msg is not None and len(msg.signals) == 4
+    s0, s1, s2, _s3 = msg.signals
+    assert (s0.satellite, s0.signal) == (3, 2)
+    assert abs(s0.pseudorange_m - (70.5 + 1000 * 2 ** -29) * CLIGHT / 1000) < 1e-6
+    assert abs(s0.phaserange_m - (70.5 + 4000 * 2 ** -31) * CLIGHT / 1000) < 1e-6
+    assert abs(s0.phaserange_rate_m_s - (-300 + 0.0025)) < 1e-9
+    assert s0.cnr_dbhz == 45.0 and s0.lock_time_ms == (1 << 17) * (600 - 32 * 17)
+    assert s1.half_cycle and s1.phaserange_rate_m_s is None and s1.lock_time_ms == 40
+    assert s2.phaserange_m is None and s2.cnr_dbhz is None
+    assert msg.glonass_channels == (None, None)
+
+
+def test_decode_msm4_and_glonass_channel():
+    from rtk_lora.rtcm_msm import CLIGHT, decode_msm, lock_time_ms
+    from rtcm_samples import msm_obs_payload
+
+    msg = decode_msm(msm_obs_payload(1084, 0, [(5, 68, 0, 256, 0)], [2], [(100, 200, 9, 0, 42, 0)]))
+    s = msg.signals[0]
+    assert abs(s.pseudorange_m - (68.25 + 100 * 2 ** -24) * CLIGHT / 1000) < 1e-6
+    assert s.cnr_dbhz == 42 and s.lock_time_ms == 8192 and s.phaserange_rate_m_s is None
+    # MSM5 携带 GLONASS 频道号（扩展信息 - 7）
+    m5 = decode_msm(msm_obs_payload(1085, 0, [(5, 68, 6, 256, 10)], [2], [(100, 200, 9, 0, 42, 0)]))
+    assert m5.glonass_channels == (-1,)
+    # DF407 分段映射
+    assert [lock_time_ms(i, True) for i in (63, 64, 96, 703, 704)] == [63, 64, 128, 1048576 * 703 - 671088640, 67108864]
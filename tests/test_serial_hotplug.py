@@ -0,0 +1,152 @@
+import os
+import pty
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from rtk_lora.serial_forwarder import SerialForwarder
+
+from rtcm_samples import frame, payload_1005
+
+F1 = frame(payload_1005(1, -2148744.1, 4426641.2, 4044655.9))
+F2 = frame(payload_1005(2, -2148744.1, 4426641.2, 4044655.9))
+F3 = frame(payload_1005(3, -2148744.1, 4426641.2, 4044655.9))
+
+pytestmark = pytest.mark.skipif(not hasattr(pty, "openpty"), reason="需要 pty")
+
+
+class FakeDongle:
+    """基于 pty 的替身 USB LoRa 模块：可拔出、再插入（设备名会变化）。"""
+
+    def __init__(self):
+        self.master = None
+        self.device = None
+        self.plug()
+
+    def plug(self):
+        self.master, slave = pty.openpty()
+        self.device = os.ttyname(slave)
+        self._slave = slave
+
+    def unplug(self):
+        os.close(self.master)
+        os.close(self._slave)
+        self.master = None
+
+    def ports(self):
+        if self.master is None:
+            return []
+        return [SimpleNamespace(device=self.device, vid=0x1A86, pid=0x7523, serial_number="LORA01")]
+
+    def read_all(self, timeout=1.0):
+        out = bytearray()
+        end = time.monotonic() + timeout
+        os.set_blocking(self.master, False)
+        while time.monotonic() < end:
+            try:
+                out += os.read(self.master, 4096)
+            except BlockingIOError:
+                time.sleep(0.01)
+        return bytes(out)
+
+
+def test_reopens_same_device_by_identity_and_flushes_buffer():
+    dongle = FakeDongle()
+    first_device = dongle.device
+    reopened = threading.Event()
+    fwd = SerialForwarder(
+        first_device, 115200,
+        on_rx=lambda d: None,
+        port_lister=dongle.ports,
+        reopen_interval=0.05,
+        presence_check_interval=0.05,
+        on_reopen=reopened.set,
+    )
+    fwd.open()
+    try:
+        assert fwd.identity == (0x1A86, 0x7523, "LORA01")
+        fwd.send(b"before")
+        assert dongle.read_all(0.1) == b"before"
+
+        dongle.unplug()
+        deadline = time.monotonic() + 2.0
+        while fwd.connected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not fwd.connected
+        # 丢失期间 send 不抛异常，数据按帧进入缓冲；帧可跨多次 send
+        fwd.send(F1 + F2[:7])
+        fwd.send(F2[7:])
+
+        time.sleep(0.2)
+        dongle.plug()
+        assert reopened.wait(2.0)
+        assert fwd.connected
+        assert fwd.port == dongle.device
+        assert fwd.outages == 1
+        assert fwd.last_outage_s >= 0.2
+        assert dongle.read_all(0.2) == F1 + F2
+        fwd.send(b"after")
+        assert dongle.read_all(0.1) == b"after"
+    finally:
+        fwd.close()
+
+
+def test_write_error_marks_device_lost_without_rx_thread():
+    dongle = FakeDongle()
+    fwd = SerialForwarder(dongle.device, 115200, port_lister=dongle.ports, reopen_interval=0.05)
+    fwd.open()
+    try:
+        dongle.unplug()
+        fwd.send(F1)  # 触发写错误 -> 判定丢失，但不抛异常
+        assert not fwd.connected
+        fwd.send(b"noise" + F2)
+        assert [f for _t, f in fwd._pending] == [F1, F2]
+    finally:
+        fwd.close()
+
+
+def test_buffer_is_bounded_by_size_and_age_at_frame_boundaries():
+    dongle = FakeDongle()
+    fwd = SerialForwarder(dongle.device, 115200, port_lister=dongle.ports,
+                          reopen_interval=10.0, buffer_limit=2 * len(F1), buffer_max_age=0.2)
+    fwd.open()
+    try:
+        dongle.unplug()
+        fwd.send(F1 + F2 + F3[:5])
+        fwd.send(F3[5:])
+        # 超出容量：整帧丢弃最旧的 F1
+        assert [f for _t, f in fwd._pending] == [F2, F3]
+        assert fwd.bytes_dropped == len(F1)
+        time.sleep(0.3)
+        fwd.send(F1)
+        # 过期帧丢弃，只留新帧
+        assert [f for _t, f in fwd._pending] == [F1]
+        assert fwd.bytes_dropped == len(F1) + len(F2) + len(F3)
+    finally:
+        fwd.close()
+
+
+def test_warm_start_replaces_outage_buffer_on_reopen():
+    dongle = FakeDongle()
+    warm = []
+    reopened = threading.Event()
+    fwd = SerialForwarder(dongle.device, 115200, on_rx=lambda d: None, port_lister=dongle.ports,
+                          reopen_interval=0.05, presence_check_interval=0.05,
+                          on_reopen=reopened.set, warm_start=lambda: list(warm), warm_start_rate=0)
+    fwd.open()
+    try:
+        dongle.unplug()
+        deadline = time.monotonic() + 2.0
+        while fwd.connected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        fwd.send(F1)  # 中断期间的旧数据
+        warm.append(F3)  # 恢复时已有更新的快照
+        dongle.plug()
+        assert reopened.wait(2.0)
+        # 只发快照，不在其后补发更早的 F1
+        assert dongle.read_all(0.3) == F3
+        assert not fwd._pending
+    finally:
+        fwd.close()
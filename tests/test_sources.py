@@ -0,0 +1,211 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from rtk_lora.rtcm_parser import RTCMParser
+from rtk_lora.sources import (FramedFeed, SerialSource, SourceLoop, TcpClientSource,
+                              TcpServerSource, UdpSource, build_input)
+
+from rtcm_samples import frame, payload_1005
+
+F1005 = frame(payload_1005(7, -2148744.1, 4426641.2, 4044655.9))
+F1005B = frame(payload_1005(8, -2148744.1, 4426641.2, 4044656.9))
+
+
+class Collector:
+    """按 (输入源名, 数据流) 分别分帧，记录收到的完整帧与回调线程。"""
+
+    def __init__(self):
+        self.frames = {}
+        self.calls = 0
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def make_handler(self, source, stream):
+        parser = RTCMParser(verify_crc=True)
+
+        def handle(data):
+            with self.lock:
+                self.calls += 1
+                self.threads.add(threading.current_thread().name)
+                for _m, f in parser.feed_frames(bytes(data)):
+                    self.frames.setdefault((source.name, stream), []).append(f)
+        return handle
+
+    def count(self):
+        with self.lock:
+            return sum(len(v) for v in self.frames.values())
+
+    def wait(self, n, timeout=3.0):
+        end = time.monotonic() + timeout
+        while self.count() < n and time.monotonic() < end:
+            time.sleep(0.01)
+        return self.count()
+
+
+def _wait_address(src, timeout=2.0):
+    end = time.monotonic() + timeout
+    while src.address[1] == 0 and time.monotonic() < end:
+        time.sleep(0.01)
+    return src.address
+
+
+def test_tcp_client_receives_split_frames_and_reconnects():
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(1)
+    port = srv.getsockname()[1]
+    col = Collector()
+    loop = SourceLoop(col.make_handler)
+    src = TcpClientSource("127.0.0.1", port, name="lan-base")
+    loop.add(src)
+    loop.start()
+    try:
+        conn, _ = srv.accept()
+        # 帧被拆开跨多次发送
+        conn.sendall(F1005[:5])
+        time.sleep(0.05)
+        conn.sendall(F1005[5:] + F1005B)
+        assert col.wait(2) == 2
+        conn.close()
+        # 断开后自动重连，新连接的数据继续到达
+        srv.settimeout(5.0)
+        conn, _ = srv.accept()
+        conn.sendall(F1005)
+        assert col.wait(3) == 3
+        assert src.reconnects == 1
+        conn.close()
+    finally:
+        loop.stop()
+        srv.close()
+    assert col.threads == {"rtcm-inputs"}
+
+
+def test_tcp_server_keeps_streams_separate():
+    col = Collector()
+    loop = SourceLoop(col.make_handler)
+    src = TcpServerSource(0, bind="127.0.0.1", name="listen")
+    loop.add(src)
+    loop.start()
+    try:
+        addr = _wait_address(src)
+        a = socket.create_connection(addr)
+        b = socket.create_connection(addr)
+        # 两个连接交替发送半帧：各自独立分帧，不会互相破坏
+        a.sendall(F1005[:10])
+        b.sendall(F1005B[:10])
+        time.sleep(0.05)
+        a.sendall(F1005[10:])
+        b.sendall(F1005B[10:])
+        assert col.wait(2) == 2
+        assert sorted(f for v in col.frames.values() for f in v) == sorted([F1005, F1005B])
+        assert len(col.frames) == 2 and src.connections == 2
+        a.close()
+        b.close()
+    finally:
+        loop.stop()
+
+
+def test_udp_burst_is_batched():
+    col = Collector()
+    loop = SourceLoop(col.make_handler)
+    src = UdpSource(0, bind="127.0.0.1", name="udp")
+    loop.add(src)
+    n = 500
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        loop.start()
+        addr = _wait_address(src)
+        for _ in range(n):
+            tx.sendto(F1005, addr)
+        assert col.wait(n) == n
+        assert src.datagrams == n
+        # 高报文速率下按唤醒批量回调，而不是每个报文一次
+        assert col.calls == src.wakeups < n
+    finally:
+        tx.close()
+        loop.stop()
+
+
+def test_udp_allow_from_rejects_other_senders():
+    col = Collector()
+    loop = SourceLoop(col.make_handler)
+    src = UdpSource(0, bind="127.0.0.1", allow_from="127.0.0.2")
+    loop.add(src)
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        loop.start()
+        tx.sendto(F1005, _wait_address(src))
+        end = time.monotonic() + 2.0
+        while not src.datagrams_rejected and time.monotonic() < end:
+            time.sleep(0.01)
+        assert src.datagrams_rejected == 1 and col.count() == 0
+    finally:
+        tx.close()
+        loop.stop()
+
+
+class FakeSerial:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = list(chunks)
+        self.reads = 0
+        self.fail_after = fail_after
+        self.closed = False
+
+    @property
+    def in_waiting(self):
+        if self.fail_after is not None and self.reads >= self.fail_after:
+            raise OSError("设备已拔出")
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, n):
+        self.reads += 1
+        return self.chunks.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+def test_serial_source_polls_and_reopens():
+    opened = []
+
+    def factory(port, baud, timeout=None):
+        s = FakeSerial([F1005], fail_after=1) if not opened else FakeSerial([F1005B])
+        opened.append(s)
+        return s
+
+    col = Collector()
+    loop = SourceLoop(col.make_handler)
+    src = SerialSource("COM9", 115200, poll_interval=0.005, reopen_interval=0.01, serial_factory=factory)
+    loop.add(src)
+    loop.start()
+    try:
+        assert col.wait(2) == 2
+    finally:
+        loop.stop()
+    assert src.reconnects == 1 and opened[0].closed
+    assert sorted(f for v in col.frames.values() for f in v) == sorted([F1005, F1005B])
+
+
+def test_framed_feed_yields_only_complete_frames():
+    calls = []
+    feed = FramedFeed(calls.append, capacity=4096)
+    # 超过环形缓冲容量的一大批数据也能完整分帧，且只回调一次
+    feed(F1005 * 200)
+    assert len(calls) == 1 and calls[0] == [(1005, F1005)] * 200
+    # 半帧不回调，凑齐后只交出完整帧
+    feed(F1005B[:9])
+    assert len(calls) == 1
+    feed(F1005B[9:] + F1005[:4])
+    assert calls[-1] == [(1005, F1005B)]
+
+
+def test_build_input_from_config():
+    src = build_input({"type": "udp", "port": 5020, "group": "239.0.0.1", "role": "net"})
+    assert isinstance(src, UdpSource) and src.group == "239.0.0.1" and src.role == "net"
+    with pytest.raises(ValueError):
+        build_input({"type": "carrier-pigeon"})
+    with pytest.raises(ValueError):
+        build_input({"type": "udp", "port": 1, "role": "rover"})
@@ -0,0 +1,174 @@
+import random
+import time
+
+from rtk_lora.ntrip_client import NTRIPClient
+from rtk_lora.sourcetable import (
+    MountpointIndex,
+    MountpointSelector,
+    SourcetableCache,
+    SourcetableParser,
+    is_compatible,
+    parse_str_line,
+)
+
+from caster_stub import StubCaster
+
+TABLE = (
+    b"SOURCETABLE 200 OK\r\n"
+    b"Content-Type: text/plain\r\n\r\n"
+    b"CAS;caster.example;2101;Example;;0;CHN;31.0;121.0;0.0.0.0;0;\r\n"
+    b"STR;SHA1;Shanghai;RTCM 3.2;1005(10),1074(1),1084(1);2;GPS+GLO;NET;CHN;31.23;121.47;0;0;gen;none;B;N;9600;\r\n"
+    b"STR;BJ7;Beijing;RTCM 3.3;1006(10),1077(1),1127(1);2;GPS+BDS;NET;CHN;39.90;116.40;0;0;gen;none;B;N;9600;\r\n"
+    b"STR;SZ4;Shenzhen;RTCM 3.2;1005(10),1074(1);2;GPS;NET;CHN;22.54;114.06;0;0;gen;none;B;N;9600;\r\n"
+    b"STR;OLD;Legacy;RTCM 2.3;1(1);1;GPS;NET;CHN;31.10;121.40;0;0;gen;none;B;N;9600;\r\n"
+    b"STR;VRS;Virtual;RTCM 3.2;1074(1);2;GPS;NET;CHN;0.00;0.00;1;1;gen;none;B;N;9600;\r\n"
+    b"ENDSOURCETABLE\r\n"
+)
+
+
+def test_incremental_parse_any_split():
+    p = SourcetableParser()
+    for i in range(0, len(TABLE), 7):
+        p.feed(TABLE[i:i + 7])
+    assert p.done
+    assert [e.mountpoint for e in p.entries] == ["SHA1", "BJ7", "SZ4", "OLD", "VRS"]
+    assert p.entries[0].lat_deg == 31.23
+
+
+def test_nearest_compatible_and_msm_filter():
+    p = SourcetableParser()
+    p.feed(TABLE)
+    idx = MountpointIndex(p.entries)
+    # 占位坐标 (0,0) 的条目不参与空间选择
+    assert "VRS" not in [e.mountpoint for e in idx.entries]
+    # 最近的是 RTCM 2.3 的 OLD，但不兼容
+    e, dist = idx.nearest(31.1, 121.4, accept=is_compatible)
+    assert e.mountpoint == "SHA1"
+    assert 10_000 < dist < 30_000
+    e, _ = idx.nearest(31.1, 121.4, accept=lambda x: is_compatible(x, msm=7))
+    assert e.mountpoint == "BJ7"
+    # 兼容性条件在建树时过滤：树中只有兼容条目，查询无需 accept
+    idx7 = MountpointIndex(p.entries, accept=lambda x: is_compatible(x, msm=7))
+    assert [x.mountpoint for x in idx7.entries] == ["BJ7"]
+    assert idx7.nearest(31.1, 121.4)[0].mountpoint == "BJ7"
+
+
+def test_kdtree_matches_brute_force_and_is_fast():
+    rng = random.Random(3)
+    lines = []
+    for i in range(2000):
+        lines.append(
+            f"STR;M{i};x;RTCM 3.2;1074(1);2;GPS;N;CHN;{rng.uniform(-60, 60):.4f};{rng.uniform(-180, 180):.4f};0;0;g;none;B;N;0;"
+        )
+    entries = [parse_str_line(line) for line in lines]
+    idx = MountpointIndex(entries)
+    queries = [(rng.uniform(-60, 60), rng.uniform(-180, 180)) for _ in range(200)]
+    t0 = time.perf_counter()
+    results = [idx.nearest(lat, lon) for lat, lon in queries]
+    per_query = (time.perf_counter() - t0) / len(queries)
+    assert per_query < 1e-3
+    import math
+    for (lat, lon), (e, _d) in zip(queries, results):
+        def hav(x):
+            a, b = math.radians(lat), math.radians(x.lat_deg)
+            dl = math.radians(x.lon_deg - lon)
+            return math.sin((b - a) / 2) ** 2 + math.cos(a) * math.cos(b) * math.sin(dl / 2) ** 2
+        assert e.mountpoint == min(entries, key=hav).mountpoint
+
+
+def test_selector_hysteresis():
+    p = SourcetableParser()
+    p.feed(TABLE)
+    sel = MountpointSelector(MountpointIndex(p.entries), accept=is_compatible, hysteresis_m=50_000)
+    assert sel.choose(31.2, 121.4).mountpoint == "SHA1"
+    # 向北移动一点点：仍保持 SHA1
+    assert sel.choose(31.5, 121.4).mountpoint == "SHA1"
+    # 飞到北京附近：切换
+    assert sel.choose(39.8, 116.3).mountpoint == "BJ7"
+
+
+def test_cache_ttl(tmp_path):
+    p = SourcetableParser()
+    p.feed(TABLE)
+    cache = SourcetableCache(str(tmp_path / "st.json"), ttl=100.0)
+    cache.store("h", 2101, p.entries)
+    assert cache.load("h", 2101) == p.entries
+    assert cache.load("h", 2102) is None
+    assert SourcetableCache(str(tmp_path / "st.json"), ttl=-1.0).load("h", 2101) is None
+
+
+def test_client_auto_selects_mountpoint(tmp_path):
+    requests = []
+
+    def serve_table(conn):
+        requests.append(conn.recv(4096))
+        conn.sendall(TABLE)
+        conn.close()
+
+    def serve_stream(conn):
+        requests.append(conn.recv(4096))
+        conn.sendall(b"ICY 200 OK\r\n\r\n\xd3\x00\x00\x00\x00\x00")
+        time.sleep(1.0)
+        conn.close()
+
+    caster = StubCaster([serve_table, serve_stream]).start()
+    import threading
+    got = threading.Event()
+    client = NTRIPClient(
+        caster.host, caster.port, "", "u", "p",
+        get_position=lambda: (22.6, 114.0, 0.0),
+        on_rtcm=lambda d: got.set(),
+        auto_select=True,
+        sourcetable_cache=SourcetableCache(str(tmp_path / "st.json")),
+    )
+    client.start()
+    try:
+        assert got.wait(3.0)
+        assert client.mountpoint == "SZ4"
+        assert requests[0].startswith(b"GET / HTTP/1.0")
+        assert requests[1].startswith(b"GET /SZ4 HTTP/1.0")
+    finally:
+        client.stop()
+        caster.stop()
+
+
+def test_client_rebuilds_selector_after_ttl_and_survives_errors(tmp_path):
+    p = SourcetableParser()
+    p.feed(TABLE)
+    tables = [[e for e in p.entries if e.mountpoint != "SZ4"], p.entries]
+    pos = [(22.6, 114.0, 0.0)]
+
+    def get_position():
+        if pos[0] is None:
+            raise RuntimeError("no position")
+        return pos[0]
+
+    logs = []
+    client = NTRIPClient("h", 2101, "", "u", "p", get_position=get_position, on_rtcm=lambda d: None,
+                         log=logs.append, auto_select=True,
+                         sourcetable_cache=SourcetableCache(str(tmp_path / "st.json"), ttl=0.0))
+    client._load_sourcetable = lambda: tables.pop(0)
+    assert client._select_mountpoint()
+    first = client.mountpoint
+    assert first != "SZ4"
+    # 缓存过期：重新加载 sourcetable，新出现的更近挂载点可被选中
+    client._selector_built -= 1.0
+    assert client._select_mountpoint() and client.mountpoint == "SZ4"
+    # 定期重新评估时出错不应中断数据流
+    pos[0] = None
+    client._selector_built = time.time() + 1e6
+    assert not client._maybe_reselect(time.time() + client.mount_check_interval + 1)
+    assert "重新评估挂载点失败" in logs[-1]
+
+
+def test_client_reports_mountpoint_change():
+    p = SourcetableParser()
+    p.feed(TABLE)
+    changes = []
+    client = NTRIPClient("h", 2101, "SHA1", "u", "p", get_position=lambda: (22.6, 114.0, 0.0),
+                         on_rtcm=lambda d: None, auto_select=True,
+                         on_mountpoint_change=changes.append)
+    client._load_sourcetable = lambda: p.entries
+    assert client._select_mountpoint()
+    assert not client._select_mountpoint()
+    assert changes == ["SZ4"]
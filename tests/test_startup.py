@@ -0,0 +1,51 @@
+import json
+
+from rtk_lora.startup import EXIT_ENV, REPORT_ENV, StartupTimer, install_env_hooks
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_phases_and_marks_relative_to_t0():
+    clk = _Clock()
+    st = StartupTimer(t0=99.5, clock=clk)
+    with st.phase("tk_init"):
+        clk.t += 0.120
+    assert st.mark("window_shown")
+    clk.t += 1.0
+    # 同名时间点只记录第一次
+    assert not st.mark("window_shown")
+    r = st.report()
+    assert r["phases_ms"] == {"tk_init": 120.0}
+    assert r["marks_ms"] == {"window_shown": 620.0}
+    assert abs(r["marks_wall"]["window_shown"] - r["wall0"] - 0.62) < 1e-6
+    assert "tk_init 120ms" in st.format() and "window_shown 620ms" in st.format()
+
+
+def test_env_hooks_write_report_and_exit_on_target(tmp_path, monkeypatch):
+    path = str(tmp_path / "startup.json")
+    monkeypatch.setenv(REPORT_ENV, path)
+    monkeypatch.setenv(EXIT_ENV, "first_forward")
+    st = StartupTimer(clock=_Clock())
+    exits = []
+    install_env_hooks(st, lambda: exits.append(1))
+    st.mark("window_shown")
+    assert json.load(open(path, encoding="utf-8"))["marks_ms"].keys() == {"window_shown"}
+    assert exits == []
+    st.mark("first_forward")
+    st.mark("first_forward")
+    assert exits == [1]
+    assert set(json.load(open(path, encoding="utf-8"))["marks_ms"]) == {"window_shown", "first_forward"}
+
+
+def test_env_hooks_inactive_without_env(monkeypatch):
+    monkeypatch.delenv(REPORT_ENV, raising=False)
+    monkeypatch.delenv(EXIT_ENV, raising=False)
+    st = StartupTimer()
+    install_env_hooks(st, lambda: None)
+    assert st.listeners == []
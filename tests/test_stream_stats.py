@@ -0,0 +1,68 @@
+from rtk_lora.rtcm_parser import RTCMParser
+from rtk_lora.stream_stats import StreamStats
+
+
+def _frame(msg_num: int, length: int) -> bytes:
+    payload = bytes([msg_num >> 4, (msg_num & 0x0F) << 4]) + bytes(length - 2)
+    return bytes([0xD3, length >> 8, length & 0xFF]) + payload + b"\x00\x00\x00"
+
+
+def test_rates_jitter_and_completeness():
+    st = StreamStats(windows=(10.0, 60.0))
+    # 1077 每秒一次，1005 每 5 秒一次，共 60 秒
+    for sec in range(60):
+        t = 100.0 + sec
+        st.record(1077, 500, t + (0.01 if sec % 2 else 0.0))
+        if sec % 5 == 0:
+            st.record(1005, 25, t + 0.02)
+    snap = {s.msg_num: s for s in st.snapshot(now=159.5)}
+    w10 = snap[1077].windows[0]
+    assert w10.count == 10
+    assert abs(w10.rate_hz - 1.0) < 1e-9
+    assert abs(w10.bytes_per_s - 500.0) < 1e-6
+    assert 0.005 < w10.jitter_s < 0.02
+    assert w10.completeness == 1.0
+    assert abs(snap[1005].windows[0].completeness - 0.2) < 1e-9
+    assert abs(snap[1005].age_s - 4.48) < 1e-6
+    assert snap[1077].windows[1].count == 60
+
+
+def test_windows_expire_on_snapshot():
+    st = StreamStats(windows=(10.0,))
+    st.record(1005, 25, 0.0)
+    assert st.snapshot(now=5.0)[0].windows[0].count == 1
+    assert st.snapshot(now=20.0)[0].windows[0].count == 0
+
+
+def test_bounded_memory_when_capacity_exceeded():
+    st = StreamStats(windows=(600.0,), capacity=100)
+    for i in range(1000):
+        st.record(1077, 100, i * 0.1)
+    w = st.snapshot(now=99.95)[0].windows[0]
+    # 只保留最近 100 条，速率按实际覆盖时长计算
+    assert w.count == 100
+    assert abs(w.rate_hz - 10.0) < 0.2
+
+
+def test_stats_fed_from_parsed_frames():
+    # 与 app._on_net_frame 相同：逐帧 record(msg_num, 帧长)
+    st = StreamStats()
+    p = RTCMParser()
+    data = _frame(1077, 40) + _frame(1005, 19) + _frame(1077, 40)
+    assert p.feed_frames(data[:30]) == []
+    for msg_num, frame in p.feed_frames(data[30:]):
+        st.record(msg_num, len(frame))
+    snap = {s.msg_num: s for s in st.snapshot()}
+    assert snap[1077].total == 2
+    assert snap[1077].windows[0].bytes_per_s > 0
+
+
+def test_jitter_stays_accurate_over_long_sessions():
+    st = StreamStats(windows=(600.0,), capacity=1024)
+    # 长时间运行（单调时钟数值很大）的 10s 周期消息、抖动极小：
+    # 滑动累加平方和反复加减会抵消出错
+    t0 = 3.0e6
+    for i in range(100000):
+        st.record(1005, 100, t0 + i * 10.0 + (1e-6 if i % 2 else 0.0))
+    w = st.snapshot(now=t0 + 100000 * 10.0)[0].windows[0]
+    assert abs(w.jitter_s - 1e-6) < 1e-8
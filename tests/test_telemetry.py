@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import sqlite3
+
+from rtk_lora.telemetry import TelemetryStore, main, session_summary
+
+
+def _fill(path, base_t=1700000000.0):
+    store = TelemetryStore(str(path), flush_interval=60.0)
+    sid = store.start_session(mode="backup", host="caster", mountpoint="RTCM32", serial_port="COM3")
+    for i in range(5):
+        store.sample(t=base_t + i, ntrip_bytes=1000 * i, serial_bytes=900 * i, forward_enabled=1,
+                     base_online=0, satellites=20 + i, reconnects=0, offset_h_m=0.5, custom=i)
+    store.event("ntrip_reconnect", {"count": 1}, t=base_t + 2)
+    return store, sid
+
+
+def test_samples_are_batched_until_flush(tmp_path):
+    db = tmp_path / "t.db"
+    store, sid = _fill(db)
+    # 队列内数据尚未落盘（flush_interval 很长，后台线程不会触发）
+    conn = sqlite3.connect(str(db))
+    assert conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0] == 0
+    store.flush()
+    assert conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0] == 5
+    extra = conn.execute("SELECT extra FROM samples ORDER BY t DESC LIMIT 1").fetchone()[0]
+    assert json.loads(extra) == {"custom": 4}
+    store.close()
+    ended, = conn.execute("SELECT ended FROM sessions WHERE id=?", (sid,)).fetchone()
+    assert ended is not None
+    kinds = [k for k, in conn.execute("SELECT kind FROM events ORDER BY t")]
+    assert "ntrip_reconnect" in kinds and kinds[-1] == "session_end"
+    s = session_summary(conn, sid)
+    assert s["samples"] == 5 and s["duration_s"] == 4.0 and s["min_satellites"] == 20
+    conn.close()
+
+
+def test_pending_queue_is_bounded(tmp_path):
+    store = TelemetryStore(str(tmp_path / "t.db"), flush_interval=60.0, max_pending=10)
+    store.start_session()
+    for i in range(20):
+        store.sample(t=float(i), ntrip_bytes=i)
+    # session_start 事件 + 20 个样本，超出部分丢弃最旧的样本
+    assert store.dropped == 11
+    store.close()
+
+
+def test_sample_without_session_is_ignored(tmp_path):
+    store = TelemetryStore(str(tmp_path / "t.db"))
+    store.sample(ntrip_bytes=1)
+    store.event("x")
+    store.flush()
+    assert store.rows_written == 0
+    store.close()
+
+
+def test_cli_export_and_listing(tmp_path, capsys):
+    db = tmp_path / "t.db"
+    store, sid = _fill(db)
+    store.close()
+    out = tmp_path / "s.csv"
+    assert main(["--db", str(db), "export", "--session", str(sid), "--out", str(out)]) == 0
+    rows = list(csv.DictReader(io.StringIO(out.read_text(encoding="utf-8"))))
+    assert len(rows) == 5 and rows[-1]["ntrip_bytes"] == "4000.0"
+
+    capsys.readouterr()
+    assert main(["--db", str(db), "sessions", "--since", "2000-01-01"]) == 0
+    assert "RTCM32" in capsys.readouterr().out
+    assert main(["--db", str(db), "events", "--kind", "ntrip_reconnect"]) == 0
+    assert "ntrip_reconnect" in capsys.readouterr().out
+    # 时间过滤：只导出最后两秒
+    assert main(["--db", str(db), "export", "--format", "jsonl", "--since", "1700000003"]) == 0
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert [json.loads(x)["t"] for x in lines] == [1700000003.0, 1700000004.0]
+    assert main(["--db", str(tmp_path / "missing.db"), "sessions"]) == 1
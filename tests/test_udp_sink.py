@@ -0,0 +1,147 @@
+import socket
+import struct
+import time
+
+import pytest
+
+from rtk_lora.rtcm_parser import RTCMParser
+from rtk_lora.sources import SourceLoop, UdpSource
+from rtk_lora.udp_sink import FLAG_EPOCH_END, SeqTracker, UdpSink, unpack_datagram
+
+from rtcm_samples import frame, msm_payload, payload_1005
+
+F1005 = frame(payload_1005(7, -2148744.1, 4426641.2, 4044655.9))
+
+
+def epoch(tow):
+    # 1005 + 四星座 MSM7，最后一条多消息标志为 0
+    return F1005 + b"".join(
+        frame(msm_payload(m, tow, list(range(1, 13)), [2, 16, 22], mmb=int(m != 1127)))
+        for m in (1077, 1087, 1097, 1127)
+    )
+
+
+def _receiver(host="127.0.0.1"):
+    r = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    r.bind((host, 0))
+    r.settimeout(2.0)
+    return r
+
+
+def _drain(sock, n):
+    out = []
+    for _ in range(n):
+        out.append(sock.recv(65535))
+    return out
+
+
+def test_epoch_packed_into_frame_aligned_datagrams_under_mtu():
+    rx = _receiver()
+    sink = UdpSink([rx.getsockname()], mtu=100)
+    data = epoch(1000)
+    # 半帧切分输入：内部分帧，报文只含完整帧
+    sink.send(data[:100])
+    sink.send(data[100:])
+    assert sink.datagrams_sent == 4  # 25 + 4 * 48 字节的帧，每报文至多 92 字节
+    dgrams = _drain(rx, sink.datagrams_sent)
+    payload = b""
+    for i, d in enumerate(dgrams):
+        assert len(d) <= 100
+        seq, flags, body = unpack_datagram(d)
+        assert seq == i
+        assert bool(flags & FLAG_EPOCH_END) == (i == len(dgrams) - 1)
+        frames = RTCMParser(verify_crc=True).feed_frames(bytes(body))
+        assert b"".join(f for _m, f in frames) == bytes(body)
+        payload += bytes(body)
+    assert payload == data and sink.frames_sent == 5
+    sink.close()
+    rx.close()
+
+
+def test_many_receivers_share_one_send_path():
+    receivers = [_receiver() for _ in range(24)]
+    sink = UdpSink([r.getsockname() for r in receivers], mtu=120)
+    sink.send(epoch(2000))
+    assert sink.datagrams_sent == 3
+    for r in receivers:
+        dgrams = _drain(r, 3)
+        assert b"".join(bytes(unpack_datagram(d)[2]) for d in dgrams) == epoch(2000)
+        r.close()
+    assert sink.bytes_sent == 24 * sum(len(d) for d in dgrams)
+    sink.close()
+
+
+def test_flush_sends_partial_and_targets_parse():
+    rx = _receiver()
+    host, port = rx.getsockname()
+    sink = UdpSink([f"{host}:{port}"])
+    # 历元外的静态消息（或不含 MSM 的数据流）立即发出
+    sink.send(F1005)
+    assert sink.datagrams_sent == 1
+    seq, flags, body = unpack_datagram(rx.recv(2048))
+    assert (seq, flags, bytes(body)) == (0, 0, F1005)
+    # 历元进行中：MSM 及随后的非 MSM 帧等待历元结束，flush 可提前发出
+    msm = frame(msm_payload(1077, 3000, [1, 2], [2], mmb=1))
+    sink.send(msm)
+    sink.send(F1005)
+    assert sink.datagrams_sent == 1
+    sink.flush()
+    seq, flags, body = unpack_datagram(rx.recv(2048))
+    assert (seq, flags, bytes(body)) == (1, 0, msm + F1005)
+    sink.close()
+    rx.close()
+    with pytest.raises(ValueError):
+        UdpSink([])
+
+
+def test_seq_tracker_counts_gaps_late_and_restart():
+    t = SeqTracker()
+    assert [t.feed(s) for s in (5, 6, 9, 10)] == [0, 0, 2, 0]
+    assert t.lost == 2
+    t.feed(8)  # 迟到
+    assert (t.lost, t.late) == (1, 1)
+    t.feed(2 ** 32 - 5000)  # 大幅回退：发送端重启
+    assert t.restarts == 1 and t.feed(2 ** 32 - 4999) == 0
+    w = SeqTracker()
+    w.feed(2 ** 32 - 1)
+    assert w.feed(0) == 0 and w.feed(2) == 1  # 序号回绕
+    assert unpack_datagram(b"xx" + bytes(10)) is None
+
+
+def test_multicast_loopback_into_udp_source():
+    group = "239.255.77.77"
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                         struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton("127.0.0.1")))
+    except OSError as e:
+        pytest.skip(f"环境不支持组播: {e}")
+    finally:
+        probe.close()
+
+    got = []
+    loop = SourceLoop(lambda src, stream: lambda data: got.append(bytes(data)))
+    # 组播回环走 lo 网卡：加入组时指定 127.0.0.1
+    src = UdpSource(0, group=group, interface="127.0.0.1", seq_header=True)
+    loop.add(src)
+    loop.start()
+    try:
+        end = time.monotonic() + 2.0
+        while src.address[1] == 0 and time.monotonic() < end:
+            time.sleep(0.01)
+        port = src.address[1]
+        sink = UdpSink([(group, port)], interface="127.0.0.1", mtu=120)
+        for tow in (1000, 2000, 3000):
+            sink.send(epoch(tow))
+        n = sink.datagrams_sent
+        end = time.monotonic() + 3.0
+        while src.datagrams < n and time.monotonic() < end:
+            time.sleep(0.01)
+        sink.close()
+    finally:
+        loop.stop()
+    if src.datagrams == 0:
+        pytest.skip("组播回环不可用")
+    # 去掉报文头后的数据即原始帧流
+    assert b"".join(got) == epoch(1000) + epoch(2000) + epoch(3000)
+    assert src.seq.lost == 0 and src.seq.received == n
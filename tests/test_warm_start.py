@@ -0,0 +1,156 @@
+import os
+import pty
+import threading
+import time
+
+from rtk_lora.rtcm_parser import RTCMParser
+from rtk_lora.serial_forwarder import SerialForwarder
+from rtk_lora.warm_start import WarmStartCache
+
+from rtcm_samples import frame, msm_payload
+
+F1005 = frame(bytes([1005 >> 4, (1005 & 0x0F) << 4]) + bytes(17))
+F1033 = frame(bytes([1033 >> 4, (1033 & 0x0F) << 4]) + bytes(10))
+
+
+def _epoch(tow_ms):
+    return [
+        frame(msm_payload(1074, tow_ms, [1, 2, 3], [2], mmb=1)),
+        frame(msm_payload(1124, tow_ms - 14000, [5, 6], [2], mmb=0)),
+    ]
+
+
+def _captured_stream(seconds=40):
+    """按挂载点常见节奏生成的数据：MSM 每秒一个历元，1005 每 10s，1033 每 30s。"""
+    out = []
+    for sec in range(seconds):
+        t = float(sec)
+        if sec % 10 == 0:
+            out.append((t, 1005, F1005))
+        if sec % 30 == 0:
+            out.append((t, 1033, F1033))
+        for f in _epoch(100000 + sec * 1000):
+            out.append((t + 0.05, (f[3] << 4) | (f[4] >> 4), f))
+    return out
+
+
+def _time_to_ready(connect_t, stream, primed):
+    """流动站开始收敛的前提：收到基站坐标(1005/1006)与一个完整 MSM 历元。"""
+    parser = RTCMParser()
+    have_coord = have_epoch = False
+    for msg_num, _f in parser.feed_frames(b"".join(primed)):
+        have_coord |= msg_num in (1005, 1006)
+        have_epoch |= msg_num == 1124
+    if have_coord and have_epoch:
+        return 0.0
+    for t, _m, f in stream:
+        if t < connect_t:
+            continue
+        for msg_num, _f in parser.feed_frames(f):
+            have_coord |= msg_num in (1005, 1006)
+            have_epoch |= msg_num == 1124
+        if have_coord and have_epoch:
+            return t - connect_t
+    return float("inf")
+
+
+def test_snapshot_static_first_then_last_complete_epoch():
+    c = WarmStartCache(clock=lambda: 0.0)
+    for f in _epoch(100000):
+        c.add((f[3] << 4) | (f[4] >> 4), f)
+    c.add(1033, F1033)
+    c.add(1005, F1005)
+    # 一个未结束的历元不应进入快照
+    c.add(1074, _epoch(200000)[0])
+    snap = c.snapshot()
+    assert snap[:2] == [F1005, F1033]
+    assert snap[2:] == _epoch(100000)
+
+
+def test_stale_epoch_not_replayed():
+    t = [0.0]
+    c = WarmStartCache(max_epoch_age=5.0, clock=lambda: t[0])
+    c.add(1005, F1005)
+    for f in _epoch(100000):
+        c.add((f[3] << 4) | (f[4] >> 4), f)
+    t[0] = 10.0
+    assert c.snapshot() == [F1005]
+
+
+def test_warm_start_shortens_time_to_ready_on_captured_stream():
+    stream = _captured_stream()
+    gains = []
+    for connect_t in (1.5, 12.5, 27.3):
+        cache = WarmStartCache(clock=lambda: 0.0)
+        for t, msg_num, f in stream:
+            if t < connect_t:
+                cache.add(msg_num, f, now=0.0)
+        cold = _time_to_ready(connect_t, stream, [])
+        warm = _time_to_ready(connect_t, stream, cache.snapshot(now=0.0))
+        assert warm == 0.0
+        gains.append(cold - warm)
+    assert min(gains) > 2.0
+
+
+def test_serial_forwarder_sends_warm_frames_before_live_data():
+    master, slave = pty.openpty()
+    warm = [F1005, F1033]
+    fwd = SerialForwarder(os.ttyname(slave), 115200, port_lister=lambda: [],
+                          warm_start=lambda: warm, warm_start_rate=2000.0)
+    fwd.open()
+    try:
+        live = _epoch(200000)[0]
+        fwd.send(live)  # 暖启动期间的实时数据先缓冲
+        time.sleep(0.3)
+        os.set_blocking(master, False)
+        got = os.read(master, 4096)
+        assert got == F1005 + F1033 + live
+        assert fwd.warm_start_bytes == len(F1005) + len(F1033)
+    finally:
+        fwd.close()
+        os.close(master)
+        os.close(slave)
+
+
+def test_concurrent_live_sender_keeps_frames_intact():
+    master, slave = pty.openpty()
+    os.set_blocking(master, False)
+    warm = [F1005, F1033] * 4
+    live = [f for sec in range(40) for f in _epoch(300000 + sec * 1000)]
+    stream = b"".join(live)
+    # 日志回调较慢时更容易暴露暖启动结束与补发之间的空档
+    fwd = SerialForwarder(os.ttyname(slave), 115200, port_lister=lambda: [],
+                          log=lambda m: time.sleep(0.02),
+                          warm_start=lambda: warm, warm_start_rate=3000.0)
+    got = bytearray()
+    stop = threading.Event()
+
+    def drain():
+        while not stop.is_set():
+            try:
+                got.extend(os.read(master, 4096))
+            except BlockingIOError:
+                time.sleep(0.002)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    fwd.open()
+    try:
+        # 模拟 NTRIP 线程：在暖启动期间及结束前后，按任意边界切块持续发送
+        for i in range(0, len(stream), 7):
+            fwd.send(stream[i:i + 7])
+            time.sleep(0.0005)
+        time.sleep(0.3)
+    finally:
+        stop.set()
+        reader.join(timeout=1.0)
+        fwd.close()
+        os.close(master)
+        os.close(slave)
+    parser = RTCMParser(verify_crc=True)
+    frames = [f for _m, f in parser.feed_frames(bytes(got))]
+    assert parser.crc_errors == 0 and not parser.buf
+    assert sum(len(f) for f in frames) == len(got)
+    # 暖启动帧全部在前，实时帧顺序不变
+    assert frames[:len(warm)] == warm
+    assert frames[len(warm):] == live